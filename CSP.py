@@ -1,147 +1,694 @@
-from collections import deque
-from typing import Callable, List, Tuple
-
-
-class CSP(object):
-    """
-    Represents a Constraint Satisfaction Problem (CSP).
-
-    Attributes:
-        variables (dict): A dictionary that maps variables to their domains.
-        constraints (list): A list of constraints in the form of [constraint_func, *variables].
-        unassigned_var (list): A list of unassigned variables.
-        var_constraints (dict): A dictionary that maps variables to their associated constraints.
-
-    Methods:
-        add_constraint(constraint_func, variables): Adds a constraint to the CSP.
-        add_variable(variable, domain): Adds a variable to the CSP with its domain.
-    """
-
-    def __init__(self, *args, **kwargs) -> None:
-        """
-        Initializes a Constraint Satisfaction Problem (CSP) object.
-
-        Args:
-            *args: Variable length argument list.
-            **kwargs: Arbitrary keyword arguments.
-
-        Attributes:
-            variables (dict): A dictionary to store the variables of the CSP.
-            constraints (list): A list to store the constraints of the CSP.
-            unassigned_var (list): A list to store the unassigned variables of the CSP.
-            var_constraints (dict): A dictionary to store the constraints associated with each variable.
-            assignments (dict): A dictionary to store the assignments of the CSP.
-        """
-        self.variables = {}
-        self.constraints = []
-        self.unassigned_var = []
-        self.var_constraints = {}
-        self.assignments = {}
-        self.assignments_number = 0
-
-    def add_constraint(self, constraint_func: Callable, variables: List[str]) -> None:
-        """
-        Adds a constraint to the CSP.
-
-        Args:
-            constraint_func (function): The constraint function to be added.
-            variables (list): The variables involved in the constraint.
-
-        Returns:
-            None
-        """
-        self.constraints.append([constraint_func, *variables])
-
-        for variable in variables:
-            if variable not in self.var_constraints:
-                self.var_constraints[variable] = []
-            self.var_constraints[variable].append(
-                (constraint_func, variables[0] if variable == variables[1] else variables[1]))
-
-    def add_variable(self, variable: str, domain: List) -> None:
-        """
-        Adds a variable to the CSP with its domain.
-
-        Args:
-            variable: The variable to be added.
-            domain: The domain of the variable.
-
-        Returns:
-            None
-        """
-        self.unassigned_var.append(variable)
-        self.variables[variable] = domain
-        self.assignments[variable] = None
-        self.var_constraints[variable] = []
-
-    def assign(self, variable: str, value) -> bool:
-        """
-        Assigns a value to a variable in the CSP.
-
-        Args:
-            variable (str): The variable to be assigned.
-            value: The value to be assigned to the variable.
-
-        Returns:
-            bool: True if the assignment is consistent with the constraints, False otherwise.
-        """
-        
-        self.variables[variable] = [value]
-        self.assignments[variable] = value
-        self.unassigned_var.remove(variable)
-        self.assignments_number += 1
-        return True
-
-    def is_consistent(self, variable: str, value) -> bool:
-        """
-        Checks if assigning a value to a variable violates any constraints.
-
-        Args:
-            variable (str): The variable to be assigned.
-            value: The value to be assigned to the variable.
-
-        Returns:
-            bool: True if the assignment is consistent with the constraints, False otherwise.
-        """
-        for constraint_func, var2 in self.var_constraints[variable]:
-            if var2 in self.variables and not any(constraint_func(value, j) for j in self.variables[var2]):
-                return False
-        return True
-    
-    def is_complete(self) -> bool:
-        """
-        Checks if the CSP is complete, i.e., all variables have been assigned.
-
-        Returns:
-            bool: True if the CSP is complete, False otherwise.
-        """
-        return len(self.unassigned_var) == 0
-    
-    def is_assigned(self, variable: str) -> bool:
-        """
-        Checks if a variable has been assigned a value.
-
-        Args:
-            variable (str): The variable to check.
-
-        Returns:
-            bool: True if the variable has been assigned, False otherwise.
-        """
-        return self.assignments[variable] is not None
-
-    def unassign(self, removed_values_from_domain: List[Tuple[str, any]], variable: str) -> None:
-        """
-        Unassign a variable and restores its domain values.
-
-        Args:
-            removed_values_from_domain (list): A list of domain values to be restored.
-            variable (str): The variable to be unassigned.
-
-        Returns:
-            None
-        """
-        for var, value in removed_values_from_domain:
-            self.variables[var].append(value)
-
-        self.unassigned_var.append(variable)
-        self.assignments[variable] = None
+from array import array
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Tuple
+
+
+def not_equal(a, b) -> bool:
+    """
+    The built-in inequality constraint. Constraints added with this function are recognized by CSP.compile, any
+    other constraint function is opaque.
+
+    Args:
+        a: The value of the first variable.
+        b: The value of the second variable.
+
+    Returns:
+        bool: True if the values differ, False otherwise.
+    """
+    return a != b
+
+
+class CompiledCSP(object):
+    """
+    A compact form of a CSP whose constraints are all inequalities, as in map coloring.
+
+    Variables are integer indices, domains are int bitmasks over a shared value list, and neighbors are stored as
+    CSR adjacency (the neighbors of variable i are targets[offsets[i]:offsets[i + 1]]).
+
+    Attributes:
+        names (list): The variable names, indexed by variable index.
+        index (dict): A dictionary that maps variable names to their indices.
+        values (list): The values, bit i of a domain stands for values[i].
+        domains (list): The domain bitmask of each variable.
+        offsets (array): The CSR row offsets, of length len(names) + 1.
+        targets (array): The CSR neighbor indices, every inequality is stored in both directions.
+        neighbors (list): The neighbor indices of each variable as tuples, a view of the CSR arrays for fast iteration.
+    """
+
+    def __init__(self, names: List[str], values: List, domains: List[int], adjacency: List[List[int]]) -> None:
+        """
+        Initializes a CompiledCSP object.
+
+        Args:
+            names (list): The variable names.
+            values (list): The values the domain bits stand for.
+            domains (list): The domain bitmask of each variable.
+            adjacency (list): The deduplicated neighbor indices of each variable.
+        """
+        self.names = names
+        self.index = {name: i for i, name in enumerate(names)}
+        self.values = values
+        self.domains = domains
+        self.offsets = array('l', [0])
+        self.targets = array('l')
+        for neighbors in adjacency:
+            self.targets.extend(neighbors)
+            self.offsets.append(len(self.targets))
+        self.neighbors = [tuple(neighbors) for neighbors in adjacency]
+
+    @classmethod
+    def from_csr(cls, names: List[str], values: List, domains: List[int], offsets, targets) -> 'CompiledCSP':
+        """
+        Creates a CompiledCSP from CSR arrays that are already built, such as the views of a mapped problem file. The
+        arrays are kept as given, but the neighbor tuples the compiled solvers read are built from them, which takes
+        time and memory linear in the number of borders.
+
+        Args:
+            names (list): The variable names.
+            values (list): The values the domain bits stand for.
+            domains (list): The domain bitmask of each variable.
+            offsets: The CSR row offsets, any sequence of integers such as an array or a memoryview.
+            targets: The CSR neighbor indices, every inequality stored in both directions.
+
+        Returns:
+            CompiledCSP: The compiled form.
+        """
+        compiled = cls.__new__(cls)
+        compiled.names = names
+        compiled.index = {name: i for i, name in enumerate(names)}
+        compiled.values = values
+        compiled.domains = domains
+        compiled.offsets = offsets
+        compiled.targets = targets
+        compiled.neighbors = [tuple(targets[offsets[i]:offsets[i + 1]]) for i in range(len(names))]
+        return compiled
+
+    def decode(self, mask: int) -> List:
+        """
+        Converts a domain bitmask back to its values.
+
+        Args:
+            mask (int): A domain bitmask.
+
+        Returns:
+            list: The values whose bits are set, in value order.
+        """
+        return [value for i, value in enumerate(self.values) if mask >> i & 1]
+
+
+class CSP(object):
+    """
+    Represents a Constraint Satisfaction Problem (CSP).
+
+    Attributes:
+        variables (dict): A dictionary that maps variables to their domains.
+        initial_domains (dict): The domain each variable was added with, which reset goes back to.
+        constraints (list): A list of constraints in the form of [constraint_func, *variables].
+        unassigned_var (list): A list of unassigned variables.
+        var_constraints (dict): A dictionary that maps variables to their associated constraints.
+        order (list): All variables, in the order they were added.
+        trail (list): The domain-change log, one (variable, value, index) entry per removed value.
+        levels (list): The checkpoints, one (trail length, number of assignments) pair per open level.
+        arcs (dict): The deduplicated (constraint_func, other variable) arcs of each variable, built by finalize.
+        neighbors (dict): The deduplicated neighbors of each variable, built by finalize.
+        members (dict): A set of the domain of each variable, kept in step with the domains once finalized.
+        supports (dict): For each variable, the number of its neighbors whose domain holds each of its values, kept
+            in step with the domains once finalized with supports, or None.
+
+    Methods:
+        add_constraint(constraint_func, variables): Adds a constraint to the CSP.
+        add_variable(variable, domain): Adds a variable to the CSP with its domain.
+        remove_constraint(constraint_func, variables): Removes a constraint from the CSP.
+        remove_variable(variable): Removes a variable and its constraints from the CSP.
+        reset(): Undoes every assignment and domain change.
+        subproblem(variables, fixed): Builds the CSP of some variables when the others keep fixed values.
+        finalize(supports): Builds the adjacency index and the domain sets the search reads.
+        compile(): Compiles the CSP into a CompiledCSP.
+        split_components(): Splits the CSP into independent CSPs, one per connected component.
+        push_level(): Opens a checkpoint, pop_level() undoes every change made since then.
+        remove_value(variable, value): Removes a value from a domain, logging it on the trail.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        """
+        Initializes a Constraint Satisfaction Problem (CSP) object.
+
+        Args:
+            *args: Variable length argument list.
+            **kwargs: Arbitrary keyword arguments.
+
+        Attributes:
+            variables (dict): A dictionary to store the variables of the CSP.
+            initial_domains (dict): A dictionary to store the domain each variable was added with.
+            constraints (list): A list to store the constraints of the CSP.
+            var_constraints (dict): A dictionary to store the constraints associated with each variable.
+            assignments (dict): A dictionary to store the assignments of the CSP.
+            order (list): A list of all variables, in the order they were added.
+            position (dict): A dictionary to store the index of each variable in order.
+            depth (dict): A dictionary to store the index of each assigned variable in assigned_stack.
+            successor (dict): The next unassigned variable of each unassigned variable, None being both ends.
+            predecessor (dict): The previous unassigned variable of each unassigned variable, None being both ends.
+            assigned_count (int): The number of assigned variables.
+            trail (list): A list to store the (variable, value, index) entries of removed domain values.
+            assigned_stack (list): A list to store the assigned variables, in assignment order.
+            levels (list): A list to store the (trail length, assigned_stack length) pair of each open level.
+            arcs (dict): The deduplicated arcs of each variable, None until finalize.
+            neighbors (dict): The deduplicated neighbors of each variable, None until finalize.
+            members (dict): The domain of each variable as a set, None until finalize.
+            supports (dict): The support counters of each variable, None unless finalized with supports.
+        """
+        self.variables = {}
+        self.initial_domains = {}
+        self.constraints = []
+        self.var_constraints = {}
+        self.assignments = {}
+        self.assignments_number = 0
+        self.order = []
+        self.position = {}
+        self.depth = {}
+        # The unassigned variables as a doubly linked list, so that assign unlinks a variable and unassign appends it
+        # in O(1), keeping the order of the original list based search
+        self.successor = {None: None}
+        self.predecessor = {None: None}
+        self.assigned_count = 0
+        self.trail = []
+        self.assigned_stack = []
+        self.levels = []
+        self.arcs = None
+        self.neighbors = None
+        self.members = None
+        self.supports = None
+
+    @property
+    def unassigned_var(self) -> List[str]:
+        """
+        The unassigned variables, as a new list. They are in the order they were added, except that a variable
+        goes to the back when it is unassigned.
+
+        Returns:
+            list: The unassigned variables.
+        """
+        variables = []
+        variable = self.successor[None]
+        while variable is not None:
+            variables.append(variable)
+            variable = self.successor[variable]
+        return variables
+
+    def link(self, variable: str) -> None:
+        """
+        Appends a variable to the unassigned variables.
+
+        Args:
+            variable (str): The variable.
+
+        Returns:
+            None
+        """
+        last = self.predecessor[None]
+        self.successor[last] = variable
+        self.predecessor[variable] = last
+        self.successor[variable] = None
+        self.predecessor[None] = variable
+
+    def unlink(self, variable: str) -> None:
+        """
+        Removes a variable from the unassigned variables.
+
+        Args:
+            variable (str): The variable, which must be unassigned.
+
+        Returns:
+            None
+        """
+        before = self.predecessor.pop(variable)
+        after = self.successor.pop(variable)
+        self.successor[before] = after
+        self.predecessor[after] = before
+
+    def add_constraint(self, constraint_func: Callable, variables: List[str]) -> None:
+        """
+        Adds a constraint to the CSP. An index built by finalize is dropped.
+
+        Args:
+            constraint_func (function): The constraint function to be added.
+            variables (list): The variables involved in the constraint.
+
+        Returns:
+            None
+        """
+        self.constraints.append([constraint_func, *variables])
+        self.arcs = self.neighbors = self.members = self.supports = None
+
+        for variable in variables:
+            if variable not in self.var_constraints:
+                self.var_constraints[variable] = []
+            self.var_constraints[variable].append(
+                (constraint_func, variables[0] if variable == variables[1] else variables[1]))
+
+    def add_variable(self, variable: str, domain: List) -> None:
+        """
+        Adds a variable to the CSP with its domain. The domain is copied, since search changes it in place. Constraints
+        added before the variable are kept, and an index built by finalize is dropped.
+
+        Args:
+            variable: The variable to be added.
+            domain: The domain of the variable.
+
+        Returns:
+            None
+        """
+        if variable not in self.variables:
+            self.position[variable] = len(self.order)
+            self.order.append(variable)
+            self.link(variable)
+        self.variables[variable] = list(domain)
+        self.initial_domains[variable] = tuple(domain)
+        self.assignments[variable] = None
+        self.var_constraints.setdefault(variable, [])
+        self.arcs = self.neighbors = self.members = self.supports = None
+
+    def remove_constraint(self, constraint_func: Callable, variables: List[str]) -> None:
+        """
+        Removes every copy of a constraint from the CSP, in either direction since constraints are symmetric for
+        is_consistent. Assignments are kept, and an index built by finalize is dropped.
+
+        Args:
+            constraint_func (function): The constraint function to be removed.
+            variables (list): The variables involved in the constraint.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the CSP has no such constraint.
+        """
+        x, y = variables
+        kept = [constraint for constraint in self.constraints
+                if not (constraint[0] is constraint_func and constraint[1:] in ([x, y], [y, x]))]
+        if len(kept) == len(self.constraints):
+            raise ValueError(f"No constraint between {x!r} and {y!r} to remove")
+        self.constraints = kept
+        for variable, other in ((x, y), (y, x)):
+            if variable in self.var_constraints:
+                self.var_constraints[variable] = [arc for arc in self.var_constraints[variable]
+                                                  if not (arc[0] is constraint_func and arc[1] == other)]
+        self.arcs = self.neighbors = self.members = self.supports = None
+
+    def remove_variable(self, variable: str) -> None:
+        """
+        Removes a variable, its domain and every constraint on it from the CSP. The CSP is reset first, so that no
+        search state refers to the variable.
+
+        Args:
+            variable (str): The variable to be removed.
+
+        Returns:
+            None
+
+        Raises:
+            KeyError: If the variable was never added.
+        """
+        if variable not in self.variables:
+            raise KeyError(variable)
+        self.reset()
+        del self.variables[variable]
+        del self.initial_domains[variable]
+        del self.assignments[variable]
+        self.unlink(variable)
+        index = self.position.pop(variable)
+        del self.order[index]
+        for i in range(index, len(self.order)):
+            self.position[self.order[i]] = i
+        for _, other in self.var_constraints.pop(variable):
+            if other in self.var_constraints:
+                self.var_constraints[other] = [arc for arc in self.var_constraints[other] if arc[1] != variable]
+        self.constraints = [constraint for constraint in self.constraints if variable not in constraint[1:]]
+        self.arcs = self.neighbors = self.members = self.supports = None
+
+    def reset(self) -> None:
+        """
+        Undoes every assignment and domain change, a loaded solution included, so that every variable is unassigned
+        with the domain it was added with. The open levels are dropped, the number of assignments is kept.
+
+        Returns:
+            None
+        """
+        for variable, domain in self.initial_domains.items():
+            self.variables[variable][:] = domain
+            self.assignments[variable] = None
+        self.trail.clear()
+        self.assigned_stack.clear()
+        self.levels.clear()
+        self.depth.clear()
+        self.successor = {None: None}
+        self.predecessor = {None: None}
+        for variable in self.order:
+            self.link(variable)
+        self.assigned_count = 0
+        if self.arcs is not None:
+            self.finalize(supports=self.supports is not None)
+
+    def subproblem(self, variables: Iterable[str], fixed: Dict) -> 'CSP':
+        """
+        Builds the CSP of some variables when every other variable keeps a fixed value. Each variable starts from the
+        domain it was added with, less the values that violate a constraint with a fixed neighbor, and only the
+        constraints between the variables are kept. Building it costs O(variables + their constraints), whatever the
+        size of this CSP.
+
+        Args:
+            variables (Iterable[str]): The variables of the subproblem.
+            fixed (dict): The values of the other variables, those missing from it are left out.
+
+        Returns:
+            CSP: The subproblem, whose solutions together with fixed are solutions of this CSP.
+        """
+        members = set(variables)
+        sub = CSP()
+        for variable in sorted(members, key=self.position.__getitem__):
+            arcs = self.var_constraints[variable]
+            sub.add_variable(variable, [value for value in self.initial_domains[variable]
+                                        if all(constraint_func(value, fixed[other]) for constraint_func, other in arcs
+                                               if other not in members and other in fixed)])
+            for constraint_func, other in arcs:
+                # Each constraint is added from the second of its variables to be added
+                if other in sub.variables and other != variable:
+                    sub.add_constraint(constraint_func, [other, variable])
+        return sub
+
+    def finalize(self, supports: bool = False) -> None:
+        """
+        Builds the index the search reads once the variables and constraints are all added: the arcs and neighbors
+        of each variable without duplicates, self loops or variables that were never added, and a set of each domain
+        for O(1) membership. The sets, and with supports the support counters LCV reads, then follow every domain
+        change, each removed or restored value updating the counters of the neighbors of its variable.
+
+        Args:
+            supports (bool, optional): Flag indicating whether to keep the support counters. Defaults to False.
+
+        Returns:
+            None
+        """
+        variables = self.variables
+        arcs = {}
+        for variable in variables:
+            unique = dict.fromkeys((constraint_func, other) for constraint_func, other in self.var_constraints[variable]
+                                   if other in variables and other != variable)
+            arcs[variable] = tuple(unique)
+        self.arcs = arcs
+        self.neighbors = {variable: tuple(dict.fromkeys(other for _, other in variable_arcs))
+                          for variable, variable_arcs in arcs.items()}
+        self.members = {variable: set(domain) for variable, domain in variables.items()}
+        self.supports = None
+        if supports:
+            members = self.members
+            self.supports = {variable: {value: sum(value in members[other] for other in self.neighbors[variable])
+                                        for value in domain}
+                             for variable, domain in variables.items()}
+
+    def track_value(self, variable: str, value, present: bool) -> None:
+        """
+        Updates the domain set of a variable and the support counters of its neighbors after a value is removed from
+        or restored to its domain. Only called once finalized.
+
+        Args:
+            variable (str): The variable whose domain changed.
+            value: The value removed or restored.
+            present (bool): True if the value was restored, False if it was removed.
+
+        Returns:
+            None
+        """
+        if present:
+            self.members[variable].add(value)
+        else:
+            self.members[variable].discard(value)
+        if self.supports is not None:
+            change = 1 if present else -1
+            supports = self.supports
+            for other in self.neighbors[variable]:
+                counts = supports[other]
+                if value in counts:
+                    counts[value] += change
+
+    def compile(self) -> CompiledCSP:
+        """
+        Compiles the CSP into integer indices, domain bitmasks and CSR adjacency. Constraints on variables that were
+        never added are ignored, like in is_consistent.
+
+        Returns:
+            CompiledCSP: The compiled form of the CSP.
+
+        Raises:
+            ValueError: If a constraint is not the built-in not_equal, or if a domain value is not hashable.
+        """
+        names = list(self.variables)
+        index = {name: i for i, name in enumerate(names)}
+        values = []
+        value_bits = {}
+        domains = []
+        for name in names:
+            mask = 0
+            for value in self.variables[name]:
+                try:
+                    if value not in value_bits:
+                        value_bits[value] = 1 << len(values)
+                        values.append(value)
+                except TypeError:
+                    raise ValueError(f"Domain value {value!r} of {name!r} is not hashable") from None
+                mask |= value_bits[value]
+            domains.append(mask)
+
+        adjacency = [set() for _ in names]
+        for constraint_func, x, y in self.constraints:
+            if constraint_func is not not_equal:
+                raise ValueError(f"Constraint between {x!r} and {y!r} is not not_equal and cannot be compiled")
+            if x in index and y in index and x != y:
+                adjacency[index[x]].add(index[y])
+                adjacency[index[y]].add(index[x])
+
+        return CompiledCSP(names, values, domains, [sorted(neighbors) for neighbors in adjacency])
+
+    def split_components(self) -> List['CSP']:
+        """
+        Splits the CSP into one CSP per connected component of its constraint graph. The components share no
+        constraint, so they can be solved independently and their solutions merged. Each component keeps the variable
+        order and the current domains of this CSP.
+
+        Returns:
+            List[CSP]: The components, ordered by their first variable.
+        """
+        component_of = {}
+        components = []
+        for variable in self.variables:
+            if variable in component_of:
+                continue
+            component = CSP()
+            stack = [variable]
+            component_of[variable] = len(components)
+            while stack:
+                current = stack.pop()
+                for _, other in self.var_constraints[current]:
+                    if other in self.variables and other not in component_of:
+                        component_of[other] = len(components)
+                        stack.append(other)
+            components.append(component)
+
+        for variable, domain in self.variables.items():
+            components[component_of[variable]].add_variable(variable, domain)
+        for constraint_func, *variables in self.constraints:
+            if all(variable in component_of for variable in variables):
+                components[component_of[variables[0]]].add_constraint(constraint_func, variables)
+        return components
+
+    def load_solution(self, assignments: Dict) -> None:
+        """
+        Writes a complete solution found outside this CSP (e.g. on its compiled form or its components) into the
+        domains and assignments. The solution is not logged on the trail.
+
+        Args:
+            assignments (dict): A value for every variable.
+
+        Returns:
+            None
+        """
+        for variable, value in assignments.items():
+            self.variables[variable][:] = [value]
+            self.assignments[variable] = value
+        self.successor = {None: None}
+        self.predecessor = {None: None}
+        self.assigned_count = len(self.order)
+        if self.arcs is not None:
+            # The domains changed outside the trail, so the sets are built again and the counters dropped
+            self.finalize()
+
+    def push_level(self) -> None:
+        """
+        Opens a checkpoint. Every domain change and assignment made after it is undone by the matching pop_level.
+
+        Returns:
+            None
+        """
+        self.levels.append((len(self.trail), len(self.assigned_stack)))
+
+    def pop_level(self) -> None:
+        """
+        Undoes every domain change and assignment made since the last push_level, in O(changes). Values go back to
+        the index they were logged with, and each unassigned variable goes to the back of the unassigned variables,
+        most recent assignment first, like the original list based search did.
+
+        Returns:
+            None
+        """
+        trail_length, assigned_length = self.levels.pop()
+        self.restore_trail(trail_length)
+        while len(self.assigned_stack) > assigned_length:
+            variable = self.assigned_stack.pop()
+            self.assignments[variable] = None
+            self.assigned_count -= 1
+            del self.depth[variable]
+            self.link(variable)
+
+    def restore_trail(self, trail_length: int) -> None:
+        """
+        Puts back the removed domain values logged after the given trail length, most recent first.
+
+        Args:
+            trail_length (int): The trail length to go back to.
+
+        Returns:
+            None
+        """
+        trail = self.trail
+        variables = self.variables
+        tracked = self.members is not None
+        while len(trail) > trail_length:
+            variable, value, index = trail.pop()
+            variables[variable].insert(index, value)
+            if tracked:
+                self.track_value(variable, value, True)
+
+    def remove_value(self, variable: str, value) -> None:
+        """
+        Removes a value from the domain of a variable and logs it on the trail.
+
+        Args:
+            variable (str): The variable whose domain shrinks.
+            value: The value to remove, must be in the domain.
+
+        Returns:
+            None
+        """
+        domain = self.variables[variable]
+        index = domain.index(value)
+        del domain[index]
+        self.trail.append((variable, value, index))
+        if self.members is not None:
+            self.track_value(variable, value, False)
+
+    def assign(self, variable: str, value) -> bool:
+        """
+        Assigns a value to a variable in the CSP. A level is pushed first, the other values of the domain are logged
+        on the trail and the variable leaves the unassigned variables, all in O(domain size). The other values are
+        logged so that undoing the assignment puts them back after the value, like the original list based search
+        did, so the next visit of the variable tries the value first.
+
+        Args:
+            variable (str): The variable to be assigned.
+            value: The value to be assigned to the variable.
+
+        Returns:
+            bool: True if the assignment is consistent with the constraints, False otherwise.
+        """
+        self.push_level()
+        domain = self.variables[variable]
+        tracked = self.members is not None
+        value_index = domain.index(value) if value in domain else len(domain)
+        for index in range(len(domain) - 1, -1, -1):
+            if domain[index] != value:
+                self.trail.append((variable, domain[index], index + 1 if index < value_index else index))
+                if tracked:
+                    self.track_value(variable, domain[index], False)
+                del domain[index]
+        self.assignments[variable] = value
+        self.depth[variable] = len(self.assigned_stack)
+        self.assigned_stack.append(variable)
+        self.unlink(variable)
+        self.assigned_count += 1
+        self.assignments_number += 1
+        return True
+
+    def next_unassigned(self) -> str:
+        """
+        Returns the first unassigned variable without copying unassigned_var.
+
+        Returns:
+            str: The first unassigned variable.
+        """
+        return self.successor[None]
+
+    def is_consistent(self, variable: str, value) -> bool:
+        """
+        Checks if assigning a value to a variable violates any constraints.
+
+        Args:
+            variable (str): The variable to be assigned.
+            value: The value to be assigned to the variable.
+
+        Returns:
+            bool: True if the assignment is consistent with the constraints, False otherwise.
+        """
+        variables = self.variables
+        if self.arcs is None:
+            for constraint_func, var2 in self.var_constraints[variable]:
+                if var2 in variables and not any(constraint_func(value, j) for j in variables[var2]):
+                    return False
+            return True
+        for constraint_func, var2 in self.arcs[variable]:
+            domain = variables[var2]
+            if constraint_func is not_equal:
+                # Only a neighbor left with this very value rules it out
+                if not domain or len(domain) == 1 and domain[0] == value:
+                    return False
+            elif not any(constraint_func(value, j) for j in domain):
+                return False
+        return True
+    
+    def is_complete(self) -> bool:
+        """
+        Checks if the CSP is complete, i.e., all variables have been assigned.
+
+        Returns:
+            bool: True if the CSP is complete, False otherwise.
+        """
+        return self.assigned_count == len(self.order)
+    
+    def is_assigned(self, variable: str) -> bool:
+        """
+        Checks if a variable has been assigned a value.
+
+        Args:
+            variable (str): The variable to check.
+
+        Returns:
+            bool: True if the variable has been assigned, False otherwise.
+        """
+        return self.assignments[variable] is not None
+
+    def unassign(self, variable: str) -> None:
+        """
+        Unassigns a variable, which must be the most recently assigned one, and restores every domain value removed
+        since its assignment.
+
+        Args:
+            variable (str): The variable to be unassigned.
+
+        Returns:
+            None
+        """
+        if not self.assigned_stack or self.assigned_stack[-1] != variable:
+            raise ValueError(f"{variable!r} is not the most recently assigned variable")
+        while self.levels[-1][1] == len(self.assigned_stack):
+            # Levels pushed after the assignment are closed with it
+            self.pop_level()
+        self.pop_level()
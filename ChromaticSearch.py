@@ -0,0 +1,222 @@
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from CSP import CSP, not_equal
+from Solver import Solver
+from graph_coloring import HEURISTIC_ENGINES, adjacency_from_borders, connected_components, greedy_clique
+from nogoods import NogoodStore
+
+
+def run_search(search: 'ChromaticSearch') -> 'ChromaticSearch':
+    """
+    Runs a ChromaticSearch, in a worker process or in this one.
+
+    Args:
+        search (ChromaticSearch): The search to run.
+
+    Returns:
+        ChromaticSearch: The search, with its results.
+    """
+    search.run()
+    return search
+
+
+class ChromaticSearch(object):
+    """
+    Finds the chromatic number of a map, i.e. the smallest number of colors that satisfies all borders.
+
+    The search starts from a heuristic coloring (DSATUR by default) as upper bound and a greedy clique as lower bound,
+    then either steps down from the upper bound or binary searches between the bounds. State is kept between color
+    counts: the adjacency is built once, the clique is pinned to distinct colors in every attempt, and failed partial
+    assignments learned with k colors are reused to prune every attempt with fewer colors, at most max_nogoods of them
+    being kept. A map with several connected components (e.g. islands) is searched one component at a time,
+    optionally in a process pool, and its chromatic number is the largest among the components.
+
+    Attributes:
+        graph (dict): A symmetric adjacency dictionary of the map.
+        palette (list): The colors, the first k of them are used for an attempt with k colors.
+        clique (list): The clique proving the lower bound.
+        lower_bound (int): The largest color count known to be insufficient plus one.
+        upper_bound (int): The smallest color count known to be sufficient.
+        solution (dict): The best coloring found so far.
+        timings (list): A list of (colors_count, seconds, solved) tuples, one per attempt.
+        assignments_number (int): The total number of assignments over all attempts.
+        nogoods (list): A list of (colors_count, nogoods) pairs, the nogoods learned by each attempt that are kept.
+    """
+
+    def __init__(self, borders: Dict[str, Iterable[str]], palette: List, strategy: str = 'descend',
+                 nogood_depth: int = 8, workers: int = 1, upper_bound_engine: str = 'dsatur',
+                 max_nogoods: int = 100000, **solver_options) -> None:
+        """
+        Initializes a ChromaticSearch object.
+
+        Args:
+            borders (Dict[str, Iterable[str]]): A dictionary mapping each region to its neighboring regions.
+            palette (List): The available colors, must be hashable.
+            strategy (str, optional): Either 'descend' or 'binary'. Defaults to 'descend'.
+            nogood_depth (int, optional): The largest failed partial assignment carried to the next attempt.
+                Defaults to 8.
+            workers (int, optional): The number of processes searching components. Defaults to 1.
+            upper_bound_engine (str, optional): The heuristic coloring engine giving the upper bound, one of
+                'largest_first', 'smallest_last', 'dsatur' and 'rlf'. Defaults to 'dsatur'.
+            max_nogoods (int, optional): The largest number of nogoods kept over all attempts, those of the oldest
+                attempts are dropped first. Within an attempt, the store evicts the least recently added or matched
+                ones. Defaults to 100000.
+            **solver_options: Keyword arguments passed to every Solver, e.g. domain_heuristics or AC_3.
+        """
+        if strategy not in ('descend', 'binary'):
+            raise ValueError(f"Unknown strategy {strategy!r}, expected 'descend' or 'binary'")
+        if upper_bound_engine not in HEURISTIC_ENGINES:
+            raise ValueError(f"Unknown engine {upper_bound_engine!r}, expected one of {list(HEURISTIC_ENGINES)}")
+        self.graph = adjacency_from_borders(borders)
+        self.palette = palette
+        self.solver_options = solver_options
+        self.strategy = strategy
+        self.nogood_depth = nogood_depth
+        self.workers = workers
+        self.upper_bound_engine = upper_bound_engine
+        self.max_nogoods = max_nogoods
+        self.clique = []
+        self.lower_bound = 0
+        self.upper_bound = 0
+        self.solution = None
+        self.timings = []
+        self.assignments_number = 0
+        # Nogoods learned with k colors, they stay valid for every attempt with at most k colors
+        self.nogoods = []
+
+    def build_csp(self, colors_count: int) -> CSP:
+        """
+        Builds the CSP for an attempt with the given number of colors, pinning the clique to distinct colors.
+
+        Args:
+            colors_count (int): The number of colors to use.
+
+        Returns:
+            CSP: The Constraint Satisfaction Problem for this attempt.
+        """
+        color_list = self.palette[:colors_count]
+        pinned = {region: [color_list[i]] for i, region in enumerate(self.clique)}
+        csp = CSP()
+        for region in self.graph:
+            csp.add_variable(region, pinned.get(region, color_list))
+        for region, neighbors in self.graph.items():
+            for neighbor in neighbors:
+                if region < neighbor:
+                    csp.add_constraint(not_equal, [region, neighbor])
+        return csp
+
+    def attempt(self, colors_count: int) -> Optional[Dict]:
+        """
+        Tries to color the map with the given number of colors and records the attempt.
+
+        Args:
+            colors_count (int): The number of colors to use.
+
+        Returns:
+            Optional[Dict]: The coloring if one exists, None otherwise.
+        """
+        started = time.perf_counter()
+        csp = self.build_csp(colors_count)
+        nogoods = NogoodStore(self.max_nogoods)
+        for learned_with, learned in self.nogoods:
+            if learned_with >= colors_count:
+                for nogood in learned:
+                    nogoods.add(nogood)
+        solver = Solver(csp, nogoods=nogoods, nogood_depth=self.nogood_depth, **self.solver_options)
+        result = solver.backtrack_solver()
+        self.assignments_number += csp.assignments_number
+        # A failed attempt raises the lower bound above its color count, its nogoods would never be used
+        if result is not None:
+            self.nogoods.append((colors_count, set(solver.learned_nogoods)))
+        # Only max_nogoods are carried over, the oldest attempts give theirs up first
+        excess = sum(len(learned) for _, learned in self.nogoods) - self.max_nogoods
+        for _, learned in self.nogoods:
+            while excess > 0 and learned:
+                learned.pop()
+                excess -= 1
+        self.nogoods = [(learned_with, learned) for learned_with, learned in self.nogoods if learned]
+        self.timings.append((colors_count, time.perf_counter() - started, result is not None))
+        return dict(result) if result is not None else None
+
+    def run(self) -> Tuple[int, Dict]:
+        """
+        Runs the search between the heuristic upper bound and the clique lower bound.
+
+        Returns:
+            Tuple[int, Dict]: The chromatic number and an optimal coloring.
+        """
+        if not self.graph:
+            return 0, {}
+
+        components = connected_components(self.graph)
+        if len(components) > 1:
+            return self.run_components(components)
+
+        started = time.perf_counter()
+        coloring = HEURISTIC_ENGINES[self.upper_bound_engine](self.graph)
+        self.upper_bound = max(coloring.values()) + 1
+        if self.upper_bound > len(self.palette):
+            raise ValueError(f"{self.upper_bound_engine} needs {self.upper_bound} colors but the palette has only "
+                             f"{len(self.palette)}")
+        self.solution = {region: self.palette[color] for region, color in coloring.items()}
+        self.clique = greedy_clique(self.graph)
+        self.lower_bound = len(self.clique)
+        self.timings.append((self.upper_bound, time.perf_counter() - started, True))
+
+        if self.strategy == 'descend':
+            colors_count = self.upper_bound - 1
+            while colors_count >= self.lower_bound:
+                result = self.attempt(colors_count)
+                if result is None:
+                    self.lower_bound = colors_count + 1
+                    break
+                self.upper_bound, self.solution = colors_count, result
+                colors_count -= 1
+        else:
+            while self.lower_bound < self.upper_bound:
+                colors_count = (self.lower_bound + self.upper_bound) // 2
+                result = self.attempt(colors_count)
+                if result is None:
+                    self.lower_bound = colors_count + 1
+                else:
+                    self.upper_bound, self.solution = colors_count, result
+
+        return self.upper_bound, self.solution
+
+    def run_components(self, components: List[List[str]]) -> Tuple[int, Dict]:
+        """
+        Runs a search per connected component and merges them: the colorings are combined, the chromatic number is the
+        largest among the components, and the timings and assignment numbers of every component are kept.
+
+        Args:
+            components (List[List[str]]): The regions of each component.
+
+        Returns:
+            Tuple[int, Dict]: The chromatic number and an optimal coloring.
+        """
+        searches = [ChromaticSearch({region: self.graph[region] for region in component}, self.palette,
+                                    strategy=self.strategy, nogood_depth=self.nogood_depth,
+                                    upper_bound_engine=self.upper_bound_engine, max_nogoods=self.max_nogoods,
+                                    **self.solver_options)
+                    for component in components]
+        if self.workers > 1:
+            # Isolated regions are colored instantly, only larger components are worth a process
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures = [executor.submit(run_search, search) if len(search.graph) > 1 else None
+                           for search in searches]
+                searches = [future.result() if future is not None else run_search(search)
+                            for search, future in zip(searches, futures)]
+        else:
+            searches = [run_search(search) for search in searches]
+
+        self.solution = {}
+        for search in searches:
+            self.solution.update(search.solution)
+            self.timings.extend(search.timings)
+            self.assignments_number += search.assignments_number
+            if len(search.clique) > len(self.clique):
+                self.clique = search.clique
+        self.lower_bound = max(search.lower_bound for search in searches)
+        self.upper_bound = max(search.upper_bound for search in searches)
+        return self.upper_bound, self.solution
@@ -1,11 +1,104 @@
+import heapq
+import time
+from bisect import bisect_right
 from collections import deque
-from typing import Callable, List, Tuple
-from CSP import CSP
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+from CSP import CSP, CompiledCSP, not_equal
+from instrumentation import Instrumentation
+from nogoods import NogoodStore
+
+
+SOLVED = 'solved'
+UNSATISFIABLE = 'unsatisfiable'
+TIMED_OUT = 'timed_out'
+CANCELLED = 'cancelled'
+
+
+class SearchInterrupted(Exception):
+    """
+    Raised inside a search that ran out of time or nodes or was cancelled. Solver.solve catches it.
+
+    Attributes:
+        status (str): TIMED_OUT or CANCELLED.
+        nodes (int): The number of assignments made by the search of a component, added to the whole search.
+        best (dict): The deepest partial assignment reached by the search of a component.
+    """
+
+    def __init__(self, status: str) -> None:
+        super().__init__(status)
+        self.status = status
+        self.nodes = 0
+        self.best = {}
+
+
+class SearchResult(object):
+    """
+    The outcome of a bounded search.
+
+    Attributes:
+        status (str): SOLVED, UNSATISFIABLE (the whole search space was explored), TIMED_OUT (the time or node limit
+            was reached) or CANCELLED (the cancellation token was set).
+        solution (dict): The solution, or None unless solved.
+        best (dict): The deepest partial assignment reached, the solution when solved.
+        nodes (int): The number of assignments made.
+        seconds (float): The search time.
+    """
+
+    def __init__(self, status: str, solution: Optional[dict], best: dict, nodes: int, seconds: float) -> None:
+        """
+        Initializes a SearchResult object.
+
+        Args:
+            status (str): SOLVED, UNSATISFIABLE, TIMED_OUT or CANCELLED.
+            solution (dict): The solution, or None.
+            best (dict): The deepest partial assignment reached.
+            nodes (int): The number of assignments made.
+            seconds (float): The search time.
+        """
+        self.status = status
+        self.solution = solution
+        self.best = best
+        self.nodes = nodes
+        self.seconds = seconds
+
+    def __repr__(self) -> str:
+        return f'SearchResult(status={self.status!r}, nodes={self.nodes}, seconds={self.seconds:.3f})'
+
+
+def solve_subproblem(csp: CSP, options: Dict) -> Tuple[Optional[dict], int]:
+    """
+    Solves a CSP with a new Solver, in a worker process or in this one.
+
+    Args:
+        csp (CSP): The Constraint Satisfaction Problem to be solved.
+        options (dict): The keyword arguments of the Solver.
+
+    Returns:
+        Tuple[Optional[dict], int]: The solution or None, and the number of assignments made.
+
+    Raises:
+        SearchInterrupted: If a limit is reached, with the assignments made and the best partial assignment.
+    """
+    solver = Solver(csp, **options)
+    try:
+        result = solver.backtrack_solver()
+    except SearchInterrupted as interruption:
+        interruption.nodes = csp.assignments_number
+        interruption.best = dict(solver.best_path)
+        raise
+    return (dict(result) if result is not None else None), csp.assignments_number
 
 
 class Solver(object):
 
-    def __init__(self, csp: CSP, domain_heuristics: bool = False, variable_heuristics: bool = False, AC_3: bool = False) -> None:
+    def __init__(self, csp: CSP, domain_heuristics: bool = False, variable_heuristics: bool = False, AC_3: bool = False,
+                 nogoods: Optional[NogoodStore] = None, nogood_depth: int = 0, compiled: bool = False,
+                 MAC: bool = False, tie_breaker: Optional[str] = None, iterative: bool = False,
+                 decompose: bool = False, workers: int = 1,
+                 instrumentation: Optional[Instrumentation] = None, backjumping: bool = False,
+                 nogood_capacity: int = 0, symmetry_breaking: bool = False, time_limit: Optional[float] = None,
+                 node_limit: Optional[int] = None, cancel_token=None, on_progress: Optional[Callable] = None,
+                 progress_every: int = 1000) -> None:
         """
         Initializes a Solver object.
 
@@ -14,12 +107,261 @@ class Solver(object):
             domain_heuristics (bool, optional): Flag indicating whether to use domain heuristics. Defaults to False.
             variable_heuristics (bool, optional): Flag indicating whether to use variable heuristics. Defaults to False.
             AC_3 (bool, optional): Flag indicating whether to use the AC-3 algorithm. Defaults to False.
+            nogoods (NogoodStore, optional): Failed partial assignments known before the search, e.g. from an attempt
+                with more values, each a frozenset of (variable, value) pairs. An assignment that contains one of them
+                is pruned, whatever the order its variables were assigned in. Defaults to None.
+            nogood_depth (int, optional): The largest failed partial assignment recorded in learned_nogoods, for a
+                later search to start from. Defaults to 0.
+            compiled (bool, optional): Flag indicating whether to search on the compiled bitset form of the CSP,
+                which requires all constraints to be not_equal. Nogoods are not used by this search.
+                Defaults to False.
+            MAC (bool, optional): Flag indicating whether to maintain arc consistency incrementally, propagating only
+                from the variable just assigned. Takes precedence over AC_3. Defaults to False.
+            tie_breaker (str, optional): How MRV breaks ties between variables with the same domain size. 'degree'
+                prefers the most unassigned neighbors, 'dsatur' prefers the most distinct values among assigned
+                neighbors and then the most unassigned neighbors. Defaults to None, i.e. the first added variable.
+            iterative (bool, optional): Flag indicating whether to search with an explicit stack instead of recursion,
+                which has no recursion limit on the number of variables. Defaults to False.
+            decompose (bool, optional): Flag indicating whether to solve each connected component of the constraint
+                graph on its own, so a dead end in one component never backtracks over another. Defaults to False.
+            workers (int, optional): The number of processes solving components when decompose is set. Components
+                are then solved in a process pool, which needs picklable constraints such as not_equal.
+                Defaults to 1.
+            instrumentation (Instrumentation, optional): Counters, timers and callbacks to attach to this Solver and
+                its CSP. Defaults to None, which leaves the search uninstrumented and at full speed.
+            backjumping (bool, optional): Flag indicating whether to search with conflict-directed backjumping: a
+                variable that runs out of values jumps back to the latest variable in its conflict set instead of the
+                previous one. The search uses an explicit stack. Not used by the compiled search. Defaults to False.
+            nogood_capacity (int, optional): The size of the store of nogoods learned from conflict sets when
+                backjumping, the least recently used ones are evicted. Defaults to 0, i.e. no learning.
+            symmetry_breaking (bool, optional): Flag indicating whether to break the symmetry of interchangeable
+                values: a variable may only take a value already used or the first unused one, so the permutations of
+                the values are explored once. Values are interchangeable when they belong to the same domains, and the
+                constraints must not tell them apart, as with not_equal. Defaults to False.
+            time_limit (float, optional): The largest search time in seconds. Defaults to None, i.e. no limit.
+            node_limit (int, optional): The largest number of assignments. Defaults to None, i.e. no limit.
+            cancel_token (optional): An object whose is_set() method returns True once the search must stop, such as a
+                threading.Event set from another thread. Defaults to None.
+            on_progress (callable, optional): Called with (depth, nodes, best partial assignment) every
+                progress_every nodes. Defaults to None.
+            progress_every (int, optional): The number of nodes between two on_progress calls. Defaults to 1000.
         """
+        if tie_breaker not in (None, 'degree', 'dsatur'):
+            raise ValueError(f"Unknown tie breaker {tie_breaker!r}, expected 'degree' or 'dsatur'")
         self.domain_heuristic = domain_heuristics
         self.variable_heuristic = variable_heuristics
         self.AC_3 = AC_3
         self.csp = csp
+        self.nogoods = nogoods
+        self.nogood_depth = nogood_depth
+        # The failed partial assignments of at most nogood_depth variables, in the order they failed
+        self.learned_nogoods = []
+        self.path = []
+        self.trail_marks = []
+        self.compiled = compiled
+        self.MAC = MAC
+        self.tie_breaker = tie_breaker
+        self.variable_queue = None
+        # The key of the latest entry pushed for each variable, an entry with another key is out of date
+        self.variable_keys = None
+        self.variable_index = None
+        self.neighbors = None
+        self.iterative = iterative
+        self.decompose = decompose
+        self.workers = workers
+        self.backjumping = backjumping
+        self.nogood_capacity = nogood_capacity
+        self.nogood_store = NogoodStore(nogood_capacity) if nogood_capacity > 0 else None
+        # The depths of the assignments that caused the latest failed assign_value, None for all of them
+        self.conflict = None
+        self.symmetry_breaking = symmetry_breaking
+        # The interchangeable value classes and how many times each value is used, built when the search starts
+        self.value_class = None
+        self.value_rank = None
+        self.class_values = None
+        self.class_used = None
+        self.value_uses = None
+        # The same for the compiled search: a bitmask per class and the bitmask of the used values
+        self.class_masks = None
+        self.used_bits = 0
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.cancel_token = cancel_token
+        self.on_progress = on_progress
+        self.progress_every = progress_every
+        # Limits are checked before every assignment only when there is one, an unbounded search pays nothing
+        self.budgeted = time_limit is not None or node_limit is not None or cancel_token is not None \
+            or on_progress is not None
+        self.started = None
+        self.start_nodes = 0
+        self.deadline = None
+        # The deepest path reached, of which the first stable assignments are still those of the current path
+        self.best_path = []
+        self.stable = 0
+        # The number of variables the latest repair searched again
+        self.repaired = 0
+        if csp.arcs is None or domain_heuristics and csp.supports is None:
+            csp.finalize(supports=domain_heuristics)
+        self.instrumentation = instrumentation
+        if instrumentation is not None:
+            instrumentation.attach(self)
 
+    def options(self) -> Dict:
+        """
+        Returns the search options of this Solver, to configure another Solver the same way.
+
+        Returns:
+            dict: The keyword arguments of the Solver, except csp.
+        """
+        return {'domain_heuristics': self.domain_heuristic, 'variable_heuristics': self.variable_heuristic,
+                'AC_3': self.AC_3, 'nogoods': self.nogoods, 'nogood_depth': self.nogood_depth,
+                'compiled': self.compiled, 'MAC': self.MAC, 'tie_breaker': self.tie_breaker,
+                'iterative': self.iterative, 'decompose': self.decompose, 'workers': self.workers,
+                'instrumentation': self.instrumentation, 'backjumping': self.backjumping,
+                'nogood_capacity': self.nogood_capacity, 'symmetry_breaking': self.symmetry_breaking,
+                'time_limit': self.time_limit, 'node_limit': self.node_limit, 'cancel_token': self.cancel_token,
+                'on_progress': self.on_progress, 'progress_every': self.progress_every}
+
+    def solve(self, previous: Optional[Dict] = None) -> SearchResult:
+        """
+        Runs backtrack_solver, or repair from a previous solution, within the time and node limits. A search that
+        stops early undoes its partial assignment, leaving the CSP as it was, and reports the deepest partial
+        assignment it reached.
+
+        Args:
+            previous (dict, optional): A solution of a similar CSP to start from, see repair. Defaults to None.
+
+        Returns:
+            SearchResult: The status, the solution if any, the best partial assignment, the nodes and the time.
+        """
+        self.start_budget()
+        try:
+            solution = self.backtrack_solver() if previous is None else self.repair(previous)
+            status = SOLVED if solution is not None else UNSATISFIABLE
+        except SearchInterrupted as interruption:
+            solution, status = None, interruption.status
+            if self.compiled:
+                del self.path[:]
+            while self.path:
+                self.unassign_value(self.path[-1][0], learn=False)
+        solution = dict(solution) if solution is not None else None
+        return SearchResult(status, solution, solution if solution is not None else dict(self.best_path),
+                            self.csp.assignments_number - self.start_nodes, time.perf_counter() - self.started)
+
+    def start_budget(self) -> None:
+        """
+        Starts counting the time and nodes of the limits. A search started without solve starts them at its first
+        assignment, and raises SearchInterrupted when it stops early.
+
+        Returns:
+            None
+        """
+        self.started = time.perf_counter()
+        self.start_nodes = self.csp.assignments_number
+        self.deadline = self.started + self.time_limit if self.time_limit is not None else None
+        self.best_path = []
+        self.stable = 0
+
+    def check_budget(self) -> None:
+        """
+        Records the deepest path, reports progress and stops the search when a limit is reached. Called before every
+        assignment of a bounded search.
+
+        Returns:
+            None
+
+        Raises:
+            SearchInterrupted: If the time or node limit is reached or the search is cancelled.
+        """
+        if self.started is None:
+            self.start_budget()
+        nodes = self.csp.assignments_number - self.start_nodes
+        depth = len(self.path)
+        if depth > len(self.best_path):
+            # Only the assignments made since the path was last that shallow differ from the best path
+            del self.best_path[self.stable:]
+            self.best_path.extend(self.path[self.stable:])
+            self.stable = depth
+        if self.on_progress is not None and nodes % self.progress_every == 0:
+            self.on_progress(depth, nodes, dict(self.best_path))
+        if self.cancel_token is not None and self.cancel_token.is_set():
+            raise SearchInterrupted(CANCELLED)
+        if self.node_limit is not None and nodes >= self.node_limit:
+            raise SearchInterrupted(TIMED_OUT)
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise SearchInterrupted(TIMED_OUT)
+
+    def remaining_budget(self) -> Dict:
+        """
+        Returns the time and node limits left, for the Solver of a part of the CSP.
+
+        Returns:
+            dict: The time_limit and node_limit keyword arguments.
+        """
+        if self.started is None:
+            self.start_budget()
+        return {'time_limit': max(0.0, self.deadline - time.perf_counter()) if self.deadline is not None else None,
+                'node_limit': max(0, self.node_limit - (self.csp.assignments_number - self.start_nodes))
+                if self.node_limit is not None else None}
+
+
+    def repair(self, previous: Dict) -> Optional[dict]:
+        """
+        Solves the CSP again after variables or constraints were added or removed, starting from a previous solution.
+        The previous values that are still in their domain and satisfy every constraint are kept. The variables
+        without one and both variables of every violated constraint are searched again, the others keeping their
+        values; when that region has no solution it grows by the neighbors of its variables, up to the whole CSP,
+        which then proves there is no solution. The search thus follows the size of the change, not the size of the
+        CSP. The CSP is reset first and the solution is written back to it.
+
+        Args:
+            previous (dict): The previous solution, e.g. a copy of the assignments of the CSP before the change.
+
+        Returns:
+            Optional[dict]: The assignments of the CSP if it has a solution, None otherwise.
+
+        Raises:
+            SearchInterrupted: If a limit is reached, the CSP being left reset.
+        """
+        csp = self.csp
+        csp.reset()
+        del self.path[:]
+        del self.trail_marks[:]
+        # Nogoods learned before the change may no longer hold
+        self.nogood_store = NogoodStore(self.nogood_capacity) if self.nogood_capacity > 0 else None
+        self.start_budget()
+
+        variables = csp.variables
+        kept = {variable: value for variable, value in previous.items()
+                if variable in variables and value in csp.initial_domains[variable]}
+        region = {variable for variable in variables if variable not in kept}
+        for constraint_func, x, y in csp.constraints:
+            if x in kept and y in kept and not constraint_func(kept[x], kept[y]):
+                region.update((x, y))
+        for variable in region:
+            kept.pop(variable, None)
+
+        options = dict(self.options(), nogoods=None, nogood_depth=0)
+        while True:
+            self.repaired = len(region)
+            region_options = dict(options, **self.remaining_budget()) if self.budgeted else options
+            try:
+                solution, assignments_number = solve_subproblem(csp.subproblem(region, kept), region_options)
+            except SearchInterrupted as interruption:
+                csp.assignments_number += interruption.nodes
+                raise
+            csp.assignments_number += assignments_number
+            if solution is not None:
+                kept.update(solution)
+                csp.load_solution(kept)
+                return csp.assignments
+            ring = {other for variable in region for _, other in csp.var_constraints[variable] if other in kept}
+            if not ring:
+                # The region is a union of whole components without a solution
+                return None
+            for variable in ring:
+                del kept[variable]
+            region |= ring
 
     def backtrack_solver(self) -> List[Tuple[str, str]]:
         """
@@ -28,32 +370,400 @@ class Solver(object):
         Returns:
             List[Tuple[str, str]]: A list of variable-value assignments that satisfy all constraints.
         """
+        if self.decompose:
+            return self.component_solver()
+        if self.compiled:
+            return self.compiled_backtrack_solver()
+        if self.backjumping:
+            return self.backjump_solver()
+        if self.iterative:
+            return self.iterative_solver()
 
         if self.csp.is_complete():
             return self.csp.assignments
 
         variable = self.select_unassigned_variable()
 
-        for value in self.ordered_domain_value(variable):
-            if self.csp.is_consistent(variable, value):
-                removed_values_from_domain = []
-                for other_value in self.csp.variables[variable]:
-                    if other_value != value:
-                        removed_values_from_domain.append((variable, other_value))
-              
-                self.csp.assign(variable, value)
-                
-                if self.AC_3 is True:
-                    if self.apply_AC3() is not None:
-                        removed_values_from_domain.extend(self.apply_AC3())
-                
+        for value in list(self.ordered_domain_value(variable)):
+            if self.csp.is_consistent(variable, value) and self.assign_value(variable, value):
                 result = self.backtrack_solver()
                 if result is not None:
                     return result
-                self.csp.unassign(removed_values_from_domain, variable)
+                self.unassign_value(variable)
+
+        return None
+
+    def component_solver(self) -> Optional[dict]:
+        """
+        Solves each connected component of the constraint graph on its own and merges the solutions. Components share
+        the domain values, so the merged solution uses as many values as the most demanding component. With more than
+        one worker, components with more than one variable are solved in a process pool. Each component gets the
+        time and node limits left when it starts; components in a process pool get no cancellation token or progress
+        callback, which cannot be sent to another process.
+
+        Returns:
+            Optional[dict]: The assignments of the CSP if every component has a solution, None otherwise.
+        """
+        options = self.options()
+        options['decompose'] = False
+        components = self.csp.split_components()
+
+        if self.workers > 1 and sum(len(component.variables) > 1 for component in components) > 1:
+            options['nogoods'] = None
+            options['instrumentation'] = None
+            options['cancel_token'] = None
+            options['on_progress'] = None
+            if self.budgeted:
+                options.update(self.remaining_budget())
+            # Imported here, the process pool machinery takes longer to import than the whole search module
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures = [executor.submit(solve_subproblem, component, options) if len(component.variables) > 1
+                           else None for component in components]
+            # Read lazily, so a component that stops early is accounted like one solved in this process
+            results = (future.result() if future is not None else solve_subproblem(component, options)
+                       for component, future in zip(components, futures))
+        else:
+            results = (solve_subproblem(component, dict(options, **self.remaining_budget()) if self.budgeted
+                                        else options) for component in components)
+
+        solution = {}
+        try:
+            for result, assignments_number in results:
+                self.csp.assignments_number += assignments_number
+                if result is None:
+                    return None
+                solution.update(result)
+        except SearchInterrupted as interruption:
+            self.csp.assignments_number += interruption.nodes
+            self.best_path = list(solution.items()) + list(interruption.best.items())
+            raise
+        self.csp.load_solution(solution)
+        return self.csp.assignments
+
+    def iterative_solver(self) -> Optional[dict]:
+        """
+        Backtracking with an explicit stack instead of recursion. Each frame holds a variable, its ordered values and
+        the index of the next value to try, so the search depth is not bounded by the recursion limit and there is no
+        function call per node. Heuristics, AC-3, MAC and nogoods work as in backtrack_solver.
+
+        Returns:
+            Optional[dict]: The assignments of the CSP if a solution is found, None otherwise.
+        """
+        if self.csp.is_complete():
+            return self.csp.assignments
+
+        variable = self.select_unassigned_variable()
+        # A frame is [variable, ordered values, index of the next value, whether a value is assigned]
+        stack = [[variable, list(self.ordered_domain_value(variable)), 0, False]]
+        while stack:
+            frame = stack[-1]
+            variable, values = frame[0], frame[1]
+            if frame[3]:
+                self.unassign_value(variable)
+                frame[3] = False
+
+            while frame[2] < len(values):
+                value = values[frame[2]]
+                frame[2] += 1
+                if self.csp.is_consistent(variable, value) and self.assign_value(variable, value):
+                    frame[3] = True
+                    break
+
+            if not frame[3]:
+                stack.pop()
+                continue
+            if self.csp.is_complete():
+                return self.csp.assignments
+            variable = self.select_unassigned_variable()
+            stack.append([variable, list(self.ordered_domain_value(variable)), 0, False])
 
         return None
 
+    def solutions(self, limit: Optional[int] = None) -> Iterator[dict]:
+        """
+        Enumerates the solutions of the CSP lazily. Each solution is yielded as a new dict, which later search does
+        not change, and the search only keeps its stack, so streaming many solutions takes constant memory. With
+        symmetry_breaking, solutions that only differ by a permutation of interchangeable values are yielded once.
+        The CSP is left as it was once the generator is exhausted or closed.
+
+        Args:
+            limit (int, optional): The largest number of solutions. Defaults to None, i.e. all of them.
+
+        Returns:
+            Iterator[dict]: The solutions, in search order.
+
+        Raises:
+            SearchInterrupted: If a limit of a bounded search is reached.
+        """
+        leaves = self.search_leaves()
+        try:
+            for found, _ in enumerate(leaves, 1):
+                yield dict(self.csp.assignments)
+                if found == limit:
+                    return
+        finally:
+            leaves.close()
+
+    def count_solutions(self, limit: Optional[int] = None) -> int:
+        """
+        Counts the solutions of the CSP without copying any, like solutions. With symmetry_breaking, the classes of
+        solutions equal up to a permutation of interchangeable values are counted.
+
+        Args:
+            limit (int, optional): The count to stop at. Defaults to None, i.e. all of them.
+
+        Returns:
+            int: The number of solutions, at most limit.
+
+        Raises:
+            SearchInterrupted: If a limit of a bounded search is reached.
+        """
+        count = 0
+        leaves = self.search_leaves()
+        try:
+            for _ in leaves:
+                count += 1
+                if count == limit:
+                    break
+        finally:
+            leaves.close()
+        return count
+
+    def search_leaves(self) -> Iterator[None]:
+        """
+        Runs the search of iterative_solver without stopping at the first solution: it yields whenever the CSP is
+        complete and goes on with the next value of the last variable when resumed. A partial assignment whose
+        subtree held solutions is no nogood, so nothing is learned. The compiled, decomposed and backjumping searches
+        are not used. The assignments left are undone when the generator finishes or is closed.
+
+        Returns:
+            Iterator[None]: Resumed once per solution, the solution being the assignments of the CSP.
+        """
+        csp = self.csp
+        if csp.is_complete():
+            yield
+            return
+        stack = []
+        try:
+            variable = self.select_unassigned_variable()
+            # A frame is [variable, ordered values, index of the next value, whether a value is assigned]
+            stack.append([variable, list(self.ordered_domain_value(variable)), 0, False])
+            while stack:
+                frame = stack[-1]
+                variable, values = frame[0], frame[1]
+                if frame[3]:
+                    self.unassign_value(variable, learn=False)
+                    frame[3] = False
+
+                while frame[2] < len(values):
+                    value = values[frame[2]]
+                    frame[2] += 1
+                    if csp.is_consistent(variable, value) and self.assign_value(variable, value):
+                        frame[3] = True
+                        break
+
+                if not frame[3]:
+                    stack.pop()
+                    continue
+                if csp.is_complete():
+                    yield
+                    continue
+                variable = self.select_unassigned_variable()
+                stack.append([variable, list(self.ordered_domain_value(variable)), 0, False])
+        finally:
+            for frame in reversed(stack):
+                if frame[3]:
+                    self.unassign_value(frame[0], learn=False)
+
+    def backjump_solver(self) -> Optional[dict]:
+        """
+        Conflict-directed backjumping with an explicit stack. Each frame keeps the conflict set of its variable: the
+        depths of the earlier assignments that ruled out one of its values. When a variable runs out of values, the
+        search jumps back to the deepest assignment of its conflict set, skipping the assignments that played no part
+        in the failure, and that assignment inherits the rest of the conflict set. A conflict set left with only
+        assignments made before the search, or an empty one, proves that there is no solution that extends them.
+
+        Depths are positions in the assigned_stack of the CSP, so the frames of a search started on a partially
+        assigned CSP are numbered after the assignments it started with.
+
+        Domain reductions by AC-3 or MAC, of the variable or of a neighbor that rules out one of its values, are blamed
+        on every assignment up to the one that made them, which is always sound. With a nogood store, the assignments
+        of each conflict set are learned as a nogood.
+
+        Returns:
+            Optional[dict]: The assignments of the CSP if a solution is found, None otherwise.
+        """
+        if self.csp.is_complete():
+            return self.csp.assignments
+
+        assigned_stack = self.csp.assigned_stack
+        # The depth of the first frame
+        base = len(assigned_stack)
+        variable = self.select_unassigned_variable()
+        # A frame is [variable, ordered values, index of the next value, whether a value is assigned, conflict set],
+        # the conflict set starting with the assignments that pruned values of the variable
+        stack = [[variable, list(self.ordered_domain_value(variable)), 0, False, self.reduction_explanation(variable)]]
+        conflict = set()
+        while stack:
+            frame = stack[-1]
+            depth = base + len(stack) - 1
+            variable, values = frame[0], frame[1]
+            if frame[3]:
+                # Back from a deeper variable that ran out of values with the given conflict set
+                self.unassign_value(variable)
+                frame[3] = False
+                if depth not in conflict:
+                    stack.pop()
+                    continue
+                conflict.discard(depth)
+                frame[4] |= conflict
+
+            while frame[2] < len(values):
+                value = values[frame[2]]
+                frame[2] += 1
+                if not self.csp.is_consistent(variable, value):
+                    frame[4] |= self.conflict_explanation(variable, value)
+                elif self.assign_value(variable, value):
+                    frame[3] = True
+                    break
+                else:
+                    frame[4] |= self.conflict if self.conflict is not None else set(range(depth))
+
+            if not frame[3]:
+                conflict = frame[4]
+                if self.nogood_store is not None and conflict:
+                    self.nogood_store.add(frozenset((assigned_stack[i], self.csp.assignments[assigned_stack[i]])
+                                                    for i in conflict))
+                stack.pop()
+                continue
+            if self.csp.is_complete():
+                return self.csp.assignments
+            variable = self.select_unassigned_variable()
+            stack.append([variable, list(self.ordered_domain_value(variable)), 0, False,
+                          self.reduction_explanation(variable)])
+
+        return None
+
+    def conflict_explanation(self, variable: str, value) -> Set[int]:
+        """
+        Explains why a value is inconsistent: the depths of the assignments that emptied the support of a neighbor.
+
+        An assigned neighbor is the only culprit. The domain of an unassigned neighbor only shrinks by propagation,
+        which is blamed on every assignment up to the latest one that shrank it, or on every assignment made before
+        the search when it was shrunk before; a neighbor that was never reduced rules the value out whatever the
+        assignments.
+
+        Args:
+            variable (str): The variable.
+            value: The inconsistent value.
+
+        Returns:
+            Set[int]: The depths of the culprit assignments in the assigned_stack of the CSP.
+        """
+        csp = self.csp
+        for constraint_func, other in csp.arcs[variable]:
+            if any(constraint_func(value, j) for j in csp.variables[other]):
+                continue
+            if csp.is_assigned(other):
+                return {csp.depth[other]}
+            return self.reduction_explanation(other)
+        return set()
+
+    def reduction_explanation(self, variable: str) -> Set[int]:
+        """
+        Explains why the domain of an unassigned variable lost values: the reductions are blamed on every assignment
+        up to the latest one that shrank it, or on every assignment made before the search when it was only shrunk
+        before. A domain that was never reduced needs no assignment.
+
+        Args:
+            variable (str): The unassigned variable.
+
+        Returns:
+            Set[int]: The depths of the culprit assignments in the assigned_stack of the CSP.
+        """
+        csp = self.csp
+        if len(csp.variables[variable]) == len(csp.initial_domains[variable]):
+            return set()
+        # The assignments made before the first one of the path, which has no trail mark
+        offset = len(csp.assigned_stack) - len(self.path)
+        trail = csp.trail
+        for i in range(len(trail) - 1, self.trail_marks[0] - 1 if self.trail_marks else len(trail) - 1, -1):
+            if trail[i][0] == variable:
+                return set(range(offset + bisect_right(self.trail_marks, i)))
+        return set(range(offset))
+
+    def assign_value(self, variable: str, value) -> bool:
+        """
+        Assigns a consistent value and propagates it. If the partial assignment is a known nogood or the propagation
+        empties a domain, the assignment is undone right away. A bounded search checks its limits first.
+
+        Args:
+            variable (str): The variable to assign.
+            value: The value to assign.
+
+        Returns:
+            bool: True if the search can go deeper, False if the assignment was undone.
+
+        Raises:
+            SearchInterrupted: If a limit of a bounded search is reached, before anything is assigned.
+        """
+        if self.budgeted:
+            self.check_budget()
+        self.trail_marks.append(len(self.csp.trail))
+        self.csp.assign(variable, value)
+        self.path.append((variable, value))
+        if self.value_uses is not None:
+            self.count_value(value, 1)
+
+        if self.nogoods and self.nogoods.violated(self.csp.assignments, variable, value) is not None:
+            self.unassign_value(variable, learn=False)
+            self.conflict = None
+            return False
+        if self.nogood_store is not None:
+            nogood = self.nogood_store.violated(self.csp.assignments, variable, value)
+            if nogood is not None:
+                self.unassign_value(variable, learn=False)
+                self.conflict = {self.csp.depth[other] for other, _ in nogood if other != variable}
+                return False
+
+        pruned_values = []
+        if self.MAC:
+            pruned_values = self.apply_MAC(variable)
+        elif self.AC_3:
+            pruned_values = self.apply_AC3()
+        if pruned_values is None:
+            self.unassign_value(variable)
+            self.conflict = None
+            return False
+
+        if self.variable_queue is not None:
+            self.update_variable_queue(variable, self.csp.trail[self.trail_marks[-1]:])
+        return True
+
+    def unassign_value(self, variable: str, learn: bool = True) -> None:
+        """
+        Undoes the latest assign_value, recording the failed partial assignment as a nogood when it is small enough.
+
+        Args:
+            variable (str): The variable assigned by the latest assign_value.
+            learn (bool, optional): Flag indicating whether to record the nogood. Defaults to True.
+
+        Returns:
+            None
+        """
+        if learn and len(self.path) <= self.nogood_depth:
+            self.learned_nogoods.append(frozenset(self.path))
+        if self.value_uses is not None:
+            self.count_value(self.path[-1][1], -1)
+        self.path.pop()
+        if self.stable > len(self.path):
+            self.stable = len(self.path)
+        changes = self.csp.trail[self.trail_marks.pop():]
+        self.csp.unassign(variable)
+        if self.variable_queue is not None:
+            self.update_variable_queue(variable, changes)
+
     def select_unassigned_variable(self) -> str:
         """
         Selects an unassigned variable using the MRV heuristic.
@@ -63,7 +773,7 @@ class Solver(object):
         """
         if self.variable_heuristic:
             return self.MRV()
-        return self.csp.unassigned_var[0]
+        return self.csp.next_unassigned()
 
     def ordered_domain_value(self, variable: str) -> List[str]:
         """
@@ -77,10 +787,74 @@ class Solver(object):
         """
         # Function implementation goes here
         if self.domain_heuristic:
-            return self.LCV(variable)
-        return self.csp.variables[variable]
+            values = self.LCV(variable)
+        else:
+            values = self.csp.variables[variable]
+        if self.symmetry_breaking:
+            return self.break_symmetry(values)
+        return values
 
-        
+    def build_value_classes(self) -> None:
+        """
+        Groups the values into classes of interchangeable values, i.e. values that belong to the same domains, each
+        class ordered by first appearance.
+
+        Returns:
+            None
+        """
+        members = {}
+        for variable, domain in self.csp.variables.items():
+            for value in domain:
+                members.setdefault(value, []).append(variable)
+        classes = {}
+        self.value_class = {}
+        self.value_rank = {}
+        self.class_values = []
+        for value, variables in members.items():
+            key = tuple(variables)
+            if key not in classes:
+                classes[key] = len(self.class_values)
+                self.class_values.append([])
+            self.value_class[value] = classes[key]
+            self.value_rank[value] = len(self.class_values[classes[key]])
+            self.class_values[classes[key]].append(value)
+        self.class_used = [0] * len(self.class_values)
+        self.value_uses = dict.fromkeys(members, 0)
+
+    def break_symmetry(self, values: List) -> List:
+        """
+        Keeps the values already used and, in each class, the first unused one. The used values of a class are always
+        its first class_used values, since every new value is the first unused one.
+
+        Args:
+            values (list): The ordered values of a variable.
+
+        Returns:
+            list: The values worth trying, in the same order.
+        """
+        if self.value_class is None:
+            self.build_value_classes()
+        class_used = self.class_used
+        value_class = self.value_class
+        value_rank = self.value_rank
+        value_uses = self.value_uses
+        return [value for value in values if value_uses[value] or value_rank[value] == class_used[value_class[value]]]
+
+    def count_value(self, value, change: int) -> None:
+        """
+        Counts an assignment of a value, or its undoing, and updates the number of used values of its class.
+
+        Args:
+            value: The value assigned or unassigned.
+            change (int): 1 for an assignment, -1 for its undoing.
+
+        Returns:
+            None
+        """
+        uses = self.value_uses[value] + change
+        self.value_uses[value] = uses
+        if uses == 0 or (uses == 1 and change == 1):
+            self.class_used[self.value_class[value]] += change
 
     def arc_reduce(self, x, y, consistent) -> List[str]:
         """
@@ -94,10 +868,19 @@ class Solver(object):
         Returns:
         - The reduced domain of variable x if the domain is reduced, None otherwise.
         """
-        if y not in self.csp.variables or x not in self.csp.variables:
+        variables = self.csp.variables
+        if y not in variables or x not in variables:
             return None
-        new_domain = [i for i in self.csp.variables[x] if any(consistent(i, j) for j in self.csp.variables[y])]
-        if len(new_domain) != len(self.csp.variables[x]):
+        if consistent is not_equal:
+            # Only a singleton domain of y takes a value from x
+            domain = variables[y]
+            if len(domain) > 1 or domain and domain[0] not in self.csp.members[x]:
+                return None
+            if not domain:
+                return [] if variables[x] else None
+            return [i for i in variables[x] if i != domain[0]]
+        new_domain = [i for i in variables[x] if any(consistent(i, j) for j in variables[y])]
+        if len(new_domain) != len(variables[x]):
             return new_domain
         return None
 
@@ -106,45 +889,183 @@ class Solver(object):
         Applies the AC3 algorithm to reduce the domains of variables in the CSP.
 
         Returns:
-            A list of tuples representing the removed values from the domain of variables.
+            A list of tuples representing the removed values from the domain of variables, or None if a domain became
+            empty, in which case the removed values are already restored.
         """
-        queue = deque(constraint for constraint in self.csp.constraints)
+        arcs = self.csp.arcs
+        queue = deque((constraint_func, x, y) for x in self.csp.variables for constraint_func, y in arcs[x])
+        trail_length = len(self.csp.trail)
         removed_values_from_domain = []
         while queue:
             constraint_func, x, y = queue.popleft()
             new_domain = self.arc_reduce(x, y, constraint_func)
             if new_domain is not None:
-                removed_values_from_domain.extend((x, j) for j in self.csp.variables[x] if j not in new_domain)
-                self.csp.variables[x] = new_domain
+                kept = set(new_domain)
+                for j in [j for j in self.csp.variables[x] if j not in kept]:
+                    removed_values_from_domain.append((x, j))
+                    self.csp.remove_value(x, j)
                 if len(new_domain) == 0:
+                    self.csp.restore_trail(trail_length)
                     return None
                 else:
-                    for func, z in self.csp.var_constraints[x]:
+                    for func, z in arcs[x]:
                         if z != y:
                             queue.append((func, z, x))
 
         return removed_values_from_domain
 
+    def apply_MAC(self, variable: str) -> List[Tuple[str, str]]:
+        """
+        Maintains arc consistency after an assignment. Only the arcs pointing at the assigned variable are queued, and
+        an arc (z, x) is queued again only when the domain of x shrinks, so the work is proportional to what changed.
+
+        Args:
+            variable (str): The variable just assigned.
+
+        Returns:
+            A list of tuples representing the removed values from the domain of variables, or None if a domain became
+            empty, in which case the removed values are already restored.
+        """
+        arcs = self.csp.arcs
+        queue = deque((func, other, variable) for func, other in arcs[variable])
+        queued = set(queue)
+        trail_length = len(self.csp.trail)
+        removed_values_from_domain = []
+        while queue:
+            arc = queue.popleft()
+            queued.discard(arc)
+            constraint_func, x, y = arc
+            new_domain = self.arc_reduce(x, y, constraint_func)
+            if new_domain is None:
+                continue
+            kept = set(new_domain)
+            for j in [j for j in self.csp.variables[x] if j not in kept]:
+                removed_values_from_domain.append((x, j))
+                self.csp.remove_value(x, j)
+            if len(new_domain) == 0:
+                self.csp.restore_trail(trail_length)
+                return None
+            for func, z in arcs[x]:
+                if z != y and (func, z, x) not in queued:
+                    queued.add((func, z, x))
+                    queue.append((func, z, x))
+
+        return removed_values_from_domain
+
     def MRV(self) -> str:
         """
-        Selects the variable with the Minimum Remaining Values (MRV) heuristic.
+        Selects the variable with the Minimum Remaining Values (MRV) heuristic, ties broken by the tie breaker.
+
+        The variables are kept in a heap keyed by variable_key. Entries are never updated in place: a new entry is
+        pushed whenever a key changes, and entries whose key is out of date are discarded when they reach the top, so a
+        selection costs O(log n) per domain change instead of a scan of all unassigned variables. The heap is rebuilt
+        when out of date entries make up most of it, see update_variable_queue.
 
         Returns:
             str: The variable with the fewest remaining values.
         """
-        min_values = float('inf')
-        selected_variable = None
+        if self.variable_queue is None:
+            self.build_variable_queue()
+
+        queue = self.variable_queue
+        while queue:
+            entry = queue[0]
+            variable = entry[-1]
+            if not self.csp.is_assigned(variable) and entry[:-1] == self.variable_key(variable):
+                return variable
+            heapq.heappop(queue)
+            if self.variable_keys.get(variable) == entry[:-1]:
+                # The variable has no entry left, the next update pushes one whatever its key
+                del self.variable_keys[variable]
+        return None
+
+    def build_variable_queue(self) -> None:
+        """
+        Builds the MRV heap and the neighbor sets the tie breakers need.
+
+        Returns:
+            None
+        """
+        self.variable_index = {variable: i for i, variable in enumerate(self.csp.variables)}
+        self.neighbors = self.csp.neighbors
+        self.rebuild_variable_queue()
+
+    def rebuild_variable_queue(self) -> None:
+        """
+        Rebuilds the MRV heap with one entry per unassigned variable, dropping every out of date entry.
+
+        Returns:
+            None
+        """
+        self.variable_keys = {variable: self.variable_key(variable) for variable in self.csp.unassigned_var}
+        self.variable_queue = [key + (variable,) for variable, key in self.variable_keys.items()]
+        heapq.heapify(self.variable_queue)
 
-        for variable in self.csp.unassigned_var:
-            if len(self.csp.variables[variable]) < min_values:
-                min_values = len(self.csp.variables[variable])
-                selected_variable = variable
+    def variable_key(self, variable: str) -> Tuple:
+        """
+        Computes the MRV heap key of a variable: its domain size, then the tie breaker, then its insertion index.
 
-        return selected_variable
+        Args:
+            variable (str): The variable.
+
+        Returns:
+            Tuple: The key, smaller is selected first.
+        """
+        domain_size = len(self.csp.variables[variable])
+        if self.tie_breaker is None:
+            return domain_size, self.variable_index[variable]
+
+        assignments = self.csp.assignments
+        degree = 0
+        used_values = set()
+        for other in self.neighbors[variable]:
+            if assignments[other] is None:
+                degree += 1
+            else:
+                used_values.add(assignments[other])
+        if self.tie_breaker == 'degree':
+            return domain_size, -degree, self.variable_index[variable]
+        return domain_size, -len(used_values), -degree, self.variable_index[variable]
+
+    def update_variable_queue(self, variable: str, changes: List[Tuple]) -> None:
+        """
+        Pushes fresh MRV heap entries for the variables whose key may have changed after assigning or unassigning a
+        variable: the variable itself, the variables in the trail entries of the change, and with a tie breaker the
+        neighbors of the variable. A variable whose key is the one of its latest entry gets no new entry, and the heap
+        is rebuilt once it holds more than four entries per unassigned variable, so its size stays proportional to the
+        number of variables however long the search runs.
+
+        Args:
+            variable (str): The variable assigned or unassigned.
+            changes (list): The trail entries logged by the assignment and its propagation.
+
+        Returns:
+            None
+        """
+        changed = {changed_variable for changed_variable, _, _ in changes}
+        changed.add(variable)
+        if self.tie_breaker is not None:
+            changed.update(self.neighbors[variable])
+        variable_keys = self.variable_keys
+        queue = self.variable_queue
+        assignments = self.csp.assignments
+        pushed = False
+        for changed_variable in changed:
+            if assignments[changed_variable] is None:
+                key = self.variable_key(changed_variable)
+                if variable_keys.get(changed_variable) != key:
+                    variable_keys[changed_variable] = key
+                    heapq.heappush(queue, key + (changed_variable,))
+                    pushed = True
+
+        if pushed and len(queue) > 4 * (len(assignments) - len(self.csp.assigned_stack)) + 16:
+            self.rebuild_variable_queue()
 
     def LCV(self, variable: str) -> List[str]:
         """
-        Orders the values of a variable based on the Least Constraining Value (LCV) heuristic.
+        Orders the values of a variable based on the Least Constraining Value (LCV) heuristic. The number of neighbors
+        each value constrains is read from the support counters of the CSP, which follow every domain change, instead
+        of scanning the neighbors.
 
         Args:
             variable (str): The variable for which to order the values.
@@ -152,16 +1073,176 @@ class Solver(object):
         Returns:
             List[str]: A list of values sorted based on the number of constraints they impose.
         """
-        values = self.csp.variables[variable]
-        constraints_count = []
+        if self.csp.supports is None:
+            # Counters dropped by load_solution or by a change to the CSP
+            self.csp.finalize(supports=True)
+        return sorted(self.csp.variables[variable], key=self.csp.supports[variable].__getitem__)
 
-        for value in values:
-            count = 0
-            for constraint_func, other_variable in self.csp.var_constraints[variable]:
-                if other_variable in self.csp.variables and value in self.csp.variables[other_variable]:
-                    count += 1
-            constraints_count.append((value, count))
+    def compiled_backtrack_solver(self) -> Optional[dict]:
+        """
+        Backtracking on the compiled form of the CSP. Domains are bitmasks, so consistency checks, AC-3 revisions and
+        LCV counts are bit operations instead of constraint function calls. With AC_3 or MAC, arc consistency is
+        established once and then maintained from each assigned variable. The search uses an explicit stack, so it is
+        not bounded by the recursion limit. The solution is written back to the CSP.
 
-        constraints_count.sort(key=lambda x: x[1])
+        Returns:
+            Optional[dict]: The assignments of the CSP if a solution is found, None otherwise.
+        """
+        compiled = self.csp.compile()
+        domains = list(compiled.domains)
+        order = list(range(len(domains)))
+        trail = []
+        if self.symmetry_breaking:
+            classes = {}
+            for bit_index in range(len(compiled.values)):
+                key = tuple(i for i, mask in enumerate(domains) if mask >> bit_index & 1)
+                classes[key] = classes.get(key, 0) | 1 << bit_index
+            self.class_masks = list(classes.values())
+            self.used_bits = 0
 
-        return [value for value, _ in constraints_count]
+        if (self.AC_3 or self.MAC) and not self.revise_bitsets(compiled, domains, [i for i, mask in enumerate(domains)
+                                                                     if mask & (mask - 1) == 0], trail):
+            return None
+        if not self.bitset_backtrack(compiled, domains, order, 0, trail):
+            return None
+
+        self.csp.load_solution({name: compiled.values[domains[i].bit_length() - 1]
+                                for i, name in enumerate(compiled.names)})
+        return self.csp.assignments
+
+    def bitset_backtrack(self, compiled: CompiledCSP, domains: List[int], order: List[int], first: int,
+                         trail: List[Tuple[int, int]]) -> bool:
+        """
+        Search of the compiled form with an explicit stack, so the number of variables is not bounded by the
+        recursion limit. The variables order[first:] are unassigned, an assignment swaps the selected variable to the
+        position of its depth so that undoing it restores the order.
+
+        Args:
+            compiled (CompiledCSP): The compiled CSP.
+            domains (list): The current domain bitmasks, changed in place.
+            order (list): The variable indices, assigned ones first.
+            first (int): The number of assigned variables.
+            trail (list): The (variable, previous mask) pairs of every domain change, undone on backtrack.
+
+        Returns:
+            bool: True if the search found a solution, in which case domains holds it, False otherwise.
+        """
+        if first == len(order):
+            return True
+
+        stack = [self.bitset_frame(compiled, domains, order, first, len(trail))]
+        while stack:
+            frame = stack[-1]
+            depth = first + len(stack) - 1
+            variable = order[depth]
+            bits, mark, used_bits = frame[1], frame[3], frame[4]
+            if frame[5]:
+                while len(trail) > mark:
+                    j, previous = trail.pop()
+                    domains[j] = previous
+                self.used_bits = used_bits
+                if self.budgeted:
+                    self.path.pop()
+                    self.stable = min(self.stable, len(self.path))
+                frame[5] = False
+
+            neighbors = compiled.neighbors[variable]
+            while frame[2] < len(bits):
+                bit = bits[frame[2]]
+                frame[2] += 1
+                if any(domains[j] & ~bit == 0 for j in neighbors):
+                    continue
+                if self.budgeted:
+                    self.check_budget()
+                    self.path.append((compiled.names[variable], compiled.values[bit.bit_length() - 1]))
+                trail.append((variable, domains[variable]))
+                domains[variable] = bit
+                self.used_bits = used_bits | bit
+                self.csp.assignments_number += 1
+                frame[5] = True
+                break
+
+            if not frame[5]:
+                order[depth], order[frame[0]] = order[frame[0]], order[depth]
+                stack.pop()
+                continue
+            # A value emptying a domain is undone at the next iteration, which tries the next one
+            if (self.AC_3 or self.MAC) and not self.revise_bitsets(compiled, domains, [variable], trail):
+                continue
+            if depth + 1 == len(order):
+                return True
+            stack.append(self.bitset_frame(compiled, domains, order, depth + 1, len(trail)))
+
+        return False
+
+    def bitset_frame(self, compiled: CompiledCSP, domains: List[int], order: List[int], depth: int,
+                     mark: int) -> list:
+        """
+        Selects the variable of a depth of the compiled search, swaps it to order[depth] and orders its values.
+
+        Args:
+            compiled (CompiledCSP): The compiled CSP.
+            domains (list): The current domain bitmasks.
+            order (list): The variable indices, assigned ones first.
+            depth (int): The number of assigned variables.
+            mark (int): The length of the trail before the variable is assigned.
+
+        Returns:
+            list: The frame [position the variable was swapped from, ordered value bits, index of the next bit,
+                  trail mark, used value bits before the assignment, whether a value is assigned].
+        """
+        position = depth
+        if self.variable_heuristic:
+            position = min(range(depth, len(order)), key=lambda p: domains[order[p]].bit_count())
+        order[depth], order[position] = order[position], order[depth]
+        variable = order[depth]
+        neighbors = compiled.neighbors[variable]
+
+        bits = []
+        mask = domains[variable]
+        while mask:
+            bit = mask & -mask
+            bits.append(bit)
+            mask ^= bit
+        if self.domain_heuristic:
+            bits.sort(key=lambda bit: sum(1 for j in neighbors if domains[j] & bit))
+        used_bits = self.used_bits
+        if self.symmetry_breaking:
+            # The used values of each class and its first unused one
+            allowed = used_bits
+            for class_mask in self.class_masks:
+                unused = class_mask & ~used_bits
+                allowed |= unused & -unused
+            bits = [bit for bit in bits if bit & allowed]
+        return [position, bits, 0, mark, used_bits, False]
+
+    def revise_bitsets(self, compiled: CompiledCSP, domains: List[int], queue: List[int],
+                       trail: List[Tuple[int, int]]) -> bool:
+        """
+        AC-3 for inequality constraints on bitmask domains. An arc (x, y) only loses a value when y is down to a single
+        value, so the queue holds the variables that became singletons and each of them is removed from its neighbors.
+
+        Args:
+            compiled (CompiledCSP): The compiled CSP.
+            domains (list): The current domain bitmasks, changed in place.
+            queue (list): The indices of the singleton variables to propagate.
+            trail (list): The (variable, previous mask) pairs of every domain change.
+
+        Returns:
+            bool: False if a domain became empty, True otherwise.
+        """
+        queue = deque(queue)
+        while queue:
+            x = queue.popleft()
+            bit = domains[x]
+            for y in compiled.neighbors[x]:
+                mask = domains[y]
+                if mask & bit:
+                    trail.append((y, mask))
+                    mask ^= bit
+                    domains[y] = mask
+                    if mask == 0:
+                        return False
+                    if mask & (mask - 1) == 0:
+                        queue.append(y)
+        return True
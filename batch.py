@@ -0,0 +1,262 @@
+import random
+import time
+from typing import Dict, Iterable, List, Optional, Set
+from CSP import CSP, not_equal
+from Solver import Solver
+from ChromaticSearch import ChromaticSearch
+from graph_coloring import HEURISTIC_ENGINES, heuristic_solver
+from local_search import MinConflicts
+
+WORLD = 'World'
+# The engines a batch colors maps with, the process pools of the portfolio and parallel engines would be nested in
+# the one spreading the jobs
+ENGINES = ('backtracking', *HEURISTIC_ENGINES, 'min_conflicts')
+
+
+def generate_palette(count: int = 100, seed: int = 10) -> List:
+    """
+    Generates the random RGB colors main.py has always used, so batch and single runs color maps alike.
+
+    Args:
+        count (int): The number of colors. Default is 100.
+        seed (int): The seed of the random generator. Default is 10.
+
+    Returns:
+        List: A list of (r, g, b) tuples.
+    """
+    random.seed(seed)
+    def generate_color():
+        r = random.random()
+        g = random.random()
+        b = random.random()
+        return (r, g, b)
+
+    return [generate_color() for _ in range(count)]
+
+
+def check_engine(engine: str, chromatic: Optional[str]) -> None:
+    """
+    Checks that a batch can color maps with an engine and a chromatic strategy.
+
+    Args:
+        engine (str): The engine, see color_map.
+        chromatic (str, optional): The ChromaticSearch strategy, or None.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If the engine is not one of ENGINES, or if it is min_conflicts with a chromatic strategy, since
+                    local search proves no lower bound and takes none of the Solver options of the ChromaticSearch.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"A batch colors maps with {', '.join(ENGINES)}, not {engine}")
+    if chromatic and engine == 'min_conflicts':
+        raise ValueError("min_conflicts proves no lower bound and cannot be used with a chromatic strategy")
+
+
+def build_csp(borders: Dict[str, Iterable[str]], color_list: List) -> CSP:
+    """
+    Builds the map coloring CSP of a map: a variable per region and an inequality per border. A border listed by
+    both of its regions is added once.
+
+    Args:
+        borders (Dict[str, Iterable[str]]): A dictionary mapping each region to its neighboring regions.
+        color_list (List): The colors every region can take.
+
+    Returns:
+        CSP: The Constraint Satisfaction Problem.
+    """
+    csp = CSP()
+    for country, neighbors in borders.items():
+        csp.add_variable(country, color_list)
+        for neighbor in neighbors:
+            if neighbor not in csp.variables or country not in borders.get(neighbor, ()):
+                csp.add_constraint(not_equal, [country, neighbor])
+    return csp
+
+
+def update_csp(csp: CSP, borders: Dict[str, Iterable[str]], color_list: List) -> None:
+    """
+    Brings a CSP built by build_csp up to date with new borders, adding and removing only the regions and borders
+    that changed, so that Solver.repair can recolor the map from its previous solution.
+
+    Args:
+        csp (CSP): The Constraint Satisfaction Problem of the previous borders.
+        borders (Dict[str, Iterable[str]]): A dictionary mapping each region to its neighboring regions.
+        color_list (List): The colors every new region can take.
+
+    Returns:
+        None
+    """
+    for region in [region for region in csp.variables if region not in borders]:
+        csp.remove_variable(region)
+    for region in borders:
+        if region not in csp.variables:
+            csp.add_variable(region, color_list)
+
+    current = {frozenset(variables): variables for _, *variables in csp.constraints}
+    wanted = {}
+    for country, neighbors in borders.items():
+        for neighbor in neighbors:
+            wanted.setdefault(frozenset((country, neighbor)), [country, neighbor])
+    for border, variables in current.items():
+        if border not in wanted:
+            csp.remove_constraint(not_equal, variables)
+    for border, variables in wanted.items():
+        if border not in current:
+            csp.add_constraint(not_equal, variables)
+
+
+def color_map(borders: Dict[str, Set[str]], colors: List, chromatic: Optional[str] = None,
+              solver_options: Optional[Dict] = None, engine: str = 'backtracking') -> Dict:
+    """
+    Colors a map the way main.py does, either adding colors one at a time from 4, with a ChromaticSearch or with a
+    heuristic engine.
+
+    Args:
+        borders (Dict[str, Set[str]]): A dictionary mapping each region to its neighboring regions.
+        colors (List): The palette.
+        chromatic (str, optional): The ChromaticSearch strategy, or None to add colors one at a time. Default is None.
+        solver_options (dict, optional): The keyword arguments of every Solver. Default is None.
+        engine (str): 'backtracking', a heuristic engine of graph_coloring, which colors the map in one pass or
+                      gives the upper bound of the ChromaticSearch, or 'min_conflicts', which adds colors one at a time
+                      like backtracking, solver_options then being the MinConflicts keyword arguments.
+                      Default is 'backtracking'.
+
+    Returns:
+        Dict: A summary with the number of colors, the solution as palette indices, the number of assignments,
+              the time of every attempt and the total time.
+
+    Raises:
+        ValueError: If the engine is unknown or does not go with the chromatic strategy, see check_engine.
+    """
+    check_engine(engine, chromatic)
+    solver_options = solver_options or {}
+    started = time.perf_counter()
+    if chromatic:
+        search = ChromaticSearch(borders, colors, strategy=chromatic,
+                                 upper_bound_engine=engine if engine in HEURISTIC_ENGINES else 'dsatur',
+                                 **solver_options)
+        colors_count, solution = search.run()
+        assignments_number = search.assignments_number
+        timings = search.timings
+    elif engine == 'min_conflicts':
+        # Local search proves nothing, a color count is only left when it finds no solution within its time limit
+        solution, assignments_number, timings = None, 0, []
+        colors_count = min(4, len(colors))
+        while solution is None and colors_count <= len(colors):
+            search = MinConflicts(build_csp(borders, colors[:colors_count]), **solver_options)
+            coloring, conflicts = search.run()
+            solution = coloring if conflicts == 0 else None
+            assignments_number += search.iterations
+            timings.append((colors_count, search.seconds, solution is not None))
+            colors_count += 1
+        colors_count -= 1
+    elif engine in HEURISTIC_ENGINES:
+        solution = heuristic_solver(build_csp(borders, colors), engine)
+        colors_count = len(set(solution.values())) if solution is not None else None
+        assignments_number = 0
+        timings = [(colors_count, time.perf_counter() - started, solution is not None)]
+    else:
+        # Backtracking
+        solution, assignments_number, timings = None, 0, []
+        colors_count = min(4, len(colors))
+        while solution is None and colors_count <= len(colors):
+            attempt_started = time.perf_counter()
+            csp = build_csp(borders, colors[:colors_count])
+            # An attempt that reaches a time or node limit proves nothing and one more color is tried
+            solution = Solver(csp, **solver_options).solve().solution
+            assignments_number += csp.assignments_number
+            timings.append((colors_count, time.perf_counter() - attempt_started, solution is not None))
+            colors_count += 1
+        colors_count -= 1
+
+    color_index = {color: i for i, color in enumerate(colors)}
+    return {
+        'regions': len(borders),
+        'solved': solution is not None,
+        'colors': colors_count if solution is not None else None,
+        'assignments': assignments_number,
+        'seconds': time.perf_counter() - started,
+        'timings': [{'colors': attempt_colors, 'seconds': seconds, 'solved': solved}
+                    for attempt_colors, seconds, solved in timings],
+        'solution': {region: color_index[color] for region, color in solution.items()
+                     if region in borders} if solution is not None else None,
+    }
+
+
+def run_job(job: Dict) -> Dict:
+    """
+    Colors the map of a batch job, in a worker process or in this one.
+
+    Args:
+        job (dict): The map name, the neighbourhood distance, the borders, the palette, the chromatic strategy, the
+                    solver options and optionally the engine.
+
+    Returns:
+        Dict: The summary of color_map, with the map name and the neighbourhood distance.
+    """
+    summary = {'map': job['map'], 'ND': job['ND']}
+    summary.update(color_map(job['borders'], job['colors'], job['chromatic'], job['solver_options'],
+                             job.get('engine', 'backtracking')))
+    return summary
+
+
+def run_batch(maps: List[str], distances: List[int], chromatic: Optional[str] = None,
+              solver_options: Optional[Dict] = None, workers: int = 1, include_solutions: bool = False,
+              engine: str = 'backtracking') -> Dict:
+    """
+    Colors every map at every neighbourhood distance in one process. The dataset is loaded once, the borders of
+    every job are built here and the jobs are spread over a process pool when workers > 1.
+
+    Args:
+        maps (List[str]): Continent names, or 'World' for every continent together.
+        distances (List[int]): The neighbourhood distances of the sweep.
+        chromatic (str, optional): The ChromaticSearch strategy, or None to add colors one at a time. Default is None.
+        solver_options (dict, optional): The keyword arguments of every Solver. Default is None.
+        workers (int): The number of processes. Default is 1.
+        include_solutions (bool): Flag indicating whether to keep the solutions in the summary. Default is False.
+        engine (str): 'backtracking', a heuristic engine or 'min_conflicts', see color_map. Default is 'backtracking'.
+
+    Returns:
+        Dict: A machine-readable summary with the total time and one result per (map, distance) job.
+
+    Raises:
+        ValueError: If a map is unknown, or if the engine is unknown or does not go with the chromatic strategy.
+    """
+    # Imported here so that solving a batch from borders built elsewhere does not need the dataset
+    from dataset import continents
+    from map_generator import generate_borders
+
+    check_engine(engine, chromatic)
+    started = time.perf_counter()
+    known = continents()
+    for name in maps:
+        if name != WORLD and name not in known:
+            raise ValueError(f"Unknown map {name!r}, expected one of {known + [WORLD]}")
+
+    colors = generate_palette()
+    solver_options = dict(solver_options or {})
+    jobs = [{'map': name, 'ND': distance, 'colors': colors, 'chromatic': chromatic, 'solver_options': solver_options,
+             'engine': engine,
+             'borders': generate_borders(None if name == WORLD else [name], distance)}
+            for name in maps for distance in distances]
+
+    if workers > 1:
+        # Jobs already run in parallel, nested process pools would only oversubscribe the machine. Only the Solver
+        # and the ChromaticSearch take workers
+        if chromatic or engine == 'backtracking':
+            solver_options['workers'] = 1
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(run_job, jobs))
+    else:
+        results = [run_job(job) for job in jobs]
+
+    if not include_solutions:
+        for result in results:
+            del result['solution']
+    return {'seconds': time.perf_counter() - started, 'workers': workers, 'chromatic': chromatic, 'engine': engine,
+            'solver_options': {option: value for option, value in solver_options.items() if option != 'nogoods'},
+            'results': results}
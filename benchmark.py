@@ -0,0 +1,306 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Optional, Set
+from Solver import TIMED_OUT, Solver
+from batch import build_csp, generate_palette
+from graph_coloring import dsatur
+from instrumentation import Instrumentation
+from problem_format import read_dimacs
+
+BASELINE_PATH = './benchmark_baseline.json'
+
+
+def grid_graph(rows: int, columns: int, diagonals: bool = False) -> Dict[str, Set[str]]:
+    """
+    Generates a grid map, every cell bordering the cells above, below, left and right of it.
+
+    Args:
+        rows (int): The number of rows.
+        columns (int): The number of columns.
+        diagonals (bool): Flag indicating whether cells also border their diagonal neighbors. Default is False.
+
+    Returns:
+        Dict[str, Set[str]]: A symmetric adjacency dictionary.
+    """
+    steps = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+    if diagonals:
+        steps += [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+    return {f'G{i}_{j}': {f'G{i + di}_{j + dj}' for di, dj in steps if 0 <= i + di < rows and 0 <= j + dj < columns}
+            for i in range(rows) for j in range(columns)}
+
+
+def random_planar_graph(vertices: int, seed: int = 0) -> Dict[str, Set[str]]:
+    """
+    Generates a random maximal planar map (a random Apollonian network): starting from a triangle, every new region
+    is placed inside a random triangular face and borders its three corners.
+
+    Args:
+        vertices (int): The number of regions, at least 3.
+        seed (int): The seed of the random generator. Default is 0.
+
+    Returns:
+        Dict[str, Set[str]]: A symmetric adjacency dictionary.
+    """
+    generator = random.Random(seed)
+    graph = {f'P{i}': set() for i in range(vertices)}
+    faces = [(0, 1, 2)]
+    for a, b in ((0, 1), (1, 2), (0, 2)):
+        graph[f'P{a}'].add(f'P{b}')
+        graph[f'P{b}'].add(f'P{a}')
+    for vertex in range(3, vertices):
+        a, b, c = faces.pop(generator.randrange(len(faces)))
+        for corner in (a, b, c):
+            graph[f'P{vertex}'].add(f'P{corner}')
+            graph[f'P{corner}'].add(f'P{vertex}')
+        faces += [(a, b, vertex), (b, c, vertex), (a, c, vertex)]
+    return graph
+
+
+def mycielski_graph(chromatic_number: int) -> Dict[str, Set[str]]:
+    """
+    Generates the Mycielski graph with the given chromatic number. It has no triangle, so clique bounds are useless and
+    proving that one color fewer fails is hard for backtracking.
+
+    Args:
+        chromatic_number (int): The chromatic number, at least 2.
+
+    Returns:
+        Dict[str, Set[str]]: A symmetric adjacency dictionary.
+    """
+    edges = [(0, 1)]
+    vertices = 2
+    for _ in range(chromatic_number - 2):
+        # Every vertex gets a shadow bordering its neighbors, and a new vertex borders every shadow
+        edges += [(u, v + vertices) for u, v in edges] + [(v, u + vertices) for u, v in edges]
+        edges += [(vertices + i, 2 * vertices) for i in range(vertices)]
+        vertices = 2 * vertices + 1
+    graph = {f'M{i}': set() for i in range(vertices)}
+    for u, v in edges:
+        graph[f'M{u}'].add(f'M{v}')
+        graph[f'M{v}'].add(f'M{u}')
+    return graph
+
+
+def heuristic_configs() -> Dict[str, Dict]:
+    """
+    Enumerates every combination of Solver heuristics, propagation, engine and symmetry breaking. Tie breakers only
+    apply to MRV, and the compiled engine has no tie breaker.
+
+    Returns:
+        Dict[str, Dict]: The Solver keyword arguments of every configuration, by configuration name.
+    """
+    configs = {}
+    for engine, propagation, mrv, lcv, tie_breaker, symmetry_breaking in itertools.product(
+            ('recursive', 'iterative', 'compiled', 'backjumping'), (None, 'AC_3', 'MAC'), (False, True), (False, True),
+            (None, 'degree', 'dsatur'), (False, True)):
+        if tie_breaker is not None and (not mrv or engine == 'compiled'):
+            continue
+        name = '+'.join(part for part in (engine, propagation and propagation.lower(), mrv and 'mrv',
+                                          lcv and 'lcv', tie_breaker, symmetry_breaking and 'sym') if part)
+        configs[name] = {'domain_heuristics': lcv, 'variable_heuristics': mrv, 'AC_3': propagation == 'AC_3',
+                         'MAC': propagation == 'MAC', 'tie_breaker': tie_breaker,
+                         'iterative': engine == 'iterative', 'compiled': engine == 'compiled',
+                         'backjumping': engine == 'backjumping',
+                         'nogood_capacity': 1000 if engine == 'backjumping' else 0,
+                         'symmetry_breaking': symmetry_breaking}
+    return configs
+
+
+def benchmark_cases(distances: List[int] = (1, 2, 3, 4), dimacs: List[str] = ()) -> Dict[str, Dict]:
+    """
+    Builds the benchmark maps: every continent of the dataset at every distance with as many colors as DSATUR needs,
+    synthetic maps, graph coloring instances in the DIMACS .col format, and a few maps with one color too few, whose
+    search must prove there is no solution.
+
+    Args:
+        distances (List[int]): The neighbourhood distances of the continents. Default is 1 to 4.
+        dimacs (List[str]): The .col files of the DIMACS instances, named after their file. Default is none.
+
+    Returns:
+        Dict[str, Dict]: The 'borders' and 'colors' count of every case, by case name.
+    """
+    from dataset import continents
+    from map_generator import generate_borders
+
+    cases = {}
+    for continent in continents():
+        for distance in distances:
+            cases[f'{continent} ND{distance}'] = {'borders': generate_borders([continent], distance)}
+    cases['grid 30x30'] = {'borders': grid_graph(30, 30)}
+    cases['king grid 20x20'] = {'borders': grid_graph(20, 20, diagonals=True)}
+    cases['random planar 300'] = {'borders': random_planar_graph(300)}
+    cases['mycielski 5'] = {'borders': mycielski_graph(5)}
+    for path in dimacs:
+        cases[f'dimacs {os.path.basename(path)}'] = {'borders': read_dimacs(path)}
+    for case in cases.values():
+        coloring = dsatur({region: {neighbor for neighbor in neighbors if neighbor in case['borders']}
+                           for region, neighbors in case['borders'].items()})
+        case['colors'] = max(coloring.values(), default=-1) + 1
+
+    cases['Asia ND1 unsatisfiable'] = {'borders': generate_borders(['Asia'], 1), 'colors': 3}
+    cases['mycielski 4 unsatisfiable'] = {'borders': mycielski_graph(4), 'colors': 3}
+    cases['mycielski 5 unsatisfiable'] = {'borders': mycielski_graph(5), 'colors': 4}
+    return cases
+
+
+def run_case(borders: Dict[str, Set[str]], colors_count: int, options: Dict, timeout: float,
+             memory: bool = True) -> Dict:
+    """
+    Solves a case with one configuration and measures it.
+
+    Args:
+        borders (Dict[str, Set[str]]): The map.
+        colors_count (int): The number of colors.
+        options (dict): The Solver keyword arguments.
+        timeout (float): The time limit of the run, in seconds.
+        memory (bool): Flag indicating whether to measure the peak memory in the second, instrumented run.
+                       Default is True.
+
+    Returns:
+        Dict: The 'status' ('solved', 'unsatisfiable' or 'timeout'), 'seconds', 'assignments', the 'nodes',
+              'backtracks', 'consistency_checks' and 'arc_revisions' counters and the 'peak_memory' in bytes. The
+              counters and the memory are None when not measured.
+    """
+    def solve(traced, instrumentation=None):
+        csp = build_csp(borders, generate_palette(colors_count))
+        if traced:
+            tracemalloc.start()
+        started = time.perf_counter()
+        status = Solver(csp, instrumentation=instrumentation, time_limit=timeout, **options).solve().status
+        if status == TIMED_OUT:
+            status = 'timeout'
+        seconds = time.perf_counter() - started
+        peak_memory = None
+        if traced:
+            peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        return csp, status, seconds, peak_memory
+
+    csp, status, seconds, _ = solve(False)
+    result = {'status': status, 'seconds': seconds, 'nodes': None, 'assignments': csp.assignments_number,
+              'backtracks': None, 'consistency_checks': None, 'arc_revisions': None, 'peak_memory': None}
+    if status != 'timeout':
+        # The search is deterministic, so a second, instrumented run counts the nodes of the timed one
+        instrumentation = Instrumentation()
+        result['peak_memory'] = solve(memory, instrumentation)[3]
+        for counter in ('nodes', 'backtracks', 'consistency_checks', 'arc_revisions'):
+            result[counter] = getattr(instrumentation, counter)
+    return result
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], time_tolerance: float = 2.0,
+            time_slack: float = 0.05, memory_tolerance: float = 1.5) -> List[str]:
+    """
+    Compares benchmark results with a baseline. The search counters are deterministic, so any increase is a
+    regression; times and memory vary between runs and machines, so they only regress beyond a tolerance.
+
+    Args:
+        results (Dict[str, Dict]): The results, by 'case | configuration' key.
+        baseline (Dict[str, Dict]): The baseline results, by the same keys.
+        time_tolerance (float): The allowed time ratio. Default is 2.0.
+        time_slack (float): The allowed absolute time increase in seconds, for very short runs. Default is 0.05.
+        memory_tolerance (float): The allowed peak memory ratio. Default is 1.5.
+
+    Returns:
+        List[str]: A description of every regression.
+    """
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        expected = baseline[key]
+        if expected['status'] != 'timeout' and result['status'] != expected['status']:
+            regressions.append(f"{key}: {expected['status']} became {result['status']}")
+            continue
+        if result['status'] == 'timeout':
+            continue
+        for counter in ('nodes', 'assignments', 'backtracks', 'consistency_checks', 'arc_revisions'):
+            if expected['status'] != 'timeout' and expected.get(counter) is not None \
+                    and result[counter] > expected[counter]:
+                regressions.append(f"{key}: {counter} went from {expected[counter]} to {result[counter]}")
+        if result['seconds'] > expected['seconds'] * time_tolerance + time_slack:
+            regressions.append(f"{key}: time went from {expected['seconds']:.3f}s to {result['seconds']:.3f}s")
+        if result['peak_memory'] and expected.get('peak_memory') \
+                and result['peak_memory'] > expected['peak_memory'] * memory_tolerance:
+            regressions.append(f"{key}: peak memory went from {expected['peak_memory']} to {result['peak_memory']}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="Map Coloring Benchmark",
+        description="Runs every Solver configuration on continents and synthetic maps and compares with a baseline",
+    )
+    parser.add_argument("-c", "--cases", nargs="+", help="Only run the cases whose name contains one of these")
+    parser.add_argument("-cfg", "--configs", nargs="+",
+                        help="Only run the configurations whose name contains all of these, e.g. mrv mac")
+    parser.add_argument("-ND", "--distances", nargs="+", type=int, default=[1, 2, 3, 4],
+                        help="The neighbourhood distances of the continent cases, with a default of 1 to 4")
+    parser.add_argument("-dimacs", "--dimacs", nargs="+", default=[], metavar="FILE",
+                        help="Also run these graph coloring instances in the DIMACS .col format")
+    parser.add_argument("-t", "--timeout", type=float, default=5.0, help="The time limit of a run in seconds")
+    parser.add_argument("--no-memory", action="store_true", help="Skip measuring the peak memory")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="The baseline file")
+    parser.add_argument("--record", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--time-tolerance", type=float, default=2.0, help="The allowed time ratio to the baseline")
+    args = parser.parse_args(argv)
+
+    if not args.record:
+        # Checked before any run, a comparison with nothing must not pass
+        try:
+            with open(args.baseline) as file:
+                baseline = json.load(file)
+        except FileNotFoundError:
+            print(f"ERROR: no baseline at {args.baseline}, nothing can be compared. Run with --record to create one",
+                  file=sys.stderr)
+            return 2
+
+    cases = benchmark_cases(args.distances, args.dimacs)
+    if args.cases:
+        cases = {name: case for name, case in cases.items() if any(part in name for part in args.cases)}
+    configs = heuristic_configs()
+    if args.configs:
+        configs = {name: options for name, options in configs.items()
+                   if all(part in name.split('+') for part in args.configs)}
+
+    results = {}
+    for case_name, case in cases.items():
+        for config_name, options in configs.items():
+            key = f'{case_name} | {config_name}'
+            results[key] = run_case(case['borders'], case['colors'], options, args.timeout, not args.no_memory)
+            result = results[key]
+            print(f"{key}: {result['status']} in {result['seconds']:.3f}s, {result['assignments']} assignments, "
+                  f"{result['backtracks']} backtracks", flush=True)
+
+    if args.record:
+        baseline = {}
+        try:
+            with open(args.baseline) as file:
+                baseline = json.load(file)
+        except FileNotFoundError:
+            pass
+        baseline.update(results)
+        with open(args.baseline, 'w') as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+        print(f"Recorded {len(results)} results in {args.baseline}")
+        return 0
+
+    missing = [key for key in results if key not in baseline]
+    if missing:
+        print(f"WARNING: {len(missing)} runs are not in the baseline and were not compared, run with --record to add "
+              f"them", file=sys.stderr)
+    regressions = compare(results, baseline, time_tolerance=args.time_tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    print(f"{len(results) - len(missing)} runs compared, {len(regressions)} regressions")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,170 @@
+import csv
+import hashlib
+import os
+import pickle
+from typing import Dict, List, Optional
+
+DATASET_PATH = './countries_dataset.csv'
+CACHE_VERSION = 1
+
+# Parsed datasets by absolute path, each with the (mtime, size) of the CSV it was parsed from
+_datasets = {}
+# Parsed GeoDataFrames by (absolute path, mtime, continent)
+_geodataframes = {}
+
+
+def cache_path(path: str) -> str:
+    """
+    Returns the path of the preprocessed cache stored next to a dataset CSV.
+
+    Args:
+        path (str): The path of the dataset CSV.
+
+    Returns:
+        str: The path of the cache file.
+    """
+    return os.path.splitext(path)[0] + '.cache.pickle'
+
+
+def file_hash(path: str) -> str:
+    """
+    Computes the SHA-256 hash of a file.
+
+    Args:
+        path (str): The path of the file.
+
+    Returns:
+        str: The hexadecimal digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_csv(path: str) -> Dict:
+    """
+    Parses a dataset CSV into columns and per-continent adjacency. Geometries are kept as WKT text, so the standard
+    csv module is enough and pandas is only needed to draw.
+
+    Args:
+        path (str): The path of the dataset CSV.
+
+    Returns:
+        Dict: A dictionary with the 'continent', 'country_name', 'iso_a3', 'geometry' and 'neighbors' columns as
+              lists, and 'adjacency' mapping each continent to a dictionary from ISO A3 code to neighbor codes.
+    """
+    # The WKT of the largest countries is longer than the default field size limit
+    csv.field_size_limit(2 ** 31 - 1)
+    with open(path, newline='', encoding='utf-8') as file:
+        rows = list(csv.DictReader(file))
+    data = {column: [row[column] for row in rows] for column in ('continent', 'country_name', 'iso_a3', 'geometry')}
+    data['neighbors'] = [row['neighbors'].split(', ') if row['neighbors'] else [] for row in rows]
+    data['adjacency'] = {}
+    for continent, iso_a3, neighbors in zip(data['continent'], data['iso_a3'], data['neighbors']):
+        data['adjacency'].setdefault(continent, {})[iso_a3] = neighbors
+    return data
+
+
+def load_dataset(path: str = DATASET_PATH) -> Dict:
+    """
+    Loads a dataset CSV, parsing it at most once per process and at most once per change of the file.
+
+    The parsed data is kept in memory and persisted as a pickle next to the CSV. The pickle is used as long as the
+    CSV has the mtime and size it was built from; when they differ, it is still used if the CSV hash matches, and it
+    is rebuilt otherwise. Geometries are not parsed, see load_geodataframe.
+
+    Args:
+        path (str): The path of the dataset CSV. Default is './countries_dataset.csv'.
+
+    Returns:
+        Dict: The parsed dataset, as returned by parse_csv. It is shared between callers and must not be changed.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    if path in _datasets and _datasets[path][0] == signature:
+        return _datasets[path][1]
+
+    cache = None
+    try:
+        with open(cache_path(path), 'rb') as file:
+            cache = pickle.load(file)
+        if cache.get('version') != CACHE_VERSION:
+            cache = None
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        cache = None
+
+    if cache is not None and cache['signature'] == signature:
+        data = cache['data']
+    else:
+        digest = file_hash(path)
+        if cache is not None and cache['sha256'] == digest:
+            data = cache['data']
+        else:
+            data = parse_csv(path)
+        try:
+            with open(cache_path(path), 'wb') as file:
+                pickle.dump({'version': CACHE_VERSION, 'signature': signature, 'sha256': digest, 'data': data},
+                            file, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            # A read-only directory only costs the next process a parse
+            pass
+
+    _datasets[path] = (signature, data)
+    return data
+
+
+def continent_adjacency(continent: str, path: str = DATASET_PATH) -> Dict[str, List[str]]:
+    """
+    Returns the direct neighbors of every country of a continent.
+
+    Args:
+        continent (str): The name of the continent.
+        path (str): The path of the dataset CSV. Default is './countries_dataset.csv'.
+
+    Returns:
+        Dict[str, List[str]]: A dictionary mapping ISO A3 codes to the ISO A3 codes of their neighbors, which may
+                              belong to other continents.
+    """
+    return load_dataset(path)['adjacency'].get(continent, {})
+
+
+def continents(path: str = DATASET_PATH) -> List[str]:
+    """
+    Returns the continents of the dataset, in order of first appearance.
+
+    Args:
+        path (str): The path of the dataset CSV. Default is './countries_dataset.csv'.
+
+    Returns:
+        List[str]: The continent names.
+    """
+    return list(load_dataset(path)['adjacency'])
+
+
+def load_geodataframe(continent: Optional[str] = None, path: str = DATASET_PATH):
+    """
+    Returns the dataset as a GeoDataFrame, parsing the geometries of the requested rows only, once per process.
+
+    Args:
+        continent (Optional[str]): The continent to keep, or None for every country. Default is None.
+        path (str): The path of the dataset CSV. Default is './countries_dataset.csv'.
+
+    Returns:
+        gpd.GeoDataFrame: The countries with their continent, name, ISO A3 code, parsed geometry and neighbors.
+    """
+    import geopandas as gpd
+    from shapely import wkt
+
+    data = load_dataset(path)
+    key = (os.path.abspath(path), _datasets[os.path.abspath(path)][0], continent)
+    if key not in _geodataframes:
+        rows = [i for i, row_continent in enumerate(data['continent'])
+                if continent is None or row_continent == continent]
+        columns = {column: [data[column][i] for i in rows]
+                   for column in ('continent', 'country_name', 'iso_a3', 'neighbors')}
+        columns['geometry'] = [wkt.loads(data['geometry'][i]) for i in rows]
+        _geodataframes[key] = gpd.GeoDataFrame(columns, geometry='geometry')
+    return _geodataframes[key]
@@ -0,0 +1,38 @@
+from typing import Dict, List, Set
+from CSP import CSP, not_equal
+
+# A wheel with an odd rim, which needs four colors: the hub H borders every region of the rim A B C D E
+WHEEL_REGIONS = 'HABCDE'
+WHEEL_BORDERS = ['AB', 'BC', 'CD', 'DE', 'EA', 'HA', 'HB', 'HC', 'HD', 'HE']
+
+
+def wheel_csp(colors: List) -> CSP:
+    """
+    Creates the map coloring CSP of the wheel, the variables added hub first.
+
+    Args:
+        colors (List): The domain of every region.
+
+    Returns:
+        CSP: The Constraint Satisfaction Problem, one not_equal constraint per border.
+    """
+    csp = CSP()
+    for variable in WHEEL_REGIONS:
+        csp.add_variable(variable, colors)
+    for x, y in WHEEL_BORDERS:
+        csp.add_constraint(not_equal, [x, y])
+    return csp
+
+
+def wheel_borders() -> Dict[str, Set[str]]:
+    """
+    Returns the borders of the wheel, a new dictionary on every call so that a test can add regions to it.
+
+    Returns:
+        Dict[str, Set[str]]: A symmetric dictionary mapping each region to its neighboring regions.
+    """
+    borders = {region: set() for region in WHEEL_REGIONS}
+    for x, y in WHEEL_BORDERS:
+        borders[x].add(y)
+        borders[y].add(x)
+    return borders
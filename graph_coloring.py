@@ -0,0 +1,323 @@
+import heapq
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from CSP import CSP, not_equal
+
+
+def adjacency_from_borders(borders: Dict[str, Iterable[str]]) -> Dict[str, Set[str]]:
+    """
+    Builds a symmetric adjacency dictionary from a borders dictionary. Neighbors that are not keys of the borders
+    dictionary (e.g. countries of another continent) and self loops are dropped.
+
+    Args:
+        borders (Dict[str, Iterable[str]]): A dictionary mapping each region to its neighboring regions.
+
+    Returns:
+        Dict[str, Set[str]]: A dictionary mapping each region to the set of its neighbors.
+    """
+    graph = {region: set() for region in borders}
+    for region, neighbors in borders.items():
+        for neighbor in neighbors:
+            if neighbor in graph and neighbor != region:
+                graph[region].add(neighbor)
+                graph[neighbor].add(region)
+    return graph
+
+
+def constraint_graph(csp: CSP) -> Dict[str, Set[str]]:
+    """
+    Builds the symmetric constraint graph of a CSP, i.e. an edge for every pair of variables sharing a constraint.
+
+    Args:
+        csp (CSP): The Constraint Satisfaction Problem.
+
+    Returns:
+        Dict[str, Set[str]]: A dictionary mapping each variable to the set of variables it shares a constraint with.
+    """
+    graph = {variable: set() for variable in csp.variables}
+    for _, x, y in csp.constraints:
+        if x in graph and y in graph and x != y:
+            graph[x].add(y)
+            graph[y].add(x)
+    return graph
+
+
+def connected_components(graph: Dict[str, Set[str]]) -> List[List[str]]:
+    """
+    Splits a graph into its connected components.
+
+    Args:
+        graph (Dict[str, Set[str]]): A symmetric adjacency dictionary.
+
+    Returns:
+        List[List[str]]: The vertices of each component in insertion order, components ordered by their first vertex.
+    """
+    component_of = {}
+    components = []
+    for vertex in graph:
+        if vertex in component_of:
+            continue
+        stack = [vertex]
+        component_of[vertex] = len(components)
+        while stack:
+            for neighbor in graph[stack.pop()]:
+                if neighbor not in component_of:
+                    component_of[neighbor] = len(components)
+                    stack.append(neighbor)
+        components.append([])
+    for vertex in graph:
+        components[component_of[vertex]].append(vertex)
+    return components
+
+
+def dsatur(graph: Dict[str, Set[str]]) -> Dict[str, int]:
+    """
+    Colors a graph with the DSATUR heuristic: the next vertex is always the one whose neighbors already use the most
+    distinct colors (saturation degree), ties broken by degree and then by insertion order. The vertex gets the
+    smallest color index not used by its neighbors.
+
+    Args:
+        graph (Dict[str, Set[str]]): A symmetric adjacency dictionary.
+
+    Returns:
+        Dict[str, int]: A dictionary mapping each vertex to its color index, starting at 0.
+    """
+    order = {vertex: i for i, vertex in enumerate(graph)}
+    saturation = {vertex: set() for vertex in graph}
+    coloring = {}
+    heap = [(0, -len(graph[vertex]), order[vertex], vertex) for vertex in graph]
+    heapq.heapify(heap)
+
+    while heap:
+        negative_saturation, _, _, vertex = heapq.heappop(heap)
+        # Stale entries are skipped, a fresher one was pushed when the saturation grew
+        if vertex in coloring or -negative_saturation != len(saturation[vertex]):
+            continue
+        color = 0
+        while color in saturation[vertex]:
+            color += 1
+        coloring[vertex] = color
+        for neighbor in graph[vertex]:
+            if neighbor not in coloring and color not in saturation[neighbor]:
+                saturation[neighbor].add(color)
+                heapq.heappush(heap, (-len(saturation[neighbor]), -len(graph[neighbor]), order[neighbor], neighbor))
+
+    return coloring
+
+
+def greedy_coloring(graph: Dict[str, Set[str]], order: Iterable[str]) -> Dict[str, int]:
+    """
+    Colors a graph greedily: the vertices are taken in the given order and each gets the smallest color index not used
+    by its neighbors.
+
+    Args:
+        graph (Dict[str, Set[str]]): A symmetric adjacency dictionary.
+        order (Iterable[str]): Every vertex, in coloring order.
+
+    Returns:
+        Dict[str, int]: A dictionary mapping each vertex to its color index, starting at 0.
+    """
+    coloring = {}
+    for vertex in order:
+        used = {coloring[neighbor] for neighbor in graph[vertex] if neighbor in coloring}
+        color = 0
+        while color in used:
+            color += 1
+        coloring[vertex] = color
+    return coloring
+
+
+def largest_first(graph: Dict[str, Set[str]]) -> Dict[str, int]:
+    """
+    Colors a graph greedily in order of decreasing degree, ties broken by insertion order.
+
+    Args:
+        graph (Dict[str, Set[str]]): A symmetric adjacency dictionary.
+
+    Returns:
+        Dict[str, int]: A dictionary mapping each vertex to its color index, starting at 0.
+    """
+    return greedy_coloring(graph, sorted(graph, key=lambda vertex: -len(graph[vertex])))
+
+
+def smallest_last_order(graph: Dict[str, Set[str]]) -> List[str]:
+    """
+    Orders the vertices smallest last: the vertex of smallest degree is removed repeatedly, and the vertices are
+    returned in the reverse order of removal. Each vertex then has at most degeneracy neighbors before it, e.g. 5 in a
+    planar graph. The removal uses degree buckets and runs in O(vertices + edges).
+
+    Args:
+        graph (Dict[str, Set[str]]): A symmetric adjacency dictionary.
+
+    Returns:
+        List[str]: Every vertex, in smallest-last order.
+    """
+    degree = {vertex: len(neighbors) for vertex, neighbors in graph.items()}
+    # Each bucket is a stack of the vertices pushed with that degree, entries left behind by a degree change are stale
+    buckets = [[] for _ in range(max(degree.values(), default=0) + 1)]
+    for vertex in reversed(list(graph)):
+        buckets[degree[vertex]].append(vertex)
+
+    removed = []
+    removed_set = set()
+    smallest = 0
+    while len(removed) < len(graph):
+        while not buckets[smallest]:
+            smallest += 1
+        vertex = buckets[smallest].pop()
+        if vertex in removed_set or degree[vertex] != smallest:
+            continue
+        removed.append(vertex)
+        removed_set.add(vertex)
+        for neighbor in graph[vertex]:
+            if neighbor not in removed_set:
+                degree[neighbor] -= 1
+                buckets[degree[neighbor]].append(neighbor)
+        smallest = max(smallest - 1, 0)
+
+    removed.reverse()
+    return removed
+
+
+def smallest_last(graph: Dict[str, Set[str]]) -> Dict[str, int]:
+    """
+    Colors a graph greedily in smallest-last order, see smallest_last_order. A vertex has at most degeneracy colored
+    neighbors when it is colored, so a planar graph never needs more than 6 colors.
+
+    Args:
+        graph (Dict[str, Set[str]]): A symmetric adjacency dictionary.
+
+    Returns:
+        Dict[str, int]: A dictionary mapping each vertex to its color index, starting at 0.
+    """
+    return greedy_coloring(graph, smallest_last_order(graph))
+
+
+def rlf(graph: Dict[str, Set[str]]) -> Dict[str, int]:
+    """
+    Colors a graph with the Recursive Largest First heuristic, one color class at a time. A class starts with the
+    uncolored vertex of most uncolored neighbors, then repeatedly takes the candidate with the most neighbors among the
+    vertices excluded from the class, ties broken by the fewest neighbors among the candidates, so that each class
+    excludes as few vertices as possible. Candidates are kept in a lazily updated heap, and the degrees among the
+    uncolored vertices are updated as vertices are colored, so a class costs O(uncolored vertices) plus
+    O(log vertices) per edge of the vertices it excludes.
+
+    Args:
+        graph (Dict[str, Set[str]]): A symmetric adjacency dictionary.
+
+    Returns:
+        Dict[str, int]: A dictionary mapping each vertex to its color index, starting at 0.
+    """
+    order = {vertex: i for i, vertex in enumerate(graph)}
+    # The neighbors of each uncolored vertex that are uncolored too, kept up to date as vertices are colored
+    uncolored_degree = {vertex: len(neighbors) for vertex, neighbors in graph.items()}
+    coloring = {}
+    color = 0
+    while uncolored_degree:
+        candidates = set(uncolored_degree)
+        # Neighbors among the candidates, and among the uncolored vertices excluded from the class
+        candidate_degree = dict(uncolored_degree)
+        excluded_degree = dict.fromkeys(candidates, 0)
+        vertex = max(candidates, key=lambda candidate: (candidate_degree[candidate], -order[candidate]))
+        heap = None
+        while vertex is not None:
+            coloring[vertex] = color
+            candidates.discard(vertex)
+            del uncolored_degree[vertex]
+            for neighbor in graph[vertex]:
+                if neighbor in uncolored_degree:
+                    uncolored_degree[neighbor] -= 1
+            for neighbor in graph[vertex]:
+                if neighbor not in candidates:
+                    continue
+                candidates.discard(neighbor)
+                for other in graph[neighbor]:
+                    if other in candidates:
+                        excluded_degree[other] += 1
+                        candidate_degree[other] -= 1
+                        if heap is not None:
+                            heapq.heappush(heap, (-excluded_degree[other], candidate_degree[other], order[other],
+                                                  other))
+            if heap is None:
+                heap = [(-excluded_degree[candidate], candidate_degree[candidate], order[candidate], candidate)
+                        for candidate in candidates]
+                heapq.heapify(heap)
+
+            vertex = None
+            while heap:
+                negative_excluded, degree, _, candidate = heapq.heappop(heap)
+                # Stale entries are skipped, a fresher one was pushed when the degrees changed
+                if candidate in candidates and -negative_excluded == excluded_degree[candidate] \
+                        and degree == candidate_degree[candidate]:
+                    vertex = candidate
+                    break
+        color += 1
+
+    return coloring
+
+
+# The heuristic coloring engines, by name
+HEURISTIC_ENGINES = {'largest_first': largest_first, 'smallest_last': smallest_last, 'dsatur': dsatur, 'rlf': rlf}
+
+
+def heuristic_solver(csp: CSP, engine: str = 'dsatur') -> Optional[dict]:
+    """
+    Solves a map coloring CSP with a heuristic coloring engine instead of backtracking. The engine colors the
+    constraint graph with as many colors as it needs, color index i standing for the i-th value of the CSP in order of
+    first appearance. The coloring is written back to the CSP like a solution found by the Solver.
+
+    Args:
+        csp (CSP): The Constraint Satisfaction Problem, whose constraints must all be not_equal.
+        engine (str): One of 'largest_first', 'smallest_last', 'dsatur' and 'rlf'. Default is 'dsatur'.
+
+    Returns:
+        Optional[dict]: The assignments of the CSP, or None if the coloring gives a variable a value outside its
+                        domain, e.g. because it needs more colors than the domains hold. None is no proof that the CSP
+                        has no solution.
+
+    Raises:
+        ValueError: If the engine is unknown or a constraint is not not_equal.
+    """
+    if engine not in HEURISTIC_ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}, expected one of {list(HEURISTIC_ENGINES)}")
+    for constraint_func, x, y in csp.constraints:
+        if constraint_func is not not_equal:
+            raise ValueError(f"Constraint between {x!r} and {y!r} is not not_equal and cannot be colored greedily")
+
+    values = list(dict.fromkeys(value for domain in csp.variables.values() for value in domain))
+    coloring = HEURISTIC_ENGINES[engine](constraint_graph(csp))
+    solution = {}
+    for variable, color in coloring.items():
+        if color >= len(values) or values[color] not in csp.variables[variable]:
+            return None
+        solution[variable] = values[color]
+    csp.load_solution(solution)
+    return csp.assignments
+
+
+def greedy_clique(graph: Dict[str, Set[str]], starts: int = 16) -> List[str]:
+    """
+    Finds a large clique with a greedy heuristic. Starting from each of the highest degree vertices, the candidate
+    set is repeatedly narrowed to the common neighbors of the clique, always extending with the candidate of highest
+    degree. The size of the returned clique is a lower bound on the chromatic number.
+
+    Args:
+        graph (Dict[str, Set[str]]): A symmetric adjacency dictionary.
+        starts (int): The number of highest degree vertices to start from. Default is 16.
+
+    Returns:
+        List[str]: The vertices of the largest clique found.
+    """
+    order = {vertex: i for i, vertex in enumerate(graph)}
+    by_degree = sorted(graph, key=lambda vertex: -len(graph[vertex]))
+    best = by_degree[:1]
+    for start in by_degree[:starts]:
+        clique = [start]
+        candidates = set(graph[start])
+        while candidates:
+            vertex = max(candidates, key=lambda candidate: (len(graph[candidate] & candidates),
+                                                         len(graph[candidate]), -order[candidate]))
+            clique.append(vertex)
+            candidates &= graph[vertex]
+        if len(clique) > len(best):
+            best = clique
+    return best
@@ -1,8 +1,7 @@
 import geopandas as gpd
-import pandas as pd
-from shapely import wkt
 from typing import Dict
 import matplotlib.pyplot as plt
+from dataset import load_geodataframe
 
 def draw_colored_map(solution: Dict[str, str], gdf: gpd.GeoDataFrame, continent: str, assignments_number: int) -> None:
     """
@@ -44,8 +43,8 @@ def draw_colored_map(solution: Dict[str, str], gdf: gpd.GeoDataFrame, continent:
 
 def draw(continent: str, solution: Dict[str, str], assignments_number: int) -> None:
     """
-    Loads geographic data from a CSV file, transforms it into a GeoDataFrame, and then visualizes the map coloring
-    solution for a specific continent. This function serves as a high-level interface to prepare data and call
+    Loads the geographic data of a continent from the cached dataset, parsing only its geometries, and then visualizes
+    the map coloring solution for it. This function serves as a high-level interface to prepare data and call
     draw_colored_map with appropriate parameters.
 
     Args:
@@ -54,8 +53,6 @@ def draw(continent: str, solution: Dict[str, str], assignments_number: int) -> N
                                    assigned to that country as part of the map coloring solution.
         assignments_number (int): The number of assignments made during the solution of the map coloring problem.
     """
-    neighbors_df = pd.read_csv('./countries_dataset.csv')
-    neighbors_df['geometry'] = neighbors_df['geometry'].apply(wkt.loads)
-    gdf = gpd.GeoDataFrame(neighbors_df, geometry='geometry')
-    
+    gdf = load_geodataframe(continent)
+
     draw_colored_map(solution, gdf, continent, assignments_number)
\ No newline at end of file
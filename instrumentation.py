@@ -0,0 +1,268 @@
+import json
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+
+class Instrumentation(object):
+    """
+    Counters, phase timers, event callbacks and a sampled trace of a search.
+
+    Instrumentation is attached to a Solver and its CSP by wrapping their methods on the instances, so a Solver
+    without instrumentation runs the plain methods and pays nothing. Phase times are inclusive: 'search' covers the
+    whole backtrack_solver call and contains every other phase. Only work done in this process is counted, searches
+    running in a process pool are not.
+
+    Attributes:
+        nodes (int): The number of assignments tried, i.e. search tree nodes.
+        backtracks (int): The number of assignments undone.
+        consistency_checks (int): The number of is_consistent calls.
+        arc_revisions (int): The number of arcs revised by AC-3 or MAC.
+        pruned_values (int): The number of values removed from domains by propagation.
+        timers (dict): The total seconds spent in each phase: 'search', 'select', 'order', 'consistency' and
+            'propagation'.
+        on_assign (callable): Called with (variable, value, depth) after each successful assignment, or None.
+        on_unassign (callable): Called with (variable, depth) after undoing an assignment on_assign was called for,
+            or None.
+        sample_every (int): Every sample_every nodes the current path is recorded in samples, 0 disables sampling.
+        samples (list): The (seconds since the search started, variables of the path) pairs sampled.
+    """
+
+    # Solver and CSP methods timed as a phase
+    PHASES = {'select_unassigned_variable': 'select', 'ordered_domain_value': 'order',
+              'is_consistent': 'consistency', 'apply_AC3': 'propagation', 'apply_MAC': 'propagation',
+              'revise_bitsets': 'propagation'}
+
+    def __init__(self, on_assign: Optional[Callable] = None, on_unassign: Optional[Callable] = None,
+                 sample_every: int = 0) -> None:
+        """
+        Initializes an Instrumentation object.
+
+        Args:
+            on_assign (callable, optional): Called with (variable, value, depth) after each successful assignment.
+                Defaults to None.
+            on_unassign (callable, optional): Called with (variable, depth) after each undone assignment.
+                Defaults to None.
+            sample_every (int, optional): The number of nodes between two trace samples, 0 disables sampling.
+                Defaults to 0.
+        """
+        self.nodes = 0
+        self.backtracks = 0
+        self.consistency_checks = 0
+        self.arc_revisions = 0
+        self.pruned_values = 0
+        self.timers = {'search': 0.0, 'select': 0.0, 'order': 0.0, 'consistency': 0.0, 'propagation': 0.0}
+        self.on_assign = on_assign
+        self.on_unassign = on_unassign
+        self.sample_every = sample_every
+        self.samples = []
+        self.started = None
+        self.search_depth = 0
+        self.assigning = False
+        # The (object, method names) pairs wrapped by attach
+        self.attached = []
+
+    def __getstate__(self) -> Dict:
+        # Wrapped objects and callbacks stay in this process, a pickled copy only carries the measurements
+        state = dict(self.__dict__)
+        state.update(attached=[], on_assign=None, on_unassign=None)
+        return state
+
+    def attach(self, solver) -> None:
+        """
+        Wraps the methods of a Solver and of its CSP to measure them. A CSP already attached is left as it is.
+
+        Args:
+            solver (Solver): The solver to instrument.
+
+        Returns:
+            None
+        """
+        names = ['backtrack_solver', 'assign_value', 'unassign_value', 'arc_reduce', 'bitset_backtrack']
+        names += [name for name in self.PHASES if name != 'is_consistent']
+        self.wrap(solver, names)
+        if 'is_consistent' not in vars(solver.csp):
+            self.wrap(solver.csp, ['is_consistent', 'remove_value'])
+
+    def detach(self) -> None:
+        """
+        Restores the methods of every instrumented object.
+
+        Returns:
+            None
+        """
+        for obj, names in self.attached:
+            for name in names:
+                vars(obj).pop(name, None)
+        self.attached = []
+
+    def wrap(self, obj, names: List[str]) -> None:
+        """
+        Replaces methods of an object by measuring wrappers, on the instance only.
+
+        Args:
+            obj: The Solver or CSP.
+            names (list): The method names.
+
+        Returns:
+            None
+        """
+        for name in names:
+            setattr(obj, name, getattr(self, 'wrap_' + name, self.wrap_phase)(getattr(obj, name), name, obj))
+        self.attached.append((obj, names))
+
+    def wrap_phase(self, method: Callable, name: str, obj) -> Callable:
+        """
+        Times a phase method, and counts consistency checks.
+        """
+        timers = self.timers
+        phase = self.PHASES[name]
+        clock = time.perf_counter
+
+        def timed(*args, **kwargs):
+            started = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                timers[phase] += clock() - started
+
+        if name == 'is_consistent':
+            def counted(*args, **kwargs):
+                self.consistency_checks += 1
+                return timed(*args, **kwargs)
+            return counted
+        return timed
+
+    def wrap_backtrack_solver(self, method: Callable, name: str, obj) -> Callable:
+        """
+        Times the outermost search.
+        """
+        def search(*args, **kwargs):
+            # The recursive search and the Solvers of components run inside the outermost call, timed once
+            if self.search_depth:
+                return method(*args, **kwargs)
+            self.search_depth += 1
+            self.started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.timers['search'] += time.perf_counter() - self.started
+                self.search_depth -= 1
+        return search
+
+    def wrap_assign_value(self, method: Callable, name: str, solver) -> Callable:
+        """
+        Counts nodes, samples the path and calls on_assign.
+        """
+        def assign_value(variable, value):
+            self.nodes += 1
+            if self.sample_every and self.nodes % self.sample_every == 0:
+                self.samples.append((time.perf_counter() - (self.started or 0.0),
+                                     [path_variable for path_variable, _ in solver.path] + [variable]))
+            # Assignments undone by their own propagation were never announced to on_assign
+            self.assigning = True
+            try:
+                assigned = method(variable, value)
+            finally:
+                self.assigning = False
+            if assigned and self.on_assign is not None:
+                self.on_assign(variable, value, len(solver.path))
+            return assigned
+        return assign_value
+
+    def wrap_unassign_value(self, method: Callable, name: str, solver) -> Callable:
+        """
+        Counts backtracks and calls on_unassign.
+        """
+        def unassign_value(variable, *args, **kwargs):
+            self.backtracks += 1
+            depth = len(solver.path)
+            method(variable, *args, **kwargs)
+            if self.on_unassign is not None and not self.assigning:
+                self.on_unassign(variable, depth)
+        return unassign_value
+
+    def wrap_arc_reduce(self, method: Callable, name: str, obj) -> Callable:
+        """
+        Counts arc revisions.
+        """
+        def arc_reduce(*args):
+            self.arc_revisions += 1
+            return method(*args)
+        return arc_reduce
+
+    def wrap_remove_value(self, method: Callable, name: str, obj) -> Callable:
+        """
+        Counts pruned values.
+        """
+        def remove_value(*args):
+            self.pruned_values += 1
+            return method(*args)
+        return remove_value
+
+    def wrap_bitset_backtrack(self, method: Callable, name: str, solver) -> Callable:
+        """
+        Counts the nodes and backtracks of the compiled search.
+        """
+        def bitset_backtrack(compiled, domains, order, first, trail):
+            if first:
+                return method(compiled, domains, order, first, trail)
+            # The compiled search counts its assignments on the CSP, every one not in the solution was undone
+            assignments_number = solver.csp.assignments_number
+            found = method(compiled, domains, order, first, trail)
+            nodes = solver.csp.assignments_number - assignments_number
+            self.nodes += nodes
+            self.backtracks += nodes - (len(order) if found else 0)
+            return found
+        return bitset_backtrack
+
+    def counters(self) -> Dict:
+        """
+        Returns the counters and the timers.
+
+        Returns:
+            Dict: The counters by name and the 'timers' dictionary.
+        """
+        return {'nodes': self.nodes, 'backtracks': self.backtracks, 'consistency_checks': self.consistency_checks,
+                'arc_revisions': self.arc_revisions, 'pruned_values': self.pruned_values,
+                'timers': dict(self.timers)}
+
+    def dump_json(self, path: str) -> None:
+        """
+        Writes the counters, the timers and the sampled trace as JSON.
+
+        Args:
+            path (str): The output file.
+
+        Returns:
+            None
+        """
+        data = self.counters()
+        data['samples'] = [{'seconds': seconds, 'path': path_variables} for seconds, path_variables in self.samples]
+        with open(path, 'w') as file:
+            json.dump(data, file, indent=2)
+
+    def folded_stacks(self) -> List[str]:
+        """
+        Aggregates the sampled paths as folded stacks, the input format of flamegraph.pl and speedscope: one line per
+        distinct path, the variables from the root separated by semicolons, then the number of samples.
+
+        Returns:
+            List[str]: The folded stack lines.
+        """
+        counts = Counter(';'.join(['search'] + [str(variable) for variable in path_variables])
+                         for _, path_variables in self.samples)
+        return [f'{stack} {count}' for stack, count in sorted(counts.items())]
+
+    def dump_folded(self, path: str) -> None:
+        """
+        Writes the sampled trace as folded stacks, see folded_stacks.
+
+        Args:
+            path (str): The output file.
+
+        Returns:
+            None
+        """
+        with open(path, 'w') as file:
+            file.writelines(line + '\n' for line in self.folded_stacks())
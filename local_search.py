@@ -0,0 +1,203 @@
+import random
+import time
+from typing import Dict, Optional, Tuple
+from CSP import CSP
+from graph_coloring import smallest_last_order
+
+
+class MinConflicts(object):
+    """
+    Colors a map CSP by local search instead of backtracking, with a predictable time limit.
+
+    Every variable always has a value, starting from a greedy assignment in smallest-last order. Each step takes a
+    random conflicting variable and moves it to the value with the fewest conflicting neighbors, avoiding the values
+    it recently left (tabu search) unless the move beats the best assignment so far, and sometimes moving to a random
+    value instead (noise). When the best assignment has not improved for restart_after steps, a random part of the
+    variables is recolored. The number of neighbors of each variable holding each value is kept up to date, so a step
+    costs O(values + degree) and the search scales to maps where exact search never finishes. A search that runs out
+    of time or steps returns the best assignment found with its number of conflicts, which proves nothing about the
+    existence of a solution.
+
+    Attributes:
+        csp (CSP): The Constraint Satisfaction Problem, whose constraints must all be not_equal.
+        seed (int): The seed of the random generator.
+        max_iterations (int): The largest number of steps, or None for no limit.
+        time_limit (float): The largest search time in seconds, or None for no limit.
+        tabu_tenure (int): The minimum number of steps a variable may not go back to the value it left.
+        noise (float): The probability of a random move.
+        restart_after (int): The number of steps without a better assignment before a perturbation.
+        perturbation (float): The fraction of the variables recolored by a perturbation.
+        cancel_token: An object whose is_set() method returns True once the search must stop, or None.
+        solution (dict): The best assignment found.
+        conflicts (int): The number of violated constraints of the best assignment, 0 for a solution.
+        iterations (int): The number of steps made.
+        restarts (int): The number of perturbations made.
+        seconds (float): The search time.
+    """
+
+    def __init__(self, csp: CSP, seed: int = 0, max_iterations: Optional[int] = None,
+                 time_limit: Optional[float] = 10.0, tabu_tenure: int = 10, noise: float = 0.02,
+                 restart_after: int = 10000, perturbation: float = 0.05, cancel_token=None) -> None:
+        """
+        Initializes a MinConflicts object.
+
+        Args:
+            csp (CSP): The Constraint Satisfaction Problem, whose constraints must all be not_equal.
+            seed (int, optional): The seed of the random generator. Defaults to 0.
+            max_iterations (int, optional): The largest number of steps, or None for no limit. Defaults to None.
+            time_limit (float, optional): The largest search time in seconds, or None for no limit. Defaults to 10.
+            tabu_tenure (int, optional): The minimum number of steps a variable may not go back to the value it left,
+                a random number of steps up to the tenure is added. Defaults to 10.
+            noise (float, optional): The probability of moving to a random value. Defaults to 0.02.
+            restart_after (int, optional): The number of steps without a better assignment before recoloring part of
+                the variables. Defaults to 10000.
+            perturbation (float, optional): The fraction of the variables recolored. Defaults to 0.05.
+            cancel_token (optional): An object whose is_set() method returns True once the search must stop, such as
+                a threading.Event set from another thread. Defaults to None.
+        """
+        if max_iterations is None and time_limit is None and cancel_token is None:
+            raise ValueError("A local search needs max_iterations, time_limit or cancel_token")
+        self.csp = csp
+        self.seed = seed
+        self.max_iterations = max_iterations
+        self.time_limit = time_limit
+        self.tabu_tenure = tabu_tenure
+        self.noise = noise
+        self.restart_after = restart_after
+        self.perturbation = perturbation
+        self.cancel_token = cancel_token
+        self.solution = None
+        self.conflicts = None
+        self.iterations = 0
+        self.restarts = 0
+        self.seconds = 0.0
+
+    def run(self) -> Tuple[Dict, int]:
+        """
+        Runs the local search. A solution is written back to the CSP like a solution found by the Solver.
+
+        Returns:
+            Tuple[Dict, int]: The best assignment found and its number of conflicts, 0 if it is a solution.
+
+        Raises:
+            ValueError: If a constraint is not not_equal, see CSP.compile.
+        """
+        started = time.perf_counter()
+        compiled = self.csp.compile()
+        neighbors = compiled.neighbors
+        count = len(compiled.names)
+        generator = random.Random(self.seed)
+        allowed = [[bit for bit in range(len(compiled.values)) if mask >> bit & 1] for mask in compiled.domains]
+        if any(not values for values in allowed):
+            raise ValueError("A variable has an empty domain")
+
+        # Greedy start in smallest-last order: each variable takes the value fewest of its already colored neighbors
+        # hold, ties at random
+        colors = [-1] * count
+        gamma = [[0] * len(compiled.values) for _ in range(count)]
+        for x in smallest_last_order({x: neighbors[x] for x in range(count)}):
+            row = gamma[x]
+            fewest = min(row[value] for value in allowed[x])
+            colors[x] = generator.choice([value for value in allowed[x] if row[value] == fewest])
+            for y in neighbors[x]:
+                gamma[y][colors[x]] += 1
+        # The conflicting variables as a list with the position of each, for O(1) updates and random picks
+        conflicted = []
+        position = [-1] * count
+        for x in range(count):
+            if gamma[x][colors[x]]:
+                position[x] = len(conflicted)
+                conflicted.append(x)
+        total = sum(gamma[x][colors[x]] for x in range(count)) // 2
+
+        def update(x):
+            if gamma[x][colors[x]]:
+                if position[x] < 0:
+                    position[x] = len(conflicted)
+                    conflicted.append(x)
+            elif position[x] >= 0:
+                last = conflicted.pop()
+                if last != x:
+                    conflicted[position[x]] = last
+                    position[last] = position[x]
+                position[x] = -1
+
+        def move(x, color):
+            old = colors[x]
+            colors[x] = color
+            for y in neighbors[x]:
+                gamma[y][old] -= 1
+                gamma[y][color] += 1
+                update(y)
+            update(x)
+            changed[x] = color
+
+        best = list(colors)
+        best_total = total
+        # The variables changed since the best assignment, applied to it when a better one is found
+        changed = {}
+        tabu = {}
+        stalled = 0
+        iteration = 0
+        while total and (self.max_iterations is None or iteration < self.max_iterations):
+            if iteration & 1023 == 0 and (
+                    self.time_limit is not None and time.perf_counter() - started >= self.time_limit
+                    or self.cancel_token is not None and self.cancel_token.is_set()):
+                break
+            iteration += 1
+            stalled += 1
+            x = conflicted[generator.randrange(len(conflicted))]
+            values = allowed[x]
+            if len(values) == 1:
+                continue
+            current = colors[x]
+            row = gamma[x]
+            if generator.random() < self.noise:
+                color = generator.choice(values)
+                while color == current:
+                    color = generator.choice(values)
+            else:
+                # Staying is a candidate too, moving only on a tie (sideways move) or an improvement
+                color, best_conflicts, ties = current, row[current], 0
+                for value in values:
+                    if value == current:
+                        continue
+                    conflicts = row[value]
+                    # A tabu move is only allowed when it beats the best assignment (aspiration)
+                    if tabu.get((x, value), 0) > iteration and total + conflicts - row[current] >= best_total:
+                        continue
+                    if conflicts < best_conflicts:
+                        color, best_conflicts, ties = value, conflicts, 1
+                    elif conflicts == best_conflicts:
+                        ties += 1
+                        if generator.randrange(ties) == 0:
+                            color = value
+                if color == current:
+                    continue
+            total += row[color] - row[current]
+            tabu[(x, current)] = iteration + self.tabu_tenure + generator.randrange(self.tabu_tenure + 1)
+            move(x, color)
+
+            if total < best_total:
+                for y, color in changed.items():
+                    best[y] = color
+                changed.clear()
+                best_total = total
+                stalled = 0
+            elif stalled >= self.restart_after:
+                # Recolor part of the conflicting variables at random to leave the local minimum
+                for y in generator.sample(conflicted, max(1, int(self.perturbation * len(conflicted)))):
+                    color = generator.choice(allowed[y])
+                    total += gamma[y][color] - gamma[y][colors[y]]
+                    move(y, color)
+                tabu.clear()
+                stalled = 0
+                self.restarts += 1
+
+        self.iterations = iteration
+        self.conflicts = best_total
+        self.solution = {name: compiled.values[best[i]] for i, name in enumerate(compiled.names)}
+        if best_total == 0:
+            self.csp.load_solution(self.solution)
+        self.seconds = time.perf_counter() - started
+        return self.solution, self.conflicts
@@ -1,10 +1,15 @@
 import argparse
+import json
+import sys
 from enum import Enum
-from CSP import CSP
-from Solver import Solver
+from functools import partial
+from Solver import UNSATISFIABLE, Solver
+from instrumentation import Instrumentation
+from ChromaticSearch import ChromaticSearch
+from batch import build_csp, check_engine, generate_palette, run_batch
+from graph_coloring import HEURISTIC_ENGINES, heuristic_solver
+from local_search import MinConflicts
 from map_generator import generate_borders_by_continent
-from graphics import draw
-import random
 
 class Continent(Enum):
     asia = "Asia"
@@ -16,6 +21,45 @@ class Continent(Enum):
         return self.value
     
 
+def report(instrumentation, trace, file=None):
+    if instrumentation is None:
+        return
+    print(json.dumps(instrumentation.counters(), indent=2), file=file)
+    if trace and trace.endswith('.json'):
+        instrumentation.dump_json(trace)
+    elif trace:
+        instrumentation.dump_folded(trace)
+
+
+def remember(cache, key, colors, result, chromatic=None):
+    if cache is None or result is None:
+        return
+    color_index = {color: i for i, color in enumerate(colors)}
+    cache.put(key, len(colors), {region: color_index[color] for region, color in result.items()}, chromatic)
+
+
+def emit(args, colors, result, assignments_number, **details):
+    if args.format == "text":
+        print("solution :", result)
+        return
+    color_index = {color: i for i, color in enumerate(colors)}
+    summary = {'map': str(args.map), 'ND': args.Neighbourhood_distance, 'engine': args.engine,
+               'solved': result is not None, 'colors': len(set(result.values())) if result is not None else None,
+               'assignments': assignments_number,
+               'solution': {region: color_index[color] for region, color in result.items()}
+               if result is not None else None}
+    summary.update(details)
+    print(json.dumps(summary, indent=2))
+
+
+def render(args, result, assignments_number):
+    if args.no_draw:
+        return
+    # Imported here so that a headless run does not load geopandas and matplotlib
+    from graphics import draw
+    draw(solution=result, continent=str(args.map), assignments_number=assignments_number)
+
+
 def main():
     parser = argparse.ArgumentParser(
         prog="Map Coloring",
@@ -41,12 +85,62 @@ def main():
         action="store_true",
         help="Enable minimum remaining values (MRV) as a order-type optimizer"
     )
+    parser.add_argument(
+        "-tie",
+        "--tie-breaker",
+        choices=["degree", "dsatur"],
+        help="Break MRV ties by the number of unassigned neighbors (degree) or by the number of distinct colors among assigned neighbors (dsatur)"
+    )
     parser.add_argument(
         "-ac3",
         "--arc-consistency",
         action="store_true",
         help="Enable arc consistency as a mechanism to eliminate the domain of variables achieving an optimized solution"
     )
+    parser.add_argument(
+        "-mac",
+        "--mac",
+        action="store_true",
+        help="Enable maintaining arc consistency (MAC), propagating only from the variable just assigned after each assignment"
+    )
+    parser.add_argument(
+        "-it",
+        "--iterative",
+        action="store_true",
+        help="Search with an explicit stack instead of recursion, for maps with more regions than the recursion limit"
+    )
+    parser.add_argument(
+        "-cc",
+        "--components",
+        action="store_true",
+        help="Solve each connected component of the map (e.g. islands) on its own"
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="The number of processes solving connected components, with a default of 1"
+    )
+    parser.add_argument(
+        "-cbj",
+        "--backjumping",
+        action="store_true",
+        help="Jump back to the latest assignment responsible for a dead end instead of the previous one (conflict-directed backjumping)"
+    )
+    parser.add_argument(
+        "-ng",
+        "--nogood-capacity",
+        type=int,
+        default=0,
+        help="The number of nogoods learned from dead ends kept while backjumping, the least recently used are evicted first, with a default of 0 (no learning)"
+    )
+    parser.add_argument(
+        "-sym",
+        "--symmetry-breaking",
+        action="store_true",
+        help="Explore the permutations of the interchangeable colors once: a region may only take a color already used or the first unused one"
+    )
     parser.add_argument(
         "-ND",
         "--Neighbourhood-distance",
@@ -54,55 +148,294 @@ def main():
         default=1,
         help="The value determines the threshold for neighboring regions' similarity in color, with a default of 1 ensuring adjacent regions have distinct colors; increasing it, for instance to 2, extends this dissimilarity to the neighbors of neighbors."
     )
+    parser.add_argument(
+        "-bits",
+        "--compiled",
+        action="store_true",
+        help="Search on the compiled form of the problem, with integer variables and bitmask domains"
+    )
+    parser.add_argument(
+        "-e",
+        "--engine",
+        choices=["backtracking"] + list(HEURISTIC_ENGINES) + ["min_conflicts", "portfolio", "parallel"],
+        default="backtracking",
+        help="Color with exact backtracking (default), quickly with a heuristic engine (greedy largest first, greedy smallest last, DSATUR or RLF), by local search (min_conflicts) within a time limit per color count, with a portfolio of configurations running in parallel that keeps the first answer (portfolio), or with the search tree split over -w processes (parallel); with -chr, the heuristic engine gives the upper bound"
+    )
+    parser.add_argument(
+        "-tl",
+        "--time-limit",
+        type=float,
+        help="The time limit in seconds of each attempt with a number of colors; an exact search that reaches it tries one more color. The default is no limit, and 10 for min_conflicts"
+    )
+    parser.add_argument(
+        "-nl",
+        "--node-limit",
+        type=int,
+        help="The largest number of assignments of each exact search attempt, with a default of no limit"
+    )
+    parser.add_argument(
+        "-seed",
+        "--seed",
+        type=int,
+        default=0,
+        help="The seed of the min_conflicts local search, with a default of 0"
+    )
+    parser.add_argument(
+        "-chr",
+        "--chromatic",
+        choices=["descend", "binary"],
+        help="Find the chromatic number between a DSATUR upper bound and a clique lower bound, either stepping down from the upper bound or binary searching between the bounds"
+    )
+    parser.add_argument(
+        "-b",
+        "--batch",
+        nargs="+",
+        metavar="MAP",
+        help="Color several maps in one process and print a JSON summary instead of drawing; any continent of the dataset, or World for all of them together"
+    )
+    parser.add_argument(
+        "-sweep",
+        "--sweep",
+        nargs="+",
+        type=int,
+        metavar="ND",
+        help="The neighbourhood distances to color every batch map with, with a default of -ND"
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="Write the batch summary to this file instead of printing it"
+    )
+    parser.add_argument(
+        "-sol",
+        "--solutions",
+        action="store_true",
+        help="Include the solutions, as palette indices, in the batch summary"
+    )
+    parser.add_argument(
+        "-cache",
+        "--cache",
+        metavar="PATH",
+        help="Keep the colorings in this SQLite file: a map already colored is answered from it, and a map with a similar cached map starts the search from its coloring"
+    )
+    parser.add_argument(
+        "-cache-size",
+        "--cache-size",
+        type=int,
+        default=256,
+        help="The largest number of maps kept in the cache, the least recently used are evicted first, with a default of 256"
+    )
+    parser.add_argument(
+        "-nodraw",
+        "--no-draw",
+        action="store_true",
+        help="Do not draw the colored map, which skips loading geopandas and matplotlib"
+    )
+    parser.add_argument(
+        "-fmt",
+        "--format",
+        choices=["text", "json"],
+        default="text",
+        help="Print the result as text (default) or as one JSON document with the solution as palette indices, the progress then going to stderr"
+    )
+    parser.add_argument(
+        "-stats",
+        "--stats",
+        action="store_true",
+        help="Print the search counters (nodes, backtracks, consistency checks, arc revisions, pruned values) and the time spent in each phase"
+    )
+    parser.add_argument(
+        "-trace",
+        "--trace",
+        help="Sample the search path every 100 nodes and write the counters and samples to this file, as JSON if it ends with .json and as folded stacks for flamegraph tools otherwise"
+    )
     args = parser.parse_args()
+    instrumentation = Instrumentation(sample_every=100 if args.trace else 0) if args.stats or args.trace else None
+
+    if args.batch:
+        try:
+            check_engine(args.engine, args.chromatic)
+        except ValueError as error:
+            parser.error(str(error))
+        solver_options = dict(domain_heuristics=args.lcv,
+                              variable_heuristics=args.mrv,
+                              AC_3=args.arc_consistency,
+                              compiled=args.compiled,
+                              MAC=args.mac,
+                              tie_breaker=args.tie_breaker,
+                              iterative=args.iterative,
+                              decompose=args.components,
+                              backjumping=args.backjumping,
+                              nogood_capacity=args.nogood_capacity,
+                              symmetry_breaking=args.symmetry_breaking)
+        if not args.chromatic:
+            # An attempt of the ChromaticSearch must finish, a failed one proves a lower bound
+            solver_options.update(time_limit=args.time_limit, node_limit=args.node_limit)
+        if args.engine == "min_conflicts":
+            solver_options = dict(seed=args.seed, time_limit=args.time_limit if args.time_limit is not None else 10.0)
+        summary = run_batch(args.batch, args.sweep or [args.Neighbourhood_distance], chromatic=args.chromatic,
+                            engine=args.engine, solver_options=solver_options,
+                            workers=args.workers, include_solutions=args.solutions)
+        if args.output:
+            with open(args.output, 'w') as file:
+                json.dump(summary, file, indent=2)
+        else:
+            print(json.dumps(summary, indent=2))
+        return
+
     borders = generate_borders_by_continent(continent=str(args.map), neighbor_threshold=args.Neighbourhood_distance)
-    # print(borders)
-    random.seed(10)
-    def generate_color():
-        r = random.random()
-        g = random.random()
-        b = random.random()
-        return (r, g, b)
-
-    colors = [generate_color() for _ in range(100)]
+    colors = generate_palette()
+    # With JSON output, stdout only holds the result
+    stream = sys.stdout if args.format == "text" else sys.stderr
+    log = partial(print, file=stream)
+
+    cache, key = None, None
+    if args.cache:
+        from solution_cache import SolutionCache, graph_fingerprint
+        cache = SolutionCache(args.cache, max_entries=args.cache_size)
+        key = graph_fingerprint(borders, len(colors))
+    cached = cache.get(key) if cache is not None else None
+    if cached is not None and (cached.chromatic is not None or not args.chromatic):
+        result = {region: colors[i] for region, i in cached.solution.items()}
+        log(f'Cached solution with {cached.colors} colors, chromatic number {cached.chromatic}')
+        emit(args, colors, result, 0, chromatic=cached.chromatic, cached=True)
+
+        render(args, result, 0)
+        return
+    # A map that is not cached starts from the coloring of the cached map sharing the most regions with it
+    warm_start = cache.similar(borders, len(colors)) if cache is not None else None
+
+    if args.chromatic:
+        search = ChromaticSearch(borders, colors, domain_heuristics=args.lcv,
+                                 variable_heuristics=args.mrv,
+                                 AC_3=args.arc_consistency,
+                                 strategy=args.chromatic,
+                                 upper_bound_engine=args.engine if args.engine in HEURISTIC_ENGINES else 'dsatur',
+                                 compiled=args.compiled,
+                                 MAC=args.mac,
+                                 tie_breaker=args.tie_breaker,
+                                 iterative=args.iterative,
+                                 workers=args.workers,
+                                 backjumping=args.backjumping,
+                                 nogood_capacity=args.nogood_capacity,
+                                 symmetry_breaking=args.symmetry_breaking,
+                                 instrumentation=instrumentation)
+        colors_count, result = search.run()
+        for attempt_colors, seconds, solved in search.timings:
+            log(f'{attempt_colors} colors: {"solved" if solved else "failed"} in {seconds:.3f}s')
+        log("Chromatic Number :", colors_count)
+        log("Assignment Number :", search.assignments_number)
+        emit(args, colors, result, search.assignments_number, chromatic=colors_count)
+        report(instrumentation, args.trace, stream)
+        remember(cache, key, colors, result, chromatic=colors_count)
+
+        render(args, result, search.assignments_number)
+        return
+
+    if args.engine in HEURISTIC_ENGINES:
+        csp = build_csp(borders, colors)
+        result = heuristic_solver(csp, args.engine)
+        log("Colors :", len(set(result.values())))
+        emit(args, colors, result, 0)
+        remember(cache, key, colors, result)
+
+        render(args, result, 0)
+        return
+
+    if args.engine == "min_conflicts":
+        conflicts = None
+        colors_count = 4
+        while conflicts != 0 and colors_count <= len(colors):
+            csp = build_csp(borders, colors[:colors_count])
+            search = MinConflicts(csp, seed=args.seed,
+                                  time_limit=args.time_limit if args.time_limit is not None else 10.0)
+            result, conflicts = search.run()
+            log(f'{colors_count} colors: {conflicts} conflicts after {search.iterations} steps in {search.seconds:.3f}s')
+            colors_count += 1
+        emit(args, colors, result, search.iterations, solved=conflicts == 0, conflicts=conflicts)
+        remember(cache, key, colors, result if conflicts == 0 else None)
+
+        render(args, result, search.iterations)
+        return
+
+    if args.engine in ("portfolio", "parallel"):
+        # Imported here, the process pool machinery is only needed by these engines
+        from portfolio import Portfolio
+        from parallel_search import ParallelSearch
+        result = None
+        previous_status = None
+        colors_count = 4
+        while result is None and colors_count <= len(colors):
+            csp = build_csp(borders, colors[:colors_count])
+            workers = args.workers if args.workers > 1 else None
+            if args.engine == "portfolio":
+                portfolio = Portfolio(csp, workers=workers, time_limit=args.time_limit)
+                search = portfolio.run()
+                winner = portfolio.configurations[portfolio.winner] if portfolio.winner is not None else None
+                log(f'{colors_count} colors: {search.status} in {portfolio.seconds:.3f}s by {winner}')
+            else:
+                parallel = ParallelSearch(csp, workers=workers, time_limit=args.time_limit,
+                                          domain_heuristics=args.lcv,
+                                          variable_heuristics=args.mrv,
+                                          AC_3=args.arc_consistency,
+                                          compiled=args.compiled,
+                                          MAC=args.mac,
+                                          tie_breaker=args.tie_breaker,
+                                          backjumping=args.backjumping,
+                                          nogood_capacity=args.nogood_capacity)
+                search = parallel.run()
+                log(f'{colors_count} colors: {search.status} after {search.nodes} assignments in '
+                      f'{parallel.subproblems} subproblems in {parallel.seconds:.3f}s')
+            proven = colors_count > 4 and previous_status == UNSATISFIABLE
+            previous_status = search.status
+            result = search.solution
+            colors_count += 1
+        emit(args, colors, result, search.nodes, chromatic=colors_count - 1 if proven else None)
+        remember(cache, key, colors, result, chromatic=colors_count - 1 if proven else None)
+
+        render(args, result, search.nodes)
+        return
+
     result = None
+    previous_status = None
     colors_count = 4
-    while(result==None):
-        print(f'Algorithm starts with {colors_count} colors')
+    while result is None and colors_count <= len(colors):
+        log(f'Algorithm starts with {colors_count} colors')
         color_list = colors[:colors_count]
-        csp = CSP()
-        for country, neighbors in borders.items():
-            csp.add_variable(country, color_list)
-            for neighbor in neighbors:
-                csp.add_constraint(lambda a, b: a != b, [country, neighbor])
+        csp = build_csp(borders, color_list)
 
         solver = Solver(csp, domain_heuristics=args.lcv, 
                         variable_heuristics=args.mrv, 
-                        AC_3=args.arc_consistency)
-        result = solver.backtrack_solver()
+                        AC_3=args.arc_consistency,
+                        compiled=args.compiled,
+                        MAC=args.mac,
+                        tie_breaker=args.tie_breaker,
+                        iterative=args.iterative,
+                        decompose=args.components,
+                        workers=args.workers,
+                        backjumping=args.backjumping,
+                        nogood_capacity=args.nogood_capacity,
+                        symmetry_breaking=args.symmetry_breaking,
+                        time_limit=args.time_limit,
+                        node_limit=args.node_limit,
+                        instrumentation=instrumentation)
+        if warm_start is not None:
+            search = solver.solve({region: colors[i] for region, i in warm_start.items()})
+        else:
+            search = solver.solve()
+        log(f'{colors_count} colors: {search.status} after {search.nodes} assignments in {search.seconds:.3f}s')
+        # The number of colors is the chromatic number once one color less is proven not to be enough
+        proven = colors_count > 4 and previous_status == UNSATISFIABLE
+        previous_status = search.status
+        result = search.solution
         colors_count += 1
 
+    log("Assignment Number :",solver.csp.assignments_number)
+    emit(args, colors, result, solver.csp.assignments_number, chromatic=colors_count - 1 if proven else None)
+    report(instrumentation, args.trace, stream)
+    remember(cache, key, colors, result, chromatic=colors_count - 1 if proven else None)
 
-    # print("$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$ constraints $$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$")
-    # print(csp.constraints)
-
-    # print("\n$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$ variables $$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$")
-    # csp.add_variable('A', ['red', 'green', 'blue'])
-    # csp.add_variable('B', ['red', 'green'])
-    # csp.add_variable('C', ['red', 'green', 'blue'])
-    # csp.add_constraint(lambda a, b: a != b, ['A', 'B'])
-    # csp.add_constraint(lambda a, c: a != c, ['A', 'C'])
-    # csp.add_constraint(lambda b, c: b != c, ['B', 'C'])
-
-
-    # solver = Solver(csp, domain_heuristics=args.lcv, 
-    #                 variable_heuristics=args.mrv, 
-    #                 AC_3=args.arc_consistency)
-    # result = solver.backtrack_solver()
-    print("Assignment Number :",solver.csp.assignments_number)
-    print("solution :",solver.csp.assignments)
-
-    draw(solution=result, continent=str(args.map), assignments_number=solver.csp.assignments_number)
+    render(args, result, solver.csp.assignments_number)
     
 
 if __name__ == '__main__':
@@ -1,12 +1,58 @@
-import pandas as pd
-from shapely import wkt
-from typing import Dict, List
+from typing import Dict, Iterable, List, Set
+from dataset import continent_adjacency, continents
+
+def expand_neighborhoods(adjacency: Dict[str, Iterable[str]], neighbor_threshold: int = 1) -> Dict[str, Set[str]]:
+    """
+    Computes, for every region of the adjacency, the regions within neighbor_threshold hops. Regions that only appear
+    as neighbors (e.g. countries of another continent) are reached but never expanded, like a border is crossed but
+    the foreign country's own borders are unknown.
+
+    The adjacency is indexed once and each neighborhood is a breadth-first search over region indices, stopped after
+    neighbor_threshold hops, so a region costs time linear in its own neighborhood and the result is the exact graph
+    distance whatever the iteration order.
+
+    Args:
+        adjacency (Dict[str, Iterable[str]]): A dictionary mapping each region to its direct neighbors.
+        neighbor_threshold (int): The largest distance, in hops, of a neighbor. Default is 1.
+
+    Returns:
+        Dict[str, Set[str]]: A dictionary mapping each region to the regions within neighbor_threshold hops, itself
+                             excluded.
+    """
+    names = list(adjacency)
+    index = {name: i for i, name in enumerate(names)}
+    for neighbors in adjacency.values():
+        for neighbor in neighbors:
+            if neighbor not in index:
+                index[neighbor] = len(names)
+                names.append(neighbor)
+    # Foreign regions have no row of their own, they are reached but never expanded
+    rows = [[index[neighbor] for neighbor in adjacency[name]] for name in adjacency]
+    rows += [[] for _ in range(len(names) - len(rows))]
+
+    neighborhoods = {}
+    for i, name in enumerate(adjacency):
+        reached = {i}
+        frontier = [i]
+        for _ in range(max(neighbor_threshold, 1)):
+            next_frontier = []
+            for j in frontier:
+                for k in rows[j]:
+                    if k not in reached:
+                        reached.add(k)
+                        next_frontier.append(k)
+            frontier = next_frontier
+            if not frontier:
+                break
+        reached.discard(i)
+        neighborhoods[name] = {names[j] for j in reached}
+    return neighborhoods
 
 def generate_borders_by_continent(continent: str, neighbor_threshold: int = 1) -> Dict[str, List[str]]:
     """
     Generates a dictionary mapping each country in the specified continent to a list of its neighboring countries'
-    ISO A3 codes. The function loads geographic and neighbor data from a CSV file, filters it by the specified
-    continent, and then parses each country's neighbors.
+    ISO A3 codes. The function loads the neighbor data of the specified continent from the cached dataset and expands
+    it to the requested distance.
 
     Args:
         continent (str): The name of the continent for which to generate borders and neighbors.
@@ -16,22 +62,21 @@ def generate_borders_by_continent(continent: str, neighbor_threshold: int = 1) -
         Dict[str, List[str]]: A dictionary where keys are country ISO A3 codes and values are lists of ISO A3 codes
                                of neighboring countries within the same continent.
     """
-    neighbors_df = pd.read_csv('./countries_dataset.csv')
-    neighbors_df['geometry'] = neighbors_df['geometry'].apply(wkt.loads)
-
-    continent_df = neighbors_df[neighbors_df['continent'] == continent]
+    return generate_borders([continent], neighbor_threshold)
 
-    borders = {}
-    for _, row in continent_df.iterrows():
-        neighbors = set(row['neighbors'].split(', ')) if isinstance(row['neighbors'], str) else set()
-        for k in range(1, neighbor_threshold):
-            for neighbor in list(neighbors):
-                second_neighbors = continent_df[continent_df['iso_a3'] == neighbor]['neighbors'].values
-                if second_neighbors:
-                    second_neighbors = second_neighbors[0].split(', ')
-                    neighbors.update(second_neighbors)
-        neighbors.discard(row['iso_a3'])
-        borders[row['iso_a3']] = neighbors
+def generate_borders(continent_names: List[str], neighbor_threshold: int = 1) -> Dict[str, Set[str]]:
+    """
+    Generates the borders of a map made of several continents, e.g. the whole world. Neighbors are expanded across
+    the continents of the map, and countries of other continents are kept as neighbors without being expanded.
 
+    Args:
+        continent_names (List[str]): The continents of the map, or None for every continent of the dataset.
+        neighbor_threshold (int): The threshold for including neighbors of neighbors. Default is 1.
 
-    return borders
+    Returns:
+        Dict[str, Set[str]]: A dictionary mapping each country ISO A3 code to the ISO A3 codes of its neighbors.
+    """
+    adjacency = {}
+    for continent in continent_names if continent_names is not None else continents():
+        adjacency.update(continent_adjacency(continent))
+    return expand_neighborhoods(adjacency, neighbor_threshold)
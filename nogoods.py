@@ -0,0 +1,79 @@
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Optional
+
+
+class NogoodStore(object):
+    """
+    A bounded store of learned nogoods, i.e. partial assignments known to have no solution.
+
+    Nogoods are indexed by their (variable, value) pairs, so an assignment is only checked against the nogoods that
+    contain it. When the store is full, the least recently added or matched nogood is evicted. A match is a nogood
+    returned by violated, or added again; a membership test does not count as a use.
+
+    Attributes:
+        capacity (int): The largest number of nogoods kept.
+        nogoods (OrderedDict): The nogoods, each a frozenset of (variable, value) pairs, least recently used first.
+        watches (dict): A dictionary that maps each (variable, value) pair to the nogoods containing it.
+        evictions (int): The number of nogoods evicted so far.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        """
+        Initializes a NogoodStore object.
+
+        Args:
+            capacity (int): The largest number of nogoods kept.
+        """
+        self.capacity = capacity
+        self.nogoods = OrderedDict()
+        self.watches = {}
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.nogoods)
+
+    def __contains__(self, nogood: FrozenSet) -> bool:
+        return nogood in self.nogoods
+
+    def add(self, nogood: FrozenSet) -> None:
+        """
+        Adds a nogood, evicting the least recently used one if the store is full.
+
+        Args:
+            nogood (frozenset): The (variable, value) pairs of the failed partial assignment.
+
+        Returns:
+            None
+        """
+        if nogood in self.nogoods:
+            self.nogoods.move_to_end(nogood)
+            return
+        self.nogoods[nogood] = None
+        for literal in nogood:
+            self.watches.setdefault(literal, set()).add(nogood)
+        if len(self.nogoods) > self.capacity:
+            evicted, _ = self.nogoods.popitem(last=False)
+            for literal in evicted:
+                watchers = self.watches[literal]
+                watchers.discard(evicted)
+                if not watchers:
+                    del self.watches[literal]
+            self.evictions += 1
+
+    def violated(self, assignments: Dict, variable: str, value) -> Optional[FrozenSet]:
+        """
+        Finds a nogood that the assignment of a value completes.
+
+        Args:
+            assignments (dict): The current assignments, None for unassigned variables.
+            variable (str): The variable just assigned.
+            value: The value just assigned.
+
+        Returns:
+            Optional[frozenset]: A nogood whose pairs are all assigned, or None.
+        """
+        for nogood in self.watches.get((variable, value), ()):
+            if all(assignments[other] == other_value for other, other_value in nogood if other != variable):
+                self.nogoods.move_to_end(nogood)
+                return nogood
+        return None
@@ -0,0 +1,249 @@
+import multiprocessing
+import os
+import pickle
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+from CSP import CSP
+from Solver import CANCELLED, SOLVED, TIMED_OUT, UNSATISFIABLE, SearchInterrupted, SearchResult, Solver
+
+# A subproblem that used up its node budget, returned with its children instead of an answer
+SPLIT = 'split'
+
+# The state of a worker process, set once by start_worker: the pickled CSP, the Solver options and the token set
+# when the search is over
+worker_state = {}
+
+
+def start_worker(csp_bytes: bytes, options: Dict, cancel_token) -> None:
+    """
+    Keeps the CSP and the Solver options of a ParallelSearch in a worker process, so they are sent once per process
+    instead of once per subproblem.
+
+    Args:
+        csp_bytes (bytes): The pickled CSP, with nothing assigned.
+        options (dict): The Solver keyword arguments.
+        cancel_token (multiprocessing.Event): The token set when a subproblem has a solution.
+
+    Returns:
+        None
+    """
+    worker_state.update(csp_bytes=csp_bytes, options=options, cancel_token=cancel_token)
+
+
+def assign_prefix(csp: CSP, prefix: List[Tuple], options: Dict) -> Optional[Solver]:
+    """
+    Creates a Solver and assigns a partial assignment with it, propagating it as the search would.
+
+    Args:
+        csp (CSP): A CSP with nothing assigned.
+        prefix (list): The (variable, value) pairs to assign, in order.
+        options (dict): The Solver keyword arguments.
+
+    Returns:
+        Optional[Solver]: The Solver, whose path is the prefix, or None if the prefix fails.
+    """
+    solver = Solver(csp, **options)
+    if solver.symmetry_breaking:
+        # The values of the prefix count as used, so the subproblem only tries the first unused value of each class
+        solver.build_value_classes()
+    for variable, value in prefix:
+        if not (csp.is_consistent(variable, value) and solver.assign_value(variable, value)):
+            return None
+    return solver
+
+
+def extend_prefix(csp_bytes: bytes, options: Dict, prefix: List[Tuple], depth: int) -> List[List[Tuple]]:
+    """
+    Enumerates the consistent extensions of a partial assignment by the next depth variables the Solver selects. With
+    symmetry breaking, extensions that only differ by a permutation of interchangeable values are enumerated once.
+
+    Args:
+        csp_bytes (bytes): The pickled CSP, with nothing assigned.
+        options (dict): The Solver keyword arguments.
+        prefix (list): The (variable, value) pairs of the partial assignment.
+        depth (int): The number of variables to add.
+
+    Returns:
+        List[List[Tuple]]: The extended partial assignments. An extension assigns fewer variables only when it is
+                           complete.
+    """
+    csp = pickle.loads(csp_bytes)
+    solver = assign_prefix(csp, prefix, options)
+    extensions = []
+    if solver is None:
+        return extensions
+
+    def extend(remaining):
+        if remaining == 0 or csp.is_complete():
+            extensions.append(list(solver.path))
+            return
+        variable = solver.select_unassigned_variable()
+        for value in list(solver.ordered_domain_value(variable)):
+            if csp.is_consistent(variable, value) and solver.assign_value(variable, value):
+                extend(remaining - 1)
+                solver.unassign_value(variable)
+
+    extend(depth)
+    return extensions
+
+
+def search_subproblem(prefix: List[Tuple], node_limit: int, split_depth: int,
+                      deadline: Optional[float]) -> Tuple[str, object, int]:
+    """
+    Searches the subtree below a partial assignment in a worker process. A subtree larger than the node budget is
+    split into the extensions of the partial assignment by split_depth more variables.
+
+    Args:
+        prefix (list): The (variable, value) pairs of the partial assignment.
+        node_limit (int): The node budget of the subproblem.
+        split_depth (int): The number of variables added by a split.
+        deadline (float, optional): The time.time() at which the whole search stops, or None.
+
+    Returns:
+        Tuple[str, object, int]: The status (SOLVED, UNSATISFIABLE, SPLIT, TIMED_OUT or CANCELLED), the solution for
+                                 SOLVED or the extensions for SPLIT, and the number of nodes searched.
+    """
+    csp_bytes, options, cancel_token = worker_state['csp_bytes'], worker_state['options'], \
+        worker_state['cancel_token']
+    csp = pickle.loads(csp_bytes)
+    time_limit = max(0.0, deadline - time.time()) if deadline is not None else None
+    try:
+        # The compiled search assigns the variables of the prefix again, which does not count towards the budget
+        solver = assign_prefix(csp, prefix, dict(options, node_limit=node_limit + len(prefix), time_limit=time_limit,
+                                                 cancel_token=cancel_token))
+    except SearchInterrupted as interruption:
+        return interruption.status, None, 0
+    if solver is None:
+        return UNSATISFIABLE, None, 0
+    if csp.is_complete():
+        return SOLVED, dict(csp.assignments), 0
+
+    result = solver.solve()
+    if result.status == SOLVED:
+        return SOLVED, result.solution, result.nodes
+    if result.status == TIMED_OUT and (deadline is None or time.time() < deadline):
+        return SPLIT, extend_prefix(csp_bytes, options, prefix, split_depth), result.nodes
+    return result.status, None, result.nodes
+
+
+class ParallelSearch(object):
+    """
+    Searches a CSP exhaustively on several processes by splitting the top of the search tree.
+
+    The partial assignments of the first variables the Solver selects are enumerated, with symmetry breaking so that
+    permutations of interchangeable colors are enumerated once, until there are about subproblems_per_worker of them
+    per worker. Each one is an independent subproblem, and the subproblems are handed out one at a time to whichever
+    worker is idle. A subproblem that exceeds its node budget is split into the extensions of its partial assignment
+    by split_depth more variables, which go back to the queue, so a few hard subtrees never keep one worker busy while
+    the others are idle. The search stops at the first solution; proving that there is none explores every subtree,
+    which is where the workers pay off. The constraints must be picklable, such as not_equal.
+
+    Attributes:
+        csp (CSP): The Constraint Satisfaction Problem.
+        workers (int): The number of processes.
+        time_limit (float): The largest search time in seconds, or None for no limit.
+        node_limit (int): The node budget of a subproblem before it is split.
+        split_depth (int): The number of variables added by a split.
+        subproblems_per_worker (int): The number of initial subproblems per worker.
+        solver_options (dict): The Solver keyword arguments, symmetry_breaking defaults to True.
+        subproblems (int): The number of subproblems searched, splits included.
+        splits (int): The number of subproblems split.
+        seconds (float): The search time.
+    """
+
+    def __init__(self, csp: CSP, workers: Optional[int] = None, time_limit: Optional[float] = None,
+                 node_limit: int = 20000, split_depth: int = 2, subproblems_per_worker: int = 8,
+                 **solver_options) -> None:
+        """
+        Initializes a ParallelSearch object.
+
+        Args:
+            csp (CSP): The Constraint Satisfaction Problem, with nothing assigned.
+            workers (int, optional): The number of processes. Defaults to the number of CPUs.
+            time_limit (float, optional): The largest search time in seconds. Defaults to None, i.e. no limit.
+            node_limit (int, optional): The node budget of a subproblem before it is split. Defaults to 20000.
+            split_depth (int, optional): The number of variables added by a split. Defaults to 2.
+            subproblems_per_worker (int, optional): The number of initial subproblems per worker. Defaults to 8.
+            **solver_options: Keyword arguments passed to every Solver, e.g. variable_heuristics or MAC.
+        """
+        self.csp = csp
+        self.workers = workers or os.cpu_count() or 1
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.split_depth = split_depth
+        self.subproblems_per_worker = subproblems_per_worker
+        self.solver_options = dict(solver_options)
+        self.solver_options.setdefault('symmetry_breaking', True)
+        # Subproblems run in the pool already, their own limits come from the search
+        self.solver_options.update(workers=1, instrumentation=None)
+        for option in ('time_limit', 'node_limit', 'cancel_token', 'on_progress'):
+            self.solver_options.pop(option, None)
+        self.subproblems = 0
+        self.splits = 0
+        self.seconds = 0.0
+
+    def split(self, csp_bytes: bytes) -> List[List[Tuple]]:
+        """
+        Enumerates the initial subproblems, one variable deeper at a time until there are enough of them.
+
+        Args:
+            csp_bytes (bytes): The pickled CSP.
+
+        Returns:
+            List[List[Tuple]]: The partial assignments of the subproblems.
+        """
+        target = self.workers * self.subproblems_per_worker
+        depth = 0
+        prefixes = [[]]
+        while len(prefixes) < target and depth < len(self.csp.variables):
+            depth += 1
+            prefixes = extend_prefix(csp_bytes, self.solver_options, [], depth)
+            if not prefixes or any(len(prefix) < depth for prefix in prefixes):
+                # No solution, or a complete one
+                break
+        return prefixes
+
+    def run(self) -> SearchResult:
+        """
+        Runs the search. A solution is written back to the CSP.
+
+        Returns:
+            SearchResult: SOLVED with the solution, UNSATISFIABLE once every subproblem failed, or TIMED_OUT.
+        """
+        started = time.perf_counter()
+        deadline = time.time() + self.time_limit if self.time_limit is not None else None
+        csp_bytes = pickle.dumps(self.csp)
+        prefixes = self.split(csp_bytes)
+        status, solution, nodes = UNSATISFIABLE, None, 0
+
+        token = multiprocessing.Event()
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=start_worker,
+                                 initargs=(csp_bytes, self.solver_options, token)) as executor:
+            pending = {executor.submit(search_subproblem, prefix, self.node_limit, self.split_depth, deadline)
+                       for prefix in prefixes}
+            self.subproblems = len(pending)
+            try:
+                while pending and status == UNSATISFIABLE:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        subproblem_status, payload, subproblem_nodes = future.result()
+                        nodes += subproblem_nodes
+                        if subproblem_status == SPLIT:
+                            self.splits += 1
+                            self.subproblems += len(payload)
+                            pending |= {executor.submit(search_subproblem, prefix, self.node_limit,
+                                                        self.split_depth, deadline) for prefix in payload}
+                        elif subproblem_status == SOLVED and solution is None:
+                            status, solution = SOLVED, payload
+                        elif subproblem_status in (TIMED_OUT, CANCELLED) and status == UNSATISFIABLE:
+                            status = TIMED_OUT
+            finally:
+                token.set()
+                for future in pending:
+                    future.cancel()
+        self.seconds = time.perf_counter() - started
+
+        if solution is not None:
+            self.csp.load_solution(solution)
+        return SearchResult(status, solution, solution or {}, nodes, self.seconds)
@@ -0,0 +1,175 @@
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional
+from CSP import CSP
+from Solver import CANCELLED, SOLVED, TIMED_OUT, UNSATISFIABLE, SearchResult, Solver
+from local_search import MinConflicts
+
+# Complete searches that do well on different maps, then local searches that only ever find solutions
+DEFAULT_CONFIGURATIONS = [
+    {'variable_heuristics': True, 'MAC': True, 'tie_breaker': 'dsatur', 'symmetry_breaking': True},
+    {'compiled': True, 'variable_heuristics': True, 'MAC': True, 'symmetry_breaking': True},
+    {'backjumping': True, 'variable_heuristics': True, 'MAC': True, 'nogood_capacity': 1000,
+     'symmetry_breaking': True},
+    {'variable_heuristics': True, 'domain_heuristics': True, 'AC_3': True, 'tie_breaker': 'degree'},
+    {'variable_heuristics': True, 'MAC': True, 'tie_breaker': 'dsatur', 'symmetry_breaking': True, 'seed': 1},
+    {'engine': 'min_conflicts', 'seed': 0},
+    {'engine': 'min_conflicts', 'seed': 1},
+    {'iterative': True, 'domain_heuristics': True},
+]
+
+# The cancellation token of a worker process, inherited from the Portfolio that started the process
+cancel_token = None
+
+
+def start_worker(token) -> None:
+    """
+    Keeps the cancellation token of the portfolio in a worker process.
+
+    Args:
+        token (multiprocessing.Event): The token set when a configuration has answered.
+
+    Returns:
+        None
+    """
+    global cancel_token
+    cancel_token = token
+
+
+def shuffled_csp(csp: CSP, seed: int) -> CSP:
+    """
+    Copies a CSP with its variables in a random order, so searches that break ties by variable order explore
+    different trees.
+
+    Args:
+        csp (CSP): The Constraint Satisfaction Problem.
+        seed (int): The seed of the random generator.
+
+    Returns:
+        CSP: The shuffled copy.
+    """
+    variables = list(csp.variables)
+    random.Random(seed).shuffle(variables)
+    copy = CSP()
+    for variable in variables:
+        copy.add_variable(variable, csp.variables[variable])
+    for constraint_func, *constraint_variables in csp.constraints:
+        copy.add_constraint(constraint_func, constraint_variables)
+    return copy
+
+
+def run_configuration(csp: CSP, configuration: Dict, deadline: Optional[float]) -> SearchResult:
+    """
+    Searches a CSP with one configuration of the portfolio, in a worker process or in this one.
+
+    Args:
+        csp (CSP): The Constraint Satisfaction Problem.
+        configuration (dict): The Solver keyword arguments, or the MinConflicts ones with 'engine': 'min_conflicts',
+                              and optionally a 'seed' that shuffles the variables of a Solver.
+        deadline (float, optional): The time.time() at which the search stops, or None.
+
+    Returns:
+        SearchResult: The result of the search.
+    """
+    options = dict(configuration)
+    engine = options.pop('engine', 'backtracking')
+    time_limit = max(0.0, deadline - time.time()) if deadline is not None else None
+    if engine == 'min_conflicts':
+        options.setdefault('time_limit', time_limit)
+        search = MinConflicts(csp, cancel_token=cancel_token, **options)
+        solution, conflicts = search.run()
+        if conflicts == 0:
+            status = SOLVED
+        else:
+            status = CANCELLED if cancel_token is not None and cancel_token.is_set() else TIMED_OUT
+        # Local search never proves anything, its best assignment is complete but not consistent
+        return SearchResult(status, solution if conflicts == 0 else None, solution if conflicts == 0 else {},
+                            search.iterations, search.seconds)
+    if engine != 'backtracking':
+        raise ValueError(f"Unknown engine {engine!r}, expected 'backtracking' or 'min_conflicts'")
+    seed = options.pop('seed', None)
+    if seed is not None:
+        csp = shuffled_csp(csp, seed)
+    return Solver(csp, time_limit=time_limit, cancel_token=cancel_token, **options).solve()
+
+
+class Portfolio(object):
+    """
+    Searches a CSP with several configurations at once in a process pool and keeps the first answer.
+
+    Which heuristics and engine are fastest changes from map to map, so running several of them concurrently gives
+    the time of the best one on each map without tuning. A configuration answers with a solution or, for a complete
+    search, a proof that there is none; the configurations still running are then cancelled through a shared token,
+    and the ones not started yet never start. The constraints must be picklable, such as not_equal.
+
+    Attributes:
+        csp (CSP): The Constraint Satisfaction Problem.
+        configurations (list): The configurations, see run_configuration.
+        workers (int): The number of processes.
+        time_limit (float): The largest search time in seconds, or None for no limit.
+        results (list): The SearchResult of each configuration, None for the ones that never ran.
+        winner (int): The index of the configuration that answered, or None.
+        seconds (float): The time until the answer, or until every configuration stopped.
+    """
+
+    def __init__(self, csp: CSP, configurations: Optional[List[Dict]] = None, workers: Optional[int] = None,
+                 time_limit: Optional[float] = None) -> None:
+        """
+        Initializes a Portfolio object.
+
+        Args:
+            csp (CSP): The Constraint Satisfaction Problem.
+            configurations (list, optional): The configurations, see run_configuration. Defaults to
+                DEFAULT_CONFIGURATIONS.
+            workers (int, optional): The number of processes. Defaults to the number of CPUs, at most one per
+                configuration.
+            time_limit (float, optional): The largest search time in seconds. Defaults to None, i.e. no limit: local
+                search configurations then run until another configuration answers.
+        """
+        self.csp = csp
+        self.configurations = list(configurations if configurations is not None else DEFAULT_CONFIGURATIONS)
+        self.workers = workers or min(os.cpu_count() or 1, len(self.configurations))
+        self.time_limit = time_limit
+        self.results = [None] * len(self.configurations)
+        self.winner = None
+        self.seconds = 0.0
+
+    def run(self) -> SearchResult:
+        """
+        Runs the configurations until one answers. A solution is written back to the CSP.
+
+        Returns:
+            SearchResult: The answer of the winner, or a TIMED_OUT result when no configuration answered.
+        """
+        started = time.perf_counter()
+        deadline = time.time() + self.time_limit if self.time_limit is not None else None
+        token = multiprocessing.Event()
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=start_worker, initargs=(token,)) as executor:
+            futures = {executor.submit(run_configuration, self.csp, configuration, deadline): i
+                       for i, configuration in enumerate(self.configurations)}
+            pending = set(futures)
+            try:
+                while pending and self.winner is None:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        i = futures[future]
+                        self.results[i] = future.result()
+                        if self.winner is None and self.results[i].status in (SOLVED, UNSATISFIABLE):
+                            self.winner = i
+            finally:
+                token.set()
+                for future in pending:
+                    future.cancel()
+        self.seconds = time.perf_counter() - started
+
+        if self.winner is None:
+            finished = [result for result in self.results if result is not None]
+            best = max((result.best for result in finished), key=len, default={})
+            return SearchResult(TIMED_OUT, None, best, sum(result.nodes for result in finished), self.seconds)
+        result = self.results[self.winner]
+        if result.solution is not None:
+            self.csp.load_solution(result.solution)
+        return result
@@ -0,0 +1,301 @@
+import mmap
+import struct
+import sys
+from array import array
+from typing import Dict, List, Optional, Set
+from CSP import CSP, CompiledCSP, not_equal
+
+MAGIC = b'MCSP'
+VERSION = 1
+# The magic, the version, the number of variables, the number of CSR targets (every border twice) and the size of
+# the names in bytes, followed by the offsets, the targets and the domain sizes as little-endian uint32 arrays, and
+# the UTF-8 names separated by newlines
+HEADER = struct.Struct('<4sIIII')
+
+
+def little_endian(values: array) -> bytes:
+    """
+    Returns the bytes of a uint32 array in little-endian order.
+
+    Args:
+        values (array): An array of typecode 'I'.
+
+    Returns:
+        bytes: The little-endian bytes.
+    """
+    if sys.byteorder == 'big':
+        values = array('I', values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def save_problem(csp: CSP, path: str) -> None:
+    """
+    Saves a map coloring CSP in the compact binary format MappedProblem reads: integer variable ids, the CSR
+    adjacency of its compiled form and the size of each domain, the domain of a variable being the first values of
+    the value list. The file takes 4 bytes per variable, 8 per border and the names.
+
+    Args:
+        csp (CSP): A CSP whose constraints are all not_equal and whose variable names are strings.
+        path (str): The file to write.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If a constraint is not not_equal, see CSP.compile, if a domain is not the first values of the
+                    value list, e.g. the first colors of a palette, or if a name holds a newline.
+    """
+    compiled = csp.compile()
+    domain_sizes = array('I')
+    for name, mask in zip(compiled.names, compiled.domains):
+        size = mask.bit_length()
+        if mask != (1 << size) - 1:
+            raise ValueError(f"The domain of {name!r} is not the first values of the value list")
+        domain_sizes.append(size)
+
+    if any('\n' in name for name in compiled.names):
+        raise ValueError("A variable name holds a newline")
+    encoded = '\n'.join(compiled.names).encode()
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(compiled.names), len(compiled.targets), len(encoded)))
+        for values in (array('I', compiled.offsets), array('I', compiled.targets), domain_sizes):
+            file.write(little_endian(values))
+        file.write(encoded)
+
+
+class MappedProblem(object):
+    """
+    A problem saved by save_problem, mapped into memory.
+
+    The arrays are memoryviews of the file, so opening it costs the same for any size of problem and allocates
+    nothing per variable or border: the operating system pages the file in as it is read, and processes that map the
+    same file share its pages. The names are decoded on first use. Only the views are free: to_compiled, to_borders
+    and to_csp build objects per variable and border.
+
+    Attributes:
+        path (str): The problem file.
+        variables (int): The number of variables.
+        offsets (memoryview): The CSR row offsets, of length variables + 1.
+        targets (memoryview): The CSR neighbor indices, every border stored in both directions.
+        domain_sizes (memoryview): The domain size of each variable.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Initializes a MappedProblem object by mapping a problem file.
+
+        Args:
+            path (str): The file written by save_problem.
+
+        Raises:
+            ValueError: If the file is not a problem file of this version.
+        """
+        self.path = path
+        with open(path, 'rb') as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.buffer) < HEADER.size:
+            self.buffer.close()
+            raise ValueError(f"{path} is not a problem file")
+        magic, version, variables, targets, names_size = HEADER.unpack_from(self.buffer)
+        expected = HEADER.size + 4 * (2 * variables + 1 + targets) + names_size
+        if magic != MAGIC or version != VERSION or len(self.buffer) != expected:
+            self.buffer.close()
+            raise ValueError(f"{path} is not a version {VERSION} problem file")
+
+        self.variables = variables
+        self.views = [memoryview(self.buffer)]
+        start = HEADER.size
+        arrays = []
+        for count in (variables + 1, targets, variables):
+            view = self.views[0][start:start + 4 * count]
+            if sys.byteorder == 'big':
+                # Byte swapped copies, the file is little-endian
+                swapped = array('I', view.tobytes())
+                swapped.byteswap()
+                arrays.append(memoryview(swapped))
+            else:
+                arrays.append(view.cast('I'))
+            self.views += [view, arrays[-1]]
+            start += 4 * count
+        self.offsets, self.targets, self.domain_sizes = arrays
+        self.name_bytes = self.views[0][start:start + names_size]
+        self.views.append(self.name_bytes)
+        self._names = None
+
+    @property
+    def names(self) -> List[str]:
+        """
+        The variable names, decoded on first use.
+
+        Returns:
+            list: The name of each variable id.
+        """
+        if self._names is None:
+            self._names = str(self.name_bytes, 'utf-8').split('\n') if self.variables else []
+        return self._names
+
+    def neighbors(self, variable: int) -> memoryview:
+        """
+        Returns the neighbor ids of a variable, as a view of the file.
+
+        Args:
+            variable (int): The variable id.
+
+        Returns:
+            memoryview: The neighbor ids.
+        """
+        return self.targets[self.offsets[variable]:self.offsets[variable + 1]]
+
+    def default_values(self, values: Optional[List]) -> List:
+        """
+        Returns the value list the domains are prefixes of.
+
+        Args:
+            values (list, optional): The values, or None for the integers from 0.
+
+        Returns:
+            list: The values.
+
+        Raises:
+            ValueError: If a domain is larger than the value list.
+        """
+        largest = max(self.domain_sizes, default=0)
+        if values is None:
+            return list(range(largest))
+        if len(values) < largest:
+            raise ValueError(f"A domain has {largest} values, only {len(values)} are given")
+        return list(values)
+
+    def to_compiled(self, values: Optional[List] = None) -> CompiledCSP:
+        """
+        Creates the CompiledCSP of the problem from the mapped CSR arrays, see CompiledCSP.from_csr. The neighbor
+        tuples of every variable are built, in time linear in the number of borders.
+
+        Args:
+            values (list, optional): The values the domains are the first values of, e.g. a palette. Defaults to None,
+                                     i.e. the integers from 0.
+
+        Returns:
+            CompiledCSP: The compiled form.
+        """
+        values = self.default_values(values)
+        return CompiledCSP.from_csr(self.names, values, [(1 << size) - 1 for size in self.domain_sizes],
+                                    self.offsets, self.targets)
+
+    def to_borders(self) -> Dict[str, Set[str]]:
+        """
+        Returns the problem as borders, for build_csp or a ChromaticSearch.
+
+        Returns:
+            Dict[str, Set[str]]: A dictionary mapping each region to its neighboring regions.
+        """
+        names = self.names
+        return {name: {names[other] for other in self.neighbors(i)} for i, name in enumerate(names)}
+
+    def to_csp(self, values: Optional[List] = None) -> CSP:
+        """
+        Creates the CSP of the problem, one not_equal constraint per border.
+
+        Args:
+            values (list, optional): The values the domains are the first values of, e.g. a palette. Defaults to None,
+                                     i.e. the integers from 0.
+
+        Returns:
+            CSP: The Constraint Satisfaction Problem.
+        """
+        values = self.default_values(values)
+        names = self.names
+        csp = CSP()
+        for name, size in zip(names, self.domain_sizes):
+            csp.add_variable(name, values[:size])
+        # The adjacency is already symmetric and deduplicated, so the constraint lists are built from it directly
+        # instead of through one add_constraint call per border
+        var_constraints = csp.var_constraints
+        constraints = csp.constraints
+        for i, name in enumerate(names):
+            neighbors = self.neighbors(i)
+            var_constraints[name] = [(not_equal, names[other]) for other in neighbors]
+            constraints.extend([not_equal, name, names[other]] for other in neighbors if other > i)
+        return csp
+
+    def close(self) -> None:
+        """
+        Releases the views and unmaps the file. Objects built on the views, such as the CompiledCSP of to_compiled,
+        must be dropped first.
+
+        Returns:
+            None
+        """
+        for view in reversed(self.views):
+            view.release()
+        self.views = []
+        self.buffer.close()
+
+    def __enter__(self) -> 'MappedProblem':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def read_dimacs(path: str) -> Dict[str, Set[str]]:
+    """
+    Reads a graph coloring instance in the DIMACS .col format: 'c' comment lines, a 'p edge <vertices> <edges>'
+    line, which some instances write 'p col', and one 'e <u> <v>' line per edge, vertices numbered from 1. Vertex i
+    becomes the region str(i).
+
+    Args:
+        path (str): The .col file.
+
+    Returns:
+        Dict[str, Set[str]]: A symmetric adjacency dictionary, isolated vertices included.
+
+    Raises:
+        ValueError: If a line is malformed, the problem is not a graph or an edge names a vertex out of range.
+    """
+    borders = None
+    with open(path) as file:
+        for number, line in enumerate(file, 1):
+            fields = line.split()
+            if not fields or fields[0] == 'c':
+                continue
+            if fields[0] == 'p' and len(fields) == 4 and fields[1] in ('edge', 'col') and borders is None:
+                borders = {str(vertex): set() for vertex in range(1, int(fields[2]) + 1)}
+            elif fields[0] == 'e' and len(fields) == 3 and borders is not None:
+                u, v = fields[1], fields[2]
+                if u not in borders or v not in borders:
+                    raise ValueError(f"{path}:{number}: edge {u} {v} names a vertex out of range")
+                if u != v:
+                    borders[u].add(v)
+                    borders[v].add(u)
+            else:
+                raise ValueError(f"{path}:{number}: unexpected line {line.strip()!r}")
+    if borders is None:
+        raise ValueError(f"{path} has no 'p edge' or 'p col' line")
+    return borders
+
+
+def write_dimacs(csp: CSP, path: str, comment: Optional[str] = None) -> None:
+    """
+    Writes the constraint graph of a CSP in the DIMACS .col format, the variables numbered from 1 in the order they
+    were added. Domains are not part of the format.
+
+    Args:
+        csp (CSP): A CSP whose constraints are all not_equal.
+        path (str): The .col file to write.
+        comment (str, optional): A comment written at the top of the file. Defaults to None.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If a constraint is not not_equal, see CSP.compile.
+    """
+    compiled = csp.compile()
+    edges = [(i, j) for i, neighbors in enumerate(compiled.neighbors) for j in neighbors if i < j]
+    with open(path, 'w') as file:
+        if comment:
+            file.writelines(f'c {line}\n' for line in comment.splitlines())
+        file.write(f'p edge {len(compiled.names)} {len(edges)}\n')
+        file.writelines(f'e {i + 1} {j + 1}\n' for i, j in edges)
@@ -0,0 +1,205 @@
+import hashlib
+import json
+import sqlite3
+from typing import Dict, Iterable, Optional
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS solutions (
+    key TEXT PRIMARY KEY,
+    domain_size INTEGER NOT NULL,
+    colors INTEGER NOT NULL,
+    chromatic INTEGER,
+    solution TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    used INTEGER NOT NULL
+)
+'''
+
+
+def graph_fingerprint(borders: Dict[str, Iterable[str]], domain_size: int) -> str:
+    """
+    Computes the canonical hash of a map coloring problem: its regions, its borders and the number of colors each
+    region can take. The order of the regions and of their neighbors, borders listed by both of their regions, self
+    loops and neighbors that are not regions of the map do not change the hash, like they do not change the CSP.
+
+    Args:
+        borders (Dict[str, Iterable[str]]): A dictionary mapping each region to its neighboring regions.
+        domain_size (int): The number of colors.
+
+    Returns:
+        str: The hexadecimal SHA-256 digest.
+    """
+    regions = sorted(borders)
+    edges = sorted({(min(region, neighbor), max(region, neighbor)) for region, neighbors in borders.items()
+                    for neighbor in neighbors if neighbor in borders and neighbor != region})
+    canonical = json.dumps([domain_size, regions, edges], separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class CachedSolution(object):
+    """
+    A coloring kept by a SolutionCache.
+
+    Attributes:
+        solution (dict): The palette index of the color of each region.
+        colors (int): The number of colors the coloring uses.
+        chromatic (int): The proven chromatic number, or None if it is not known.
+    """
+
+    def __init__(self, solution: Dict[str, int], chromatic: Optional[int] = None) -> None:
+        """
+        Initializes a CachedSolution object.
+
+        Args:
+            solution (dict): The palette index of the color of each region.
+            chromatic (int, optional): The proven chromatic number. Defaults to None.
+        """
+        self.solution = solution
+        self.colors = len(set(solution.values()))
+        self.chromatic = chromatic
+
+
+class SolutionCache(object):
+    """
+    A persistent cache of map colorings keyed by graph_fingerprint, stored in SQLite, in memory or in a file.
+
+    Each key keeps the coloring with the fewest colors seen and the chromatic number once it is proven. Reading or
+    writing an entry makes it the most recently used, and the least recently used entries are evicted once there are
+    more than max_entries of them or their solutions take more than max_bytes. A problem that is not cached can start
+    from the coloring of the cached problem sharing the most regions with it, see similar.
+
+    Attributes:
+        path (str): The SQLite database file, or ':memory:'.
+        max_entries (int): The largest number of entries kept.
+        max_bytes (int): The largest total size of the stored solutions in bytes.
+        connection (sqlite3.Connection): The database connection.
+        hits (int): The number of get calls that found an entry.
+        misses (int): The number of get calls that found none.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 256, max_bytes: int = 64 << 20) -> None:
+        """
+        Initializes a SolutionCache object, creating the database if needed.
+
+        Args:
+            path (str, optional): The SQLite database file. Defaults to None, i.e. a cache in memory.
+            max_entries (int, optional): The largest number of entries kept. Defaults to 256.
+            max_bytes (int, optional): The largest total size of the stored solutions in bytes. Defaults to 64 MiB.
+        """
+        self.path = path or ':memory:'
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute(SCHEMA)
+        self.connection.execute('CREATE INDEX IF NOT EXISTS solutions_used ON solutions (used)')
+        self.connection.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return self.connection.execute('SELECT COUNT(*) FROM solutions').fetchone()[0]
+
+    def __contains__(self, key: str) -> bool:
+        return self.connection.execute('SELECT 1 FROM solutions WHERE key = ?', (key,)).fetchone() is not None
+
+    def next_use(self) -> int:
+        """
+        Returns the use stamp of the next read or write, larger than every stored one.
+
+        Returns:
+            int: The use stamp.
+        """
+        return self.connection.execute('SELECT COALESCE(MAX(used), 0) + 1 FROM solutions').fetchone()[0]
+
+    def get(self, key: str) -> Optional[CachedSolution]:
+        """
+        Looks up the coloring of a problem and makes it the most recently used.
+
+        Args:
+            key (str): The graph_fingerprint of the problem.
+
+        Returns:
+            Optional[CachedSolution]: The cached coloring, or None.
+        """
+        row = self.connection.execute('SELECT solution, chromatic FROM solutions WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        with self.connection:
+            self.connection.execute('UPDATE solutions SET used = ? WHERE key = ?', (self.next_use(), key))
+        return CachedSolution(json.loads(row[0]), row[1])
+
+    def put(self, key: str, domain_size: int, solution: Dict[str, int], chromatic: Optional[int] = None) -> None:
+        """
+        Stores the coloring of a problem, unless the cached one uses fewer colors, and evicts the least recently used
+        entries over the limits. A proven chromatic number is kept once known.
+
+        Args:
+            key (str): The graph_fingerprint of the problem.
+            domain_size (int): The number of colors of the problem.
+            solution (dict): The palette index of the color of each region.
+            chromatic (int, optional): The proven chromatic number. Defaults to None.
+
+        Returns:
+            None
+        """
+        entry = CachedSolution(solution, chromatic)
+        row = self.connection.execute('SELECT colors, chromatic FROM solutions WHERE key = ?', (key,)).fetchone()
+        if row is not None and chromatic is None:
+            chromatic = row[1]
+        with self.connection:
+            if row is not None and row[0] <= entry.colors:
+                self.connection.execute('UPDATE solutions SET chromatic = ?, used = ? WHERE key = ?',
+                                        (chromatic, self.next_use(), key))
+            else:
+                text = json.dumps(solution, separators=(',', ':'))
+                self.connection.execute(
+                    'INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (key, domain_size, entry.colors, chromatic, text, len(text.encode()), self.next_use()))
+            self.evict()
+
+    def evict(self) -> None:
+        """
+        Deletes the least recently used entries until there are at most max_entries of them and their solutions take
+        at most max_bytes.
+
+        Returns:
+            None
+        """
+        count, total = 0, 0
+        for key, size in self.connection.execute('SELECT key, size FROM solutions ORDER BY used DESC').fetchall():
+            count += 1
+            total += size
+            if count > self.max_entries or total > self.max_bytes:
+                self.connection.execute('DELETE FROM solutions WHERE key = ?', (key,))
+
+    def similar(self, regions: Iterable[str], domain_size: int) -> Optional[Dict[str, int]]:
+        """
+        Finds the cached coloring of the problem with the same number of colors that shares the most regions with
+        another one, e.g. the same map at another neighbourhood distance or before a border change, as a warm start.
+
+        Args:
+            regions (Iterable[str]): The regions of the problem.
+            domain_size (int): The number of colors of the problem.
+
+        Returns:
+            Optional[Dict[str, int]]: The palette indices of the shared regions, or None if no region is shared.
+        """
+        regions = set(regions)
+        best = None
+        for (text,) in self.connection.execute('SELECT solution FROM solutions WHERE domain_size = ? '
+                                               'ORDER BY used DESC', (domain_size,)):
+            shared = {region: color for region, color in json.loads(text).items() if region in regions}
+            if shared and (best is None or len(shared) > len(best)):
+                best = shared
+        return best
+
+    def close(self) -> None:
+        """
+        Closes the database connection.
+
+        Returns:
+            None
+        """
+        self.connection.close()
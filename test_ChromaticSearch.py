@@ -0,0 +1,93 @@
+import unittest
+from ChromaticSearch import ChromaticSearch
+from fixtures import wheel_borders
+
+# A map that three colors solve after a few dead ends and two colors do not
+DEAD_ENDS = {'A': {'D'}, 'B': {'E', 'C'}, 'C': {'F', 'A'}, 'D': {'F', 'C'}, 'E': {'D', 'F', 'B'}, 'F': {'C', 'B'}}
+from graph_coloring import adjacency_from_borders, dsatur, greedy_clique
+
+
+class TestChromaticSearch(unittest.TestCase):
+
+    def setUp(self):
+        # A wheel with an odd rim needs four colors, its hub and two rim regions form a triangle
+        self.borders = wheel_borders()
+        self.palette = ['red', 'green', 'blue', 'yellow', 'black', 'white']
+
+    def assertValidColoring(self, solution):
+        graph = adjacency_from_borders(self.borders)
+        self.assertEqual(set(solution), set(graph))
+        for region, neighbors in graph.items():
+            for neighbor in neighbors:
+                self.assertNotEqual(solution[region], solution[neighbor])
+
+    def test_bounds(self):
+        graph = adjacency_from_borders(self.borders)
+        coloring = dsatur(graph)
+        for region, neighbors in graph.items():
+            for neighbor in neighbors:
+                self.assertNotEqual(coloring[region], coloring[neighbor])
+        clique = greedy_clique(graph)
+        for region in clique:
+            self.assertTrue(set(clique) - {region} <= graph[region])
+        self.assertEqual(len(clique), 3)
+
+    def test_descend(self):
+        search = ChromaticSearch(self.borders, self.palette, AC_3=True, variable_heuristics=True)
+        colors_count, solution = search.run()
+        self.assertEqual(colors_count, 4)
+        self.assertValidColoring(solution)
+        self.assertLessEqual(len(set(solution.values())), 4)
+
+    def test_binary(self):
+        search = ChromaticSearch(self.borders, self.palette, strategy='binary')
+        colors_count, solution = search.run()
+        self.assertEqual(colors_count, 4)
+        self.assertValidColoring(solution)
+        # Every attempt is recorded with its color count
+        self.assertTrue(all(len(timing) == 3 for timing in search.timings))
+
+    def test_components(self):
+        # Add a separate pair of islands next to the wheel
+        self.borders.update({'X': ['Y'], 'Y': [], 'Z': []})
+        for workers in (1, 2):
+            search = ChromaticSearch(self.borders, self.palette, workers=workers, MAC=True)
+            colors_count, solution = search.run()
+
+            # Assert that the chromatic number is the one of the hardest component
+            self.assertEqual(colors_count, 4)
+            self.assertValidColoring(solution)
+
+    def test_carried_nogoods(self):
+        assignments = []
+        for nogood_depth in (0, 8):
+            search = ChromaticSearch(DEAD_ENDS, self.palette, nogood_depth=nogood_depth)
+            self.assertIsNotNone(search.attempt(3))
+            assignments_number = search.assignments_number
+            self.assertIsNone(search.attempt(2))
+            assignments.append(search.assignments_number - assignments_number)
+
+        # Assert that the dead ends found with three colors prune the attempt with two
+        self.assertLess(assignments[1], assignments[0])
+        # Assert that a failed attempt keeps no nogoods, no later attempt has fewer colors
+        self.assertEqual([learned_with for learned_with, _ in search.nogoods], [3])
+
+    def test_max_nogoods(self):
+        # An attempt with three colors learns more than two nogoods
+        unbounded = ChromaticSearch(DEAD_ENDS, self.palette)
+        self.assertIsNotNone(unbounded.attempt(3))
+        self.assertGreater(sum(len(learned) for _, learned in unbounded.nogoods), 2)
+
+        # Assert that the nogoods carried between attempts stay within the bound
+        search = ChromaticSearch(DEAD_ENDS, self.palette, max_nogoods=2)
+        for colors_count in (4, 3):
+            self.assertIsNotNone(search.attempt(colors_count))
+            self.assertLessEqual(sum(len(learned) for _, learned in search.nogoods), 2)
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            ChromaticSearch(self.borders, self.palette, strategy='random')
+
+
+if __name__ == '__main__':
+    unittest.main()
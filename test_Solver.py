@@ -1,10 +1,16 @@
-
-import unittest
-from CSP import CSP
-from Solver import Solver
+import os
+import threading
 import unittest
-from CSP import CSP
-from Solver import Solver
+from CSP import CSP, not_equal
+from Solver import CANCELLED, SOLVED, TIMED_OUT, UNSATISFIABLE, SearchInterrupted, Solver
+from batch import build_csp
+from benchmark import mycielski_graph
+from dataset import continent_adjacency
+from fixtures import WHEEL_BORDERS, wheel_csp
+from map_generator import expand_neighborhoods
+from nogoods import NogoodStore
+
+DATASET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'countries_dataset.csv')
 
 
 class TestSolver(unittest.TestCase):
@@ -325,5 +331,642 @@ class TestSolver(unittest.TestCase):
             self.assertIsInstance(value, str)
 
 
+    def test_compile(self):
+        # Create a CSP object with built-in inequality constraints, the A-B border is added from both sides
+        csp = CSP()
+        csp.add_variable('A', ['red', 'green', 'blue'])
+        csp.add_variable('B', ['red', 'green'])
+        csp.add_variable('C', ['red', 'blue'])
+        csp.add_constraint(not_equal, ['A', 'B'])
+        csp.add_constraint(not_equal, ['B', 'A'])
+        csp.add_constraint(not_equal, ['A', 'C'])
+
+        compiled = csp.compile()
+
+        # Assert that variables are indices and domains are bitmasks over the value list
+        self.assertEqual(compiled.names, ['A', 'B', 'C'])
+        self.assertEqual(compiled.values, ['red', 'green', 'blue'])
+        self.assertEqual(compiled.domains, [0b111, 0b011, 0b101])
+        self.assertEqual(compiled.decode(compiled.domains[2]), ['red', 'blue'])
+
+        # Assert that the CSR adjacency is symmetric and deduplicated
+        self.assertEqual(list(compiled.offsets), [0, 2, 3, 4])
+        self.assertEqual(list(compiled.targets), [1, 2, 0, 0])
+
+    def test_compile_opaque_constraint(self):
+        csp = CSP()
+        csp.add_variable('A', ['red', 'green'])
+        csp.add_variable('B', ['red', 'green'])
+        csp.add_constraint(lambda a, b: a != b, ['A', 'B'])
+
+        with self.assertRaises(ValueError):
+            csp.compile()
+
+    def test_compiled_backtrack_solver(self):
+        for AC_3 in (False, True):
+            # A triangle with a pendant region
+            csp = CSP()
+            csp.add_variable('A', ['red', 'green', 'blue'])
+            csp.add_variable('B', ['red', 'green', 'blue'])
+            csp.add_variable('C', ['red', 'green', 'blue'])
+            csp.add_variable('D', ['red'])
+            csp.add_constraint(not_equal, ['A', 'B'])
+            csp.add_constraint(not_equal, ['B', 'C'])
+            csp.add_constraint(not_equal, ['A', 'C'])
+            csp.add_constraint(not_equal, ['C', 'D'])
+
+            solver = Solver(csp, domain_heuristics=True, variable_heuristics=True, AC_3=AC_3, compiled=True)
+            result = solver.backtrack_solver()
+
+            # Assert that the solution is written back to the CSP and satisfies all constraints
+            self.assertIs(result, csp.assignments)
+            self.assertTrue(csp.is_complete())
+            for _, x, y in csp.constraints:
+                self.assertNotEqual(result[x], result[y])
+
+    def test_compiled_backtrack_solver_unsatisfiable(self):
+        # Three mutually adjacent regions with two colors
+        csp = CSP()
+        for variable in 'ABC':
+            csp.add_variable(variable, ['red', 'green'])
+        csp.add_constraint(not_equal, ['A', 'B'])
+        csp.add_constraint(not_equal, ['B', 'C'])
+        csp.add_constraint(not_equal, ['A', 'C'])
+
+        for AC_3 in (False, True):
+            solver = Solver(csp, AC_3=AC_3, compiled=True)
+            self.assertIsNone(solver.backtrack_solver())
+
+
+    def test_apply_MAC(self):
+        # Create a chain A - B - C where B can only differ from A by taking the value A does not use
+        csp = CSP()
+        csp.add_variable('A', ['red', 'green'])
+        csp.add_variable('B', ['red', 'green'])
+        csp.add_variable('C', ['red', 'green', 'blue'])
+        csp.add_constraint(not_equal, ['A', 'B'])
+        csp.add_constraint(not_equal, ['B', 'C'])
+
+        solver = Solver(csp, MAC=True)
+        csp.assign('A', 'red')
+        removed = solver.apply_MAC('A')
+
+        # Assert that the propagation reached C through B
+        self.assertEqual(csp.variables['B'], ['green'])
+        self.assertEqual(csp.variables['C'], ['red', 'blue'])
+        self.assertCountEqual(removed, [('B', 'red'), ('C', 'green')])
+
+    def test_apply_MAC_wipeout(self):
+        # Create a triangle with two colors, assigning one region empties a domain
+        csp = CSP()
+        for variable in 'ABC':
+            csp.add_variable(variable, ['red', 'green'])
+        csp.add_constraint(not_equal, ['A', 'B'])
+        csp.add_constraint(not_equal, ['B', 'C'])
+        csp.add_constraint(not_equal, ['A', 'C'])
+
+        solver = Solver(csp, MAC=True)
+        csp.assign('A', 'red')
+
+        # Assert that the wipeout is reported and the domains are restored
+        self.assertIsNone(solver.apply_MAC('A'))
+        self.assertCountEqual(csp.variables['B'], ['red', 'green'])
+        self.assertCountEqual(csp.variables['C'], ['red', 'green'])
+
+    def test_backtrack_solver_MAC(self):
+        # Create an odd cycle, which needs three colors
+        csp = CSP()
+        for variable in 'ABCDE':
+            csp.add_variable(variable, ['red', 'green', 'blue'])
+        for x, y in ['AB', 'BC', 'CD', 'DE', 'EA']:
+            csp.add_constraint(not_equal, [x, y])
+
+        solver = Solver(csp, variable_heuristics=True, MAC=True)
+        result = solver.backtrack_solver()
+
+        self.assertIsNotNone(result)
+        for _, x, y in csp.constraints:
+            self.assertNotEqual(result[x], result[y])
+
+
+    def test_trail_restores_state(self):
+        # Create a CSP object and add variables and constraints
+        csp = CSP()
+        csp.add_variable('A', ['red', 'green', 'blue'])
+        csp.add_variable('B', ['red', 'green', 'blue'])
+        csp.add_variable('C', ['red', 'green', 'blue'])
+        csp.add_constraint(not_equal, ['A', 'B'])
+
+        csp.assign('B', 'green')
+        csp.remove_value('A', 'green')
+        csp.push_level()
+        csp.remove_value('C', 'red')
+        csp.assign('C', 'blue')
+
+        # Assert that domains shrink in place and assigned variables leave unassigned_var
+        self.assertEqual(csp.variables['A'], ['red', 'blue'])
+        self.assertEqual(csp.variables['C'], ['blue'])
+        self.assertEqual(csp.unassigned_var, ['A'])
+
+        # Assert that unassigning C keeps the changes made before its assignment, its value first
+        csp.unassign('C')
+        self.assertEqual(csp.variables['C'], ['blue', 'green'])
+        self.assertEqual(csp.variables['A'], ['red', 'blue'])
+        csp.pop_level()
+        self.assertEqual(csp.variables['C'], ['red', 'blue', 'green'])
+
+        # Assert that removed values come back at their positions, the values of an assignment after it, and
+        # unassigned variables go to the back
+        csp.unassign('B')
+        self.assertEqual(csp.variables['A'], ['red', 'green', 'blue'])
+        self.assertEqual(csp.variables['B'], ['green', 'red', 'blue'])
+        self.assertEqual(csp.unassigned_var, ['A', 'C', 'B'])
+        self.assertFalse(csp.is_assigned('B'))
+        self.assertEqual(csp.trail, [])
+
+    def test_backtrack_solver_assignments(self):
+        # Color Europe at distance 1 with 4 colors, the default run of main.py
+        adjacency = continent_adjacency('Europe', DATASET_PATH)
+        csp = build_csp(expand_neighborhoods(adjacency, 1), ['red', 'green', 'blue', 'yellow'])
+        solver = Solver(csp)
+
+        # Assert that plain backtracking makes as many assignments as the original list based search: unassigned
+        # variables go to the back and the values of an undone assignment after it
+        self.assertIsNotNone(solver.backtrack_solver())
+        self.assertEqual(csp.assignments_number, 1147)
+
+    def test_unassign_out_of_order(self):
+        csp = CSP()
+        csp.add_variable('A', ['red', 'green'])
+        csp.add_variable('B', ['red', 'green'])
+        csp.assign('A', 'red')
+        csp.assign('B', 'green')
+
+        with self.assertRaises(ValueError):
+            csp.unassign('A')
+
+    def test_finalize(self):
+        csp = CSP()
+        csp.add_constraint(not_equal, ['A', 'B'])
+        csp.add_variable('A', ['red', 'green', 'blue'])
+        csp.add_variable('B', ['red', 'green'])
+        csp.add_variable('C', ['red', 'green', 'blue'])
+        csp.add_constraint(not_equal, ['B', 'A'])
+        csp.add_constraint(not_equal, ['A', 'C'])
+        csp.add_constraint(not_equal, ['C', 'FOO'])
+        csp.finalize(supports=True)
+
+        # Assert that arcs added before a variable are kept, and that duplicates and unknown variables are left out
+        self.assertEqual(csp.arcs['A'], ((not_equal, 'B'), (not_equal, 'C')))
+        self.assertEqual(csp.neighbors, {'A': ('B', 'C'), 'B': ('A',), 'C': ('A',)})
+        self.assertEqual(csp.supports['A'], {'red': 2, 'green': 2, 'blue': 1})
+
+        # Assert that the sets and the counters follow the domains and come back on backtrack
+        csp.assign('B', 'green')
+        csp.remove_value('C', 'blue')
+        self.assertEqual(csp.members['B'], {'green'})
+        self.assertEqual(csp.supports['A'], {'red': 1, 'green': 2, 'blue': 0})
+        csp.unassign('B')
+        self.assertEqual(csp.members['B'], {'red', 'green'})
+        self.assertEqual(csp.supports['A'], {'red': 2, 'green': 2, 'blue': 1})
+
+        # Assert that the index is dropped when the CSP changes
+        csp.add_variable('D', ['red'])
+        self.assertIsNone(csp.arcs)
+        self.assertIsNone(csp.supports)
+
+    def test_MRV_tie_breakers(self):
+        # Create a star around B plus a separate edge C - D, all domains have the same size
+        csp = CSP()
+        for variable in 'ABCDE':
+            csp.add_variable(variable, ['red', 'green', 'blue'])
+        csp.add_constraint(not_equal, ['A', 'B'])
+        csp.add_constraint(not_equal, ['B', 'E'])
+        csp.add_constraint(not_equal, ['C', 'B'])
+        csp.add_constraint(not_equal, ['C', 'D'])
+
+        # Assert that plain MRV keeps the first variable and degree prefers the hub
+        self.assertEqual(Solver(csp, variable_heuristics=True).MRV(), 'A')
+        self.assertEqual(Solver(csp, variable_heuristics=True, tie_breaker='degree').MRV(), 'B')
+
+        # Assert that DSATUR prefers the variable whose neighbors use the most distinct values
+        csp.assign('B', 'red')
+        csp.assign('D', 'green')
+        self.assertEqual(Solver(csp, variable_heuristics=True, tie_breaker='dsatur').MRV(), 'C')
+
+    def test_MRV_follows_domain_changes(self):
+        csp = CSP()
+        for variable in 'ABC':
+            csp.add_variable(variable, ['red', 'green', 'blue'])
+        csp.add_constraint(not_equal, ['A', 'C'])
+
+        solver = Solver(csp, variable_heuristics=True, MAC=True)
+        self.assertEqual(solver.MRV(), 'A')
+
+        # Assert that the heap sees the domain of C shrink and grow back
+        csp.assign('A', 'red')
+        solver.apply_MAC('A')
+        solver.update_variable_queue('A', csp.trail)
+        self.assertEqual(solver.MRV(), 'C')
+        csp.unassign('A')
+        solver.update_variable_queue('A', [('C', 'red', 0)])
+        self.assertEqual(solver.MRV(), 'A')
+
+    def test_MRV_queue_stays_bounded(self):
+        for options in ({'MAC': True, 'tie_breaker': 'dsatur'}, {'iterative': True, 'tie_breaker': 'degree'}):
+            # A Mycielski graph needs four colors, the failing search with three changes domains over and over
+            csp = build_csp(mycielski_graph(4), ['red', 'green', 'blue'])
+            solver = Solver(csp, variable_heuristics=True, **options)
+            sizes = []
+            update_variable_queue = solver.update_variable_queue
+
+            def record(variable, changes):
+                update_variable_queue(variable, changes)
+                sizes.append(len(solver.variable_queue))
+
+            solver.update_variable_queue = record
+            self.assertIsNone(solver.backtrack_solver())
+
+            # Assert that out of date entries are dropped instead of piling up over the search
+            self.assertGreater(csp.assignments_number, 40)
+            self.assertLessEqual(max(sizes), 4 * len(csp.variables) + 16)
+
+    def test_backtrack_solver_tie_breakers(self):
+        for tie_breaker in ('degree', 'dsatur'):
+            csp = wheel_csp(['red', 'green', 'blue', 'yellow'])
+
+            solver = Solver(csp, variable_heuristics=True, MAC=True, tie_breaker=tie_breaker)
+            result = solver.backtrack_solver()
+
+            self.assertIsNotNone(result)
+            for _, x, y in csp.constraints:
+                self.assertNotEqual(result[x], result[y])
+
+
+    def test_iterative_solver(self):
+        # Create a path much longer than the recursion limit, its ends can only take the first value
+        import sys
+        length = sys.getrecursionlimit() + 500
+        csp = CSP()
+        for i in range(length):
+            csp.add_variable(f'R{i}', ['red', 'green'])
+        for i in range(1, length):
+            csp.add_constraint(not_equal, [f'R{i - 1}', f'R{i}'])
+
+        for options in ({'iterative': True}, {'compiled': True}, {'compiled': True, 'time_limit': 60}):
+            csp.reset()
+            solver = Solver(csp, variable_heuristics=True, MAC=True, **options)
+            result = solver.backtrack_solver()
+
+            self.assertIsNotNone(result)
+            self.assertTrue(csp.is_complete())
+            for _, x, y in csp.constraints:
+                self.assertNotEqual(result[x], result[y])
+
+    def test_iterative_solver_matches_recursion(self):
+        results = []
+        for iterative in (False, True):
+            # The wheel has no solution with three colors
+            csp = wheel_csp(['red', 'green', 'blue'])
+
+            solver = Solver(csp, domain_heuristics=True, AC_3=True, iterative=iterative)
+            results.append((solver.backtrack_solver(), csp.assignments_number))
+
+            # Assert that the failed search leaves the CSP as it was
+            self.assertCountEqual(csp.unassigned_var, list('HABCDE'))
+            self.assertEqual(csp.trail, [])
+
+        self.assertIsNone(results[0][0])
+        self.assertEqual(results[0], results[1])
+
+
+    def build_islands_csp(self):
+        # Create a triangle, an edge and an isolated region
+        csp = CSP()
+        for variable in 'ABCDEF':
+            csp.add_variable(variable, ['red', 'green', 'blue'])
+        for x, y in ['AB', 'BC', 'CA', 'DE']:
+            csp.add_constraint(not_equal, [x, y])
+        return csp
+
+    def test_split_components(self):
+        csp = self.build_islands_csp()
+
+        components = csp.split_components()
+
+        # Assert that every component keeps its variables and constraints only
+        self.assertEqual([list(component.variables) for component in components], [['A', 'B', 'C'], ['D', 'E'], ['F']])
+        self.assertEqual([len(component.constraints) for component in components], [3, 1, 0])
+
+    def test_component_solver(self):
+        for workers in (1, 2):
+            csp = self.build_islands_csp()
+
+            solver = Solver(csp, variable_heuristics=True, MAC=True, decompose=True, workers=workers)
+            result = solver.backtrack_solver()
+
+            # Assert that the merged solution is complete and satisfies all constraints
+            self.assertIs(result, csp.assignments)
+            self.assertTrue(csp.is_complete())
+            self.assertGreater(csp.assignments_number, 0)
+            for _, x, y in csp.constraints:
+                self.assertNotEqual(result[x], result[y])
+
+    def test_component_solver_unsatisfiable(self):
+        csp = self.build_islands_csp()
+        for variable in 'ABC':
+            csp.variables[variable] = ['red', 'green']
+
+        solver = Solver(csp, MAC=True, decompose=True)
+        self.assertIsNone(solver.backtrack_solver())
+
+
+    def test_backjump_solver(self):
+        for options in ({}, {'MAC': True, 'variable_heuristics': True}, {'nogood_capacity': 10}):
+            csp = self.build_islands_csp()
+
+            result = Solver(csp, backjumping=True, **options).backtrack_solver()
+
+            self.assertTrue(csp.is_complete())
+            for _, x, y in csp.constraints:
+                self.assertNotEqual(result[x], result[y])
+
+    def test_backjump_solver_skips_unrelated_variables(self):
+        # Create a chain A..E with two values followed by an unsatisfiable triangle, the chain is never revisited
+        results = []
+        for backjumping in (False, True):
+            csp = CSP()
+            for variable in 'ABCDEXYZ':
+                csp.add_variable(variable, ['red', 'green'])
+            for x, y in ['AB', 'BC', 'CD', 'DE', 'XY', 'YZ', 'ZX']:
+                csp.add_constraint(not_equal, [x, y])
+
+            solver = Solver(csp, backjumping=backjumping)
+            results.append((solver.backtrack_solver(), csp.assignments_number))
+
+            # Assert that the failed search leaves the CSP as it was
+            self.assertCountEqual(csp.unassigned_var, list('ABCDEXYZ'))
+            self.assertEqual(csp.trail, [])
+
+        self.assertIsNone(results[0][0])
+        self.assertIsNone(results[1][0])
+        self.assertLess(results[1][1], results[0][1])
+
+    def test_backjump_solver_partial_assignment(self):
+        # Create a forest that two colors solve
+        def build_forest():
+            csp = CSP()
+            for variable in 'ABCDEFG':
+                csp.add_variable(variable, ['red', 'green'])
+            for x, y in ['AG', 'DF', 'EF', 'FG']:
+                csp.add_constraint(not_equal, [x, y])
+            return csp
+
+        # Assert that a search started below assignments it cannot undo numbers its frames after them
+        for options in ({}, {'nogood_capacity': 8}, {'symmetry_breaking': True}, {'MAC': True}):
+            for prefix in ([('A', 'red'), ('B', 'red')], [('A', 'red'), ('B', 'green')]):
+                csp = build_forest()
+                solver = Solver(csp, backjumping=True, **options)
+                for variable, value in prefix:
+                    self.assertTrue(solver.assign_value(variable, value))
+                result = solver.backtrack_solver()
+                self.assertIsNotNone(result, (options, prefix))
+                for _, x, y in csp.constraints:
+                    self.assertNotEqual(result[x], result[y])
+
+        # Assert that values pruned by propagation before the search are blamed on the assignments made before it
+        csp = CSP()
+        for variable in 'ABCDEF':
+            csp.add_variable(variable, ['red', 'green', 'blue'])
+        for x, y in ['AF', 'BD', 'BF', 'CE', 'DF']:
+            csp.add_constraint(not_equal, [x, y])
+        csp.assign('A', 'blue')
+        csp.assign('B', 'red')
+        self.assertIsNotNone(Solver(csp, backjumping=True, MAC=True).backtrack_solver())
+
+    def test_backjump_solver_learns_nogoods(self):
+        csp = wheel_csp(['red', 'green', 'blue'])
+
+        solver = Solver(csp, backjumping=True, nogood_capacity=2)
+
+        # Assert that the store stays within its capacity
+        self.assertIsNone(solver.backtrack_solver())
+        self.assertLessEqual(len(solver.nogood_store), 2)
+        self.assertGreater(solver.nogood_store.evictions, 0)
+
+    def test_backtrack_solver_nogoods(self):
+        for options in ({}, {'iterative': True}, {'MAC': True, 'variable_heuristics': True}):
+            csp = wheel_csp(['red', 'green', 'blue', 'yellow'])
+            nogoods = NogoodStore(10)
+            nogoods.add(frozenset({('H', 'red'), ('C', 'green')}))
+            solver = Solver(csp, nogoods=nogoods, nogood_depth=2, **options)
+            result = solver.backtrack_solver()
+
+            # Assert that a nogood is matched when it is part of the assignment, not only the whole of it
+            self.assertIsNotNone(result)
+            self.assertFalse(result['H'] == 'red' and result['C'] == 'green')
+            self.assertTrue(all(len(nogood) <= 2 for nogood in solver.learned_nogoods))
+
+    def test_break_symmetry(self):
+        csp = CSP()
+        for variable in 'ABC':
+            csp.add_variable(variable, ['red', 'green', 'blue'])
+        csp.add_variable('D', ['red', 'green'])
+        solver = Solver(csp, symmetry_breaking=True)
+
+        # Assert that blue, missing from the domain of D, is a class of its own
+        self.assertEqual(solver.ordered_domain_value('A'), ['red', 'blue'])
+        self.assertEqual(solver.class_values, [['red', 'green'], ['blue']])
+
+        # Assert that only the used values and the first unused one of each class are kept
+        solver.assign_value('A', 'red')
+        self.assertEqual(solver.ordered_domain_value('B'), ['red', 'green', 'blue'])
+        solver.assign_value('B', 'green')
+        solver.assign_value('C', 'blue')
+        self.assertEqual(solver.ordered_domain_value('D'), ['red', 'green'])
+        solver.unassign_value('C')
+        solver.unassign_value('B')
+        self.assertCountEqual(solver.ordered_domain_value('B'), ['red', 'green', 'blue'])
+        self.assertEqual(solver.class_used, [1, 0])
+
+    def test_backtrack_solver_symmetry_breaking(self):
+        for colors, solvable in ((['red', 'green', 'blue'], False), (['red', 'green', 'blue', 'yellow'], True)):
+            assignments = []
+            for options in ({}, {'symmetry_breaking': True}, {'symmetry_breaking': True, 'compiled': True}):
+                csp = wheel_csp(colors)
+                result = Solver(csp, **options).backtrack_solver()
+                assignments.append(csp.assignments_number)
+
+                self.assertEqual(result is not None, solvable)
+                if solvable:
+                    for x, y in WHEEL_BORDERS:
+                        self.assertNotEqual(result[x], result[y])
+
+            # Assert that the failed search explores fewer permutations of the colors
+            if not solvable:
+                self.assertLess(assignments[1], assignments[0])
+                self.assertLess(assignments[2], assignments[0])
+
+    def test_solve(self):
+        result = Solver(wheel_csp(['red', 'green', 'blue', 'yellow']), time_limit=10).solve()
+        self.assertEqual(result.status, SOLVED)
+        self.assertEqual(result.best, result.solution)
+        self.assertEqual(len(result.solution), 6)
+
+        result = Solver(wheel_csp(['red', 'green', 'blue']), node_limit=1000).solve()
+        self.assertEqual(result.status, UNSATISFIABLE)
+        self.assertIsNone(result.solution)
+
+    def test_solve_limits(self):
+        for options in ({}, {'iterative': True}, {'backjumping': True}, {'compiled': True},
+                        {'MAC': True, 'variable_heuristics': True}, {'decompose': True}):
+            csp = wheel_csp(['red', 'green', 'blue'])
+            progress = []
+
+            result = Solver(csp, node_limit=3, on_progress=lambda *args: progress.append(args), progress_every=1,
+                            **options).solve()
+
+            # Assert that the search stops at the node limit and leaves the CSP as it was
+            self.assertEqual(result.status, TIMED_OUT)
+            self.assertEqual(result.nodes, 3)
+            self.assertIsNone(result.solution)
+            # MAC finds that the rim cannot be colored once the hub is
+            self.assertEqual(len(result.best), 1 if options.get('MAC') else 3)
+            self.assertCountEqual(csp.unassigned_var, list('HABCDE'))
+            self.assertEqual(csp.trail, [])
+            self.assertEqual([nodes for _, nodes, _ in progress], [0, 1, 2, 3])
+
+        result = Solver(wheel_csp(['red', 'green', 'blue']), time_limit=0).solve()
+        self.assertEqual(result.status, TIMED_OUT)
+
+    def test_solve_cancel(self):
+        cancel_token = threading.Event()
+        cancel_token.set()
+
+        result = Solver(wheel_csp(['red', 'green', 'blue']), cancel_token=cancel_token).solve()
+
+        self.assertEqual(result.status, CANCELLED)
+        self.assertEqual(result.nodes, 0)
+
+
+    def test_remove_variable_and_constraint(self):
+        csp = wheel_csp(['red', 'green', 'blue', 'yellow'])
+        Solver(csp).backtrack_solver()
+
+        csp.remove_constraint(not_equal, ['B', 'A'])
+        self.assertEqual(len(csp.constraints), 9)
+        self.assertNotIn((not_equal, 'B'), csp.var_constraints['A'])
+        with self.assertRaises(ValueError):
+            csp.remove_constraint(not_equal, ['A', 'C'])
+
+        # Assert that removing a variable resets the CSP and drops the constraints on it
+        csp.remove_variable('H')
+        self.assertEqual(csp.unassigned_var, list('ABCDE'))
+        self.assertEqual(csp.variables['A'], ['red', 'green', 'blue', 'yellow'])
+        self.assertEqual(len(csp.constraints), 4)
+        self.assertNotIn('H', [other for _, other in csp.var_constraints['A']])
+
+    def test_subproblem(self):
+        csp = wheel_csp(['red', 'green', 'blue'])
+
+        sub = csp.subproblem(['A', 'B'], {'H': 'red', 'C': 'green'})
+
+        self.assertEqual(sub.variables, {'A': ['green', 'blue'], 'B': ['blue']})
+        self.assertEqual(len(sub.constraints), 1)
+
+    def test_repair(self):
+        colors = ['red', 'green', 'blue', 'yellow']
+        for options in ({}, {'compiled': True}, {'MAC': True, 'variable_heuristics': True}):
+            csp = wheel_csp(colors)
+            for i in range(20):
+                csp.add_variable(f'P{i}', colors)
+                if i:
+                    csp.add_constraint(not_equal, [f'P{i - 1}', f'P{i}'])
+            solver = Solver(csp, **options)
+            previous = dict(solver.backtrack_solver())
+
+            # A new variable bordering two differently colored regions is the only one searched
+            csp.add_variable('X', colors)
+            csp.add_constraint(not_equal, ['X', 'P0'])
+            csp.add_constraint(not_equal, ['X', 'P1'])
+            solution = solver.repair(previous)
+            self.assertEqual(solver.repaired, 1)
+            self.assertEqual({variable: solution[variable] for variable in previous}, previous)
+            self.assertNotIn(solution['X'], (solution['P0'], solution['P1']))
+
+            # A constraint between two regions of the same color frees both
+            previous = dict(solution)
+            same = next(f'P{i}' for i in range(2, 20) if previous[f'P{i}'] == previous['P0'])
+            csp.add_constraint(not_equal, ['P0', same])
+            solution = solver.repair(previous)
+            self.assertLessEqual(solver.repaired, 2 + 2 * 4)
+            self.assertTrue(all(csp.is_consistent(variable, value) for variable, value in solution.items()))
+
+            # Removing the hub leaves the remaining values a solution
+            previous = dict(solution)
+            csp.remove_variable('H')
+            solution = solver.repair(previous)
+            self.assertEqual(solver.repaired, 0)
+            del previous['H']
+            self.assertEqual(solution, previous)
+
+    def test_repair_unsatisfiable(self):
+        csp = wheel_csp(['red', 'green', 'blue', 'yellow'])
+        solver = Solver(csp)
+        previous = dict(solver.backtrack_solver())
+
+        # A fifth region bordering the whole wheel needs a fifth color
+        csp.add_variable('X', ['red', 'green', 'blue', 'yellow'])
+        for variable in 'HABCDE':
+            csp.add_constraint(not_equal, ['X', variable])
+
+        self.assertIsNone(solver.repair(previous))
+        self.assertEqual(solver.repaired, 7)
+
+        # Assert that solve repairs from a previous solution within the limits
+        result = Solver(csp, node_limit=1000).solve(previous)
+        self.assertEqual(result.status, UNSATISFIABLE)
+        csp.remove_variable('X')
+        result = Solver(csp, node_limit=1000).solve(previous)
+        self.assertEqual(result.status, SOLVED)
+        self.assertEqual(result.solution, previous)
+        self.assertEqual(result.nodes, 0)
+
+    def test_solutions(self):
+        colors = ['red', 'green', 'blue']
+        for options in ({}, {'variable_heuristics': True, 'MAC': True}, {'domain_heuristics': True, 'AC_3': True},
+                        {'compiled': True, 'backjumping': True}):
+            csp = CSP()
+            for variable in 'ABCD':
+                csp.add_variable(variable, colors)
+            for x, y in ['AB', 'BC', 'CA', 'CD']:
+                csp.add_constraint(not_equal, [x, y])
+            solver = Solver(csp, **options)
+
+            # Assert that every solution is found once, as an independent copy
+            solutions = list(solver.solutions())
+            self.assertEqual(len(solutions), 12)
+            self.assertEqual(len({tuple(sorted(solution.items())) for solution in solutions}), 12)
+            self.assertTrue(all(solution['C'] not in (solution['A'], solution['B'], solution['D'])
+                                for solution in solutions))
+            self.assertEqual(solver.count_solutions(), 12)
+            self.assertEqual(solver.count_solutions(limit=5), 5)
+
+            # Assert that stopping early leaves the CSP as it was
+            self.assertEqual(len(list(solver.solutions(limit=3))), 3)
+            generator = solver.solutions()
+            next(generator)
+            generator.close()
+            self.assertCountEqual(csp.unassigned_var, list('ABCD'))
+            self.assertEqual(csp.trail, [])
+
+        # Assert that symmetry breaking counts the solutions up to a permutation of the colors
+        self.assertEqual(Solver(wheel_csp(colors + ['yellow'])).count_solutions(), 120)
+        self.assertEqual(Solver(wheel_csp(colors + ['yellow']), symmetry_breaking=True).count_solutions(), 5)
+
+        # Assert that a bounded enumeration stops at its limits
+        with self.assertRaises(SearchInterrupted):
+            list(Solver(wheel_csp(colors + ['yellow']), node_limit=10).solutions())
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
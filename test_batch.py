@@ -0,0 +1,92 @@
+import json
+import unittest
+from batch import build_csp, color_map, generate_palette, run_batch, run_job, update_csp
+from fixtures import wheel_borders
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        # A wheel with an odd rim needs four colors, FOO is a neighbor from another continent
+        self.borders = wheel_borders()
+        self.borders['E'].add('FOO')
+
+    def test_generate_palette(self):
+        # Assert that the palette is reproducible
+        self.assertEqual(generate_palette(), generate_palette())
+        self.assertEqual(len(generate_palette(5)), 5)
+
+    def test_build_csp(self):
+        csp = build_csp(self.borders, ['red', 'green'])
+
+        self.assertEqual(list(csp.variables), list(self.borders))
+        # Assert that every border is added once, even when both regions list it
+        self.assertEqual(len(csp.constraints), 11)
+        # Assert that the arcs added before a region are kept when it is added
+        self.assertCountEqual([other for _, other in csp.var_constraints['A']], ['H', 'B', 'E'])
+
+    def test_update_csp(self):
+        csp = build_csp(self.borders, ['red', 'green'])
+        borders = dict(self.borders, F={'A'}, A={'H', 'B', 'F'})
+        del borders['C']
+
+        update_csp(csp, borders, ['red', 'green'])
+
+        # Assert that the CSP is the one built from the new borders
+        rebuilt = build_csp(borders, ['red', 'green'])
+        self.assertCountEqual(csp.variables, rebuilt.variables)
+        self.assertEqual({frozenset(variables) for _, *variables in csp.constraints},
+                         {frozenset(variables) for _, *variables in rebuilt.constraints})
+
+    def test_color_map(self):
+        for chromatic in (None, 'descend'):
+            summary = color_map(self.borders, generate_palette(), chromatic=chromatic,
+                                solver_options=dict(variable_heuristics=True, MAC=True))
+
+            # Assert that the summary is JSON serializable and the solution uses palette indices
+            json.dumps(summary)
+            self.assertTrue(summary['solved'])
+            self.assertEqual(summary['colors'], 4)
+            self.assertEqual(set(summary['solution']), set(self.borders))
+            for region, neighbors in self.borders.items():
+                for neighbor in neighbors & set(self.borders):
+                    self.assertNotEqual(summary['solution'][region], summary['solution'][neighbor])
+
+    def test_color_map_engine(self):
+        for engine in ('rlf', 'smallest_last'):
+            summary = color_map(self.borders, generate_palette(), engine=engine)
+
+            # Assert that the heuristic coloring is summarized like a search
+            self.assertTrue(summary['solved'])
+            self.assertEqual(summary['colors'], 4)
+            self.assertEqual(summary['assignments'], 0)
+            for region, neighbors in self.borders.items():
+                for neighbor in neighbors & set(self.borders):
+                    self.assertNotEqual(summary['solution'][region], summary['solution'][neighbor])
+
+    def test_color_map_min_conflicts_chromatic(self):
+        # Assert that local search, which proves no lower bound, is rejected before any map is built
+        with self.assertRaises(ValueError):
+            color_map(self.borders, generate_palette(), chromatic='descend', engine='min_conflicts',
+                      solver_options={'seed': 1})
+        with self.assertRaises(ValueError):
+            run_batch(['Wheel'], [1], chromatic='descend', engine='min_conflicts', workers=2)
+
+    def test_color_map_unknown_engine(self):
+        # Assert that the engines running their own process pool are not silently replaced by backtracking
+        for engine in ('portfolio', 'parallel'):
+            with self.assertRaises(ValueError):
+                color_map(self.borders, generate_palette(), engine=engine)
+            with self.assertRaises(ValueError):
+                run_batch(['Wheel'], [1], engine=engine)
+
+    def test_run_job(self):
+        summary = run_job({'map': 'Wheel', 'ND': 1, 'borders': self.borders, 'colors': generate_palette(),
+                           'chromatic': 'binary', 'solver_options': {}})
+
+        self.assertEqual((summary['map'], summary['ND'], summary['regions']), ('Wheel', 1, 6))
+        self.assertTrue(all(timing['seconds'] >= 0 for timing in summary['timings']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from benchmark import compare, grid_graph, heuristic_configs, main, mycielski_graph, random_planar_graph, run_case
+from graph_coloring import greedy_clique
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_grid_graph(self):
+        grid = grid_graph(3, 4)
+
+        self.assertEqual(len(grid), 12)
+        self.assertEqual(sum(len(neighbors) for neighbors in grid.values()) // 2, 3 * 3 + 2 * 4)
+        self.assertEqual(grid['G1_1'], {'G0_1', 'G2_1', 'G1_0', 'G1_2'})
+        self.assertEqual(len(grid_graph(3, 3, diagonals=True)['G1_1']), 8)
+
+    def test_random_planar_graph(self):
+        graph = random_planar_graph(40, seed=3)
+
+        # Assert that the map is maximal planar and reproducible
+        self.assertEqual(sum(len(neighbors) for neighbors in graph.values()) // 2, 3 * 40 - 6)
+        self.assertEqual(graph, random_planar_graph(40, seed=3))
+
+    def test_mycielski_graph(self):
+        graph = mycielski_graph(4)
+
+        # Assert that the Grötzsch graph is built, triangle free and not 3-colorable
+        self.assertEqual(len(graph), 11)
+        self.assertEqual(sum(len(neighbors) for neighbors in graph.values()) // 2, 20)
+        self.assertEqual(len(greedy_clique(graph)), 2)
+        self.assertEqual(run_case(graph, 3, {}, timeout=10)['status'], 'unsatisfiable')
+        self.assertEqual(run_case(graph, 4, {}, timeout=10)['status'], 'solved')
+
+    def test_run_case(self):
+        configs = heuristic_configs()
+        results = [run_case(grid_graph(5, 5), 2, options, timeout=10) for options in configs.values()]
+
+        self.assertTrue(all(result['status'] == 'solved' for result in results))
+        self.assertTrue(all(result['assignments'] >= 25 and result['peak_memory'] > 0 for result in results))
+        self.assertEqual(len(configs), len(set(configs)))
+
+    def test_compare(self):
+        baseline = {'case | recursive': {'status': 'solved', 'seconds': 1.0, 'nodes': 10, 'assignments': 10,
+                                         'backtracks': 2, 'peak_memory': 1000}}
+        same = {'case | recursive': dict(baseline['case | recursive'], seconds=1.5)}
+        worse = {'case | recursive': dict(baseline['case | recursive'], assignments=11, seconds=3.0)}
+        timeout = {'case | recursive': dict(baseline['case | recursive'], status='timeout')}
+
+        self.assertEqual(compare(same, baseline), [])
+        self.assertEqual(len(compare(worse, baseline)), 2)
+        self.assertEqual(len(compare(timeout, baseline)), 1)
+
+    def test_main_without_baseline(self):
+        with tempfile.TemporaryDirectory() as directory:
+            stderr = io.StringIO()
+            with redirect_stderr(stderr):
+                status = main(['--baseline', os.path.join(directory, 'missing.json')])
+
+        # Assert that a comparison without a baseline fails loudly instead of passing
+        self.assertEqual(status, 2)
+        self.assertIn('no baseline', stderr.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import dataset
+from dataset import cache_path, continent_adjacency, continents, load_dataset
+
+ROWS = [('Europe', 'France', 'FRA', 'POINT (2 46)', 'BEL, ESP'),
+        ('Europe', 'Belgium', 'BEL', 'POINT (4 50)', 'FRA'),
+        ('Europe', 'Iceland', 'ISL', 'POINT (-18 65)', ''),
+        ('Africa', 'Morocco', 'MAR', 'POINT (-7 31)', 'ESP')]
+
+
+class TestDataset(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'countries.csv')
+        self.write_csv(ROWS)
+        dataset._datasets.clear()
+
+    def tearDown(self):
+        dataset._datasets.clear()
+        self.directory.cleanup()
+
+    def write_csv(self, rows):
+        with open(self.path, 'w', newline='') as file:
+            file.write('continent,country_name,iso_a3,geometry,neighbors\n')
+            file.writelines(f'{continent},{name},{iso_a3},"{geometry}","{neighbors}"\n'
+                            for continent, name, iso_a3, geometry, neighbors in rows)
+
+    def test_load_dataset(self):
+        data = load_dataset(self.path)
+        self.assertEqual(data['iso_a3'], ['FRA', 'BEL', 'ISL', 'MAR'])
+        self.assertEqual(data['geometry'][0], 'POINT (2 46)')
+        self.assertEqual(continents(self.path), ['Europe', 'Africa'])
+        self.assertEqual(continent_adjacency('Europe', self.path), {'FRA': ['BEL', 'ESP'], 'BEL': ['FRA'], 'ISL': []})
+        self.assertEqual(continent_adjacency('Oceania', self.path), {})
+        self.assertTrue(os.path.exists(cache_path(self.path)))
+
+        # Assert that the dataset is parsed once per process
+        self.assertIs(load_dataset(self.path), data)
+
+    def test_cache_is_reused(self):
+        data = load_dataset(self.path)
+        dataset._datasets.clear()
+        with mock.patch('dataset.parse_csv', side_effect=AssertionError('parsed again')):
+            # Assert that another process reads the pickle, even once the CSV is touched without being changed
+            self.assertEqual(load_dataset(self.path), data)
+            dataset._datasets.clear()
+            stat = os.stat(self.path)
+            os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+            self.assertEqual(load_dataset(self.path), data)
+
+    def test_cache_is_invalidated(self):
+        load_dataset(self.path)
+        self.write_csv(ROWS[:2] + [('Europe', 'Spain', 'ESP', 'POINT (-4 40)', 'FRA')])
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        # Assert that a changed CSV is parsed again, in this process and in the next one
+        self.assertEqual(continent_adjacency('Europe', self.path)['ESP'], ['FRA'])
+        dataset._datasets.clear()
+        self.assertEqual(continents(self.path), ['Europe'])
+
+        # Assert that a corrupt pickle is rebuilt
+        with open(cache_path(self.path), 'wb') as file:
+            file.write(b'not a pickle')
+        dataset._datasets.clear()
+        self.assertEqual(load_dataset(self.path)['iso_a3'], ['FRA', 'BEL', 'ESP'])
+
+
+if __name__ == '__main__':
+    unittest.main()
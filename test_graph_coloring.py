@@ -0,0 +1,61 @@
+import unittest
+from CSP import CSP, not_equal
+from fixtures import wheel_borders
+from graph_coloring import HEURISTIC_ENGINES, greedy_coloring, heuristic_solver, largest_first, smallest_last
+
+
+class TestGraphColoring(unittest.TestCase):
+
+    def setUp(self):
+        # A wheel with an odd rim needs four colors, and a pendant region hangs off the rim
+        self.graph = dict(wheel_borders(), P={'A'})
+        self.graph['A'].add('P')
+
+    def assertValidColoring(self, coloring):
+        self.assertEqual(set(coloring), set(self.graph))
+        for vertex, neighbors in self.graph.items():
+            for neighbor in neighbors:
+                self.assertNotEqual(coloring[vertex], coloring[neighbor])
+
+    def test_greedy_coloring(self):
+        coloring = greedy_coloring(self.graph, ['P', 'A', 'H'] + list('BCDE'))
+
+        self.assertValidColoring(coloring)
+        self.assertEqual((coloring['P'], coloring['A'], coloring['H']), (0, 1, 0))
+
+    def test_engines(self):
+        for name, engine in HEURISTIC_ENGINES.items():
+            coloring = engine(self.graph)
+
+            self.assertValidColoring(coloring)
+            self.assertEqual(max(coloring.values()) + 1, 4, name)
+
+    def test_orders(self):
+        # Assert that the hub is colored first by largest first, and last removed by smallest last
+        self.assertEqual(largest_first(self.graph)['H'], 0)
+        self.assertEqual(smallest_last(self.graph)['P'], 0)
+        self.assertEqual(smallest_last({}), {})
+
+    def test_heuristic_solver(self):
+        csp = CSP()
+        for vertex in self.graph:
+            csp.add_variable(vertex, ['red', 'green', 'blue', 'yellow'])
+        for vertex, neighbors in self.graph.items():
+            for neighbor in neighbors:
+                csp.add_constraint(not_equal, [vertex, neighbor])
+
+        result = heuristic_solver(csp, 'rlf')
+
+        # Assert that the solution is written back to the CSP like a Solver does
+        self.assertIs(result, csp.assignments)
+        self.assertTrue(csp.is_complete())
+        self.assertValidColoring(result)
+        for variable in 'ABCDE':
+            csp.variables[variable] = ['red', 'green', 'blue']
+        self.assertIsNone(heuristic_solver(csp, 'dsatur'))
+        with self.assertRaises(ValueError):
+            heuristic_solver(csp, 'random')
+
+
+if __name__ == '__main__':
+    unittest.main()
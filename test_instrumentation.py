@@ -0,0 +1,85 @@
+import json
+import os
+import tempfile
+import unittest
+from Solver import Solver
+from fixtures import wheel_csp
+from instrumentation import Instrumentation
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def test_counters(self):
+        for options in ({}, {'iterative': True}, {'AC_3': True, 'domain_heuristics': True},
+                        {'MAC': True, 'variable_heuristics': True}, {'compiled': True, 'MAC': True},
+                        {'backjumping': True, 'nogood_capacity': 4}):
+            csp = wheel_csp(['red', 'green', 'blue'])
+            instrumentation = Instrumentation()
+
+            result = Solver(csp, instrumentation=instrumentation, **options).backtrack_solver()
+
+            # Assert that every node of the failed search was counted and undone
+            self.assertIsNone(result)
+            self.assertEqual(instrumentation.nodes, csp.assignments_number)
+            self.assertEqual(instrumentation.backtracks, instrumentation.nodes)
+            self.assertGreater(instrumentation.timers['search'], 0)
+            if options.get('AC_3') or options.get('MAC') and not options.get('compiled'):
+                self.assertGreater(instrumentation.arc_revisions, 0)
+                self.assertGreater(instrumentation.timers['propagation'], 0)
+
+    def test_callbacks(self):
+        events = []
+        instrumentation = Instrumentation(on_assign=lambda *event: events.append(('assign',) + event),
+                                          on_unassign=lambda *event: events.append(('unassign',) + event))
+        csp = wheel_csp(['red', 'green', 'blue', 'yellow'])
+
+        result = Solver(csp, MAC=True, instrumentation=instrumentation).backtrack_solver()
+
+        # Assert that the announced assignments that were not undone are the solution
+        depth = 0
+        assigned = []
+        for event in events:
+            if event[0] == 'assign':
+                depth += 1
+                self.assertEqual(event[3], depth)
+                assigned.append(event[1:3])
+            else:
+                self.assertEqual(event[2], depth)
+                self.assertEqual(assigned.pop()[0], event[1])
+                depth -= 1
+        self.assertEqual(dict(assigned), result)
+
+    def test_trace(self):
+        instrumentation = Instrumentation(sample_every=2)
+        csp = wheel_csp(['red', 'green', 'blue'])
+        Solver(csp, instrumentation=instrumentation).backtrack_solver()
+
+        self.assertEqual(len(instrumentation.samples), instrumentation.nodes // 2)
+        lines = instrumentation.folded_stacks()
+        self.assertEqual(sum(int(line.rsplit(' ', 1)[1]) for line in lines), len(instrumentation.samples))
+        self.assertTrue(all(line.startswith('search;H') for line in lines))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trace.json')
+            instrumentation.dump_json(path)
+            with open(path) as file:
+                data = json.load(file)
+        self.assertEqual(data['nodes'], instrumentation.nodes)
+        self.assertEqual(len(data['samples']), len(instrumentation.samples))
+
+    def test_detach(self):
+        instrumentation = Instrumentation()
+        csp = wheel_csp(['red', 'green', 'blue', 'yellow'])
+        solver = Solver(csp, instrumentation=instrumentation)
+
+        instrumentation.detach()
+        solver.backtrack_solver()
+
+        # Assert that the plain methods are back
+        self.assertEqual(instrumentation.nodes, 0)
+        self.assertNotIn('assign_value', vars(solver))
+        self.assertNotIn('is_consistent', vars(csp))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from CSP import CSP, not_equal
+from local_search import MinConflicts
+
+
+class TestMinConflicts(unittest.TestCase):
+
+    def build_csp(self, rows, columns, colors):
+        # Create a grid where every cell also borders its diagonal neighbors, which needs four colors
+        csp = CSP()
+        for i in range(rows):
+            for j in range(columns):
+                csp.add_variable((i, j), colors)
+        for i in range(rows):
+            for j in range(columns):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    if 0 <= i + di < rows and 0 <= j + dj < columns:
+                        csp.add_constraint(not_equal, [(i, j), (i + di, j + dj)])
+        return csp
+
+    def test_run(self):
+        csp = self.build_csp(12, 12, ['red', 'green', 'blue', 'yellow'])
+
+        search = MinConflicts(csp, seed=3, max_iterations=200000, time_limit=None)
+        solution, conflicts = search.run()
+
+        # Assert that the solution is valid and written back to the CSP
+        self.assertEqual(conflicts, 0)
+        self.assertTrue(csp.is_complete())
+        for _, x, y in csp.constraints:
+            self.assertNotEqual(solution[x], solution[y])
+
+    def test_best_so_far(self):
+        csp = self.build_csp(6, 6, ['red', 'green', 'blue'])
+
+        search = MinConflicts(csp, seed=1, max_iterations=2000, time_limit=None, restart_after=100)
+        solution, conflicts = search.run()
+
+        # Assert that the best assignment is returned with its exact number of conflicts
+        self.assertGreater(conflicts, 0)
+        self.assertEqual(conflicts, sum(solution[x] == solution[y] for _, x, y in csp.constraints))
+        self.assertEqual(search.iterations, 2000)
+        self.assertGreater(search.restarts, 0)
+        self.assertFalse(csp.is_complete())
+
+    def test_seed(self):
+        results = [MinConflicts(self.build_csp(6, 6, ['red', 'green', 'blue']), seed=7, max_iterations=500,
+                                time_limit=None).run() for _ in range(2)]
+
+        self.assertEqual(results[0], results[1])
+
+    def test_limits(self):
+        with self.assertRaises(ValueError):
+            MinConflicts(CSP(), max_iterations=None, time_limit=None)
+
+
+if __name__ == '__main__':
+    unittest.main()
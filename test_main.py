@@ -0,0 +1,34 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+HEAVY_MODULES = ('geopandas', 'matplotlib', 'pandas', 'shapely', 'graphics', 'concurrent', 'multiprocessing',
+                 'sqlite3')
+
+
+class TestMain(unittest.TestCase):
+
+    def loaded_modules(self, statement):
+        # A new interpreter, so that the modules imported by other tests do not count
+        code = f"import json, sys; {statement}; print(json.dumps(sorted(sys.modules)))"
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                                cwd=ROOT).stdout
+        return {module.split('.')[0] for module in json.loads(output)}
+
+    def test_import_is_lightweight(self):
+        # Assert that the heavy dependencies are only imported when a run needs them
+        for statement in ('import main', 'import CSP, Solver', 'import batch'):
+            self.assertFalse(self.loaded_modules(statement) & set(HEAVY_MODULES), statement)
+
+    def test_help(self):
+        output = subprocess.run([sys.executable, 'main.py', '--help'], capture_output=True, text=True, check=True,
+                                cwd=ROOT).stdout
+        self.assertIn('--no-draw', output)
+        self.assertIn('--format', output)
+
+
+if __name__ == '__main__':
+    unittest.main()
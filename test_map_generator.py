@@ -0,0 +1,49 @@
+import os
+import unittest
+from dataset import continent_adjacency
+from map_generator import expand_neighborhoods
+
+DATASET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'countries_dataset.csv')
+
+
+def breadth_first_neighborhoods(adjacency, neighbor_threshold):
+    # The regions within neighbor_threshold hops, regions missing from the adjacency being dead ends
+    neighborhoods = {}
+    for region in adjacency:
+        distances = {region: 0}
+        frontier = [region]
+        for distance in range(1, max(neighbor_threshold, 1) + 1):
+            frontier = [neighbor for current in frontier for neighbor in adjacency.get(current, ())
+                        if neighbor not in distances]
+            distances.update((neighbor, distance) for neighbor in frontier)
+        neighborhoods[region] = set(distances) - {region}
+    return neighborhoods
+
+
+class TestMapGenerator(unittest.TestCase):
+
+    def setUp(self):
+        # A chain A-B-C-D, D borders the foreign region X, whose own borders are unknown
+        self.adjacency = {'A': ['B'], 'B': ['A', 'C'], 'C': ['B', 'D'], 'D': ['C', 'X']}
+
+    def test_expand_neighborhoods(self):
+        self.assertEqual(expand_neighborhoods(self.adjacency, 1),
+                         {'A': {'B'}, 'B': {'A', 'C'}, 'C': {'B', 'D'}, 'D': {'C', 'X'}})
+        self.assertEqual(expand_neighborhoods(self.adjacency, 0), expand_neighborhoods(self.adjacency, 1))
+
+        # Assert that X is reached but never expanded
+        borders = expand_neighborhoods(self.adjacency, 2)
+        self.assertEqual(borders['A'], {'B', 'C'})
+        self.assertEqual(borders['C'], {'A', 'B', 'D', 'X'})
+        self.assertNotIn('X', borders)
+        self.assertEqual(expand_neighborhoods(self.adjacency, 5)['A'], {'B', 'C', 'D', 'X'})
+
+    def test_expand_neighborhoods_matches_breadth_first_search(self):
+        adjacency = continent_adjacency('Europe', DATASET_PATH)
+        for neighbor_threshold in (1, 2, 3):
+            self.assertEqual(expand_neighborhoods(adjacency, neighbor_threshold),
+                             breadth_first_neighborhoods(adjacency, neighbor_threshold))
+
+
+if __name__ == '__main__':
+    unittest.main()
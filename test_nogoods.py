@@ -0,0 +1,38 @@
+import unittest
+from nogoods import NogoodStore
+
+
+class TestNogoodStore(unittest.TestCase):
+
+    def test_violated(self):
+        store = NogoodStore(10)
+        store.add(frozenset({('A', 'red'), ('B', 'green')}))
+        assignments = {'A': 'red', 'B': None, 'C': 'blue'}
+
+        # Assert that only the assignment completing the nogood violates it
+        self.assertIsNone(store.violated(assignments, 'C', 'blue'))
+        assignments['B'] = 'green'
+        self.assertEqual(store.violated(assignments, 'B', 'green'), frozenset({('A', 'red'), ('B', 'green')}))
+        assignments['B'] = 'blue'
+        self.assertIsNone(store.violated(assignments, 'B', 'blue'))
+
+    def test_eviction(self):
+        store = NogoodStore(2)
+        first = frozenset({('A', 'red')})
+        second = frozenset({('B', 'red')})
+        third = frozenset({('C', 'red')})
+        store.add(first)
+        store.add(second)
+
+        # Assert that a matched nogood is kept and the least recently used one is evicted
+        self.assertEqual(store.violated({'A': 'red'}, 'A', 'red'), first)
+        store.add(third)
+        self.assertEqual(len(store), 2)
+        self.assertIn(first, store)
+        self.assertNotIn(second, store)
+        self.assertNotIn(('B', 'red'), store.watches)
+        self.assertEqual(store.evictions, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import pickle
+import unittest
+from CSP import CSP, not_equal
+from Solver import SOLVED, UNSATISFIABLE
+from fixtures import wheel_csp
+from parallel_search import ParallelSearch, extend_prefix
+
+
+class TestParallelSearch(unittest.TestCase):
+
+    def test_extend_prefix(self):
+        csp_bytes = pickle.dumps(wheel_csp(['red', 'green', 'blue', 'yellow']))
+
+        # Assert that permutations of the colors are enumerated once
+        self.assertEqual(extend_prefix(csp_bytes, {'symmetry_breaking': True}, [], 2),
+                         [[('H', 'red'), ('A', 'green')]])
+        self.assertEqual(len(extend_prefix(csp_bytes, {}, [], 2)), 12)
+        self.assertEqual(len(extend_prefix(csp_bytes, {'symmetry_breaking': True}, [], 4)), 2)
+        self.assertEqual(extend_prefix(csp_bytes, {}, [('H', 'red'), ('A', 'red')], 1), [])
+
+    def test_run(self):
+        for options in ({}, {'variable_heuristics': True, 'MAC': True}, {'compiled': True}):
+            csp = wheel_csp(['red', 'green', 'blue', 'yellow'])
+            search = ParallelSearch(csp, workers=2, node_limit=2, split_depth=1, subproblems_per_worker=1, **options)
+            result = search.run()
+
+            # Assert that the solution is written back to the CSP
+            self.assertEqual(result.status, SOLVED)
+            self.assertTrue(csp.is_complete())
+            for _, x, y in csp.constraints:
+                self.assertNotEqual(csp.assignments[x], csp.assignments[y])
+
+    def test_run_backjumping(self):
+        # Create a forest that two colors solve, whose subproblems start below a prefix
+        csp = CSP()
+        for variable in 'ABCDEFG':
+            csp.add_variable(variable, ['red', 'green'])
+        for x, y in ['AG', 'DF', 'EF', 'FG']:
+            csp.add_constraint(not_equal, [x, y])
+        result = ParallelSearch(csp, workers=1, subproblems_per_worker=2, backjumping=True).run()
+
+        # Assert that backjumping within a subproblem never jumps over its prefix
+        self.assertEqual(result.status, SOLVED)
+        for _, x, y in csp.constraints:
+            self.assertNotEqual(csp.assignments[x], csp.assignments[y])
+
+    def test_run_unsatisfiable(self):
+        # Without symmetry breaking, the tree is large enough to split
+        search = ParallelSearch(wheel_csp(['red', 'green', 'blue']), workers=2, node_limit=1, split_depth=1,
+                                subproblems_per_worker=1, symmetry_breaking=False)
+        result = search.run()
+
+        # Assert that subproblems over their budget are split until every one of them fails
+        self.assertEqual(result.status, UNSATISFIABLE)
+        self.assertGreater(search.splits, 0)
+        self.assertGreater(search.subproblems, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import time
+import unittest
+from Solver import SOLVED, TIMED_OUT, UNSATISFIABLE
+from fixtures import wheel_csp
+from portfolio import Portfolio, run_configuration, shuffled_csp
+
+
+class TestPortfolio(unittest.TestCase):
+
+    def test_run(self):
+        csp = wheel_csp(['red', 'green', 'blue', 'yellow'])
+        portfolio = Portfolio(csp, workers=2, time_limit=10)
+        result = portfolio.run()
+
+        # Assert that the first answer is written back to the CSP
+        self.assertEqual(result.status, SOLVED)
+        self.assertIsNotNone(portfolio.winner)
+        self.assertIs(portfolio.results[portfolio.winner], result)
+        self.assertTrue(csp.is_complete())
+        for _, x, y in csp.constraints:
+            self.assertNotEqual(csp.assignments[x], csp.assignments[y])
+
+    def test_run_unsatisfiable(self):
+        portfolio = Portfolio(wheel_csp(['red', 'green', 'blue']), workers=2, time_limit=10)
+        self.assertEqual(portfolio.run().status, UNSATISFIABLE)
+
+        # Assert that local search alone never proves that there is no solution
+        portfolio = Portfolio(wheel_csp(['red', 'green', 'blue']),
+                              [{'engine': 'min_conflicts', 'seed': 0, 'max_iterations': 100}], workers=1)
+        result = portfolio.run()
+        self.assertEqual(result.status, TIMED_OUT)
+        self.assertIsNone(portfolio.winner)
+
+    def test_run_configuration(self):
+        csp = wheel_csp(['red', 'green', 'blue', 'yellow'])
+        for configuration in ({'variable_heuristics': True, 'seed': 3}, {'compiled': True},
+                              {'engine': 'min_conflicts', 'seed': 2}):
+            result = run_configuration(csp, configuration, time.time() + 10)
+            self.assertEqual(result.status, SOLVED)
+        with self.assertRaises(ValueError):
+            run_configuration(csp, {'engine': 'dsatur'}, None)
+
+    def test_shuffled_csp(self):
+        csp = wheel_csp(['red', 'green', 'blue'])
+        copy = shuffled_csp(csp, 1)
+
+        self.assertEqual(set(copy.order), set(csp.order))
+        self.assertEqual(copy.variables, csp.variables)
+        self.assertEqual(len(copy.constraints), len(csp.constraints))
+
+
+if __name__ == '__main__':
+    unittest.main()
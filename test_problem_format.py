@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+from CSP import CSP, not_equal
+from batch import build_csp
+from fixtures import wheel_borders
+from problem_format import MappedProblem, read_dimacs, save_problem, write_dimacs
+
+
+class TestProblemFormat(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        # A wheel with an odd rim, the hub with one color more, FOO is a neighbor from another continent
+        self.borders = wheel_borders()
+        self.borders['E'].add('FOO')
+        self.colors = ['red', 'green', 'blue', 'yellow']
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_save_and_map(self):
+        csp = build_csp(self.borders, self.colors[:3])
+        csp.variables['H'].append('yellow')
+        save_problem(csp, self.path('wheel.bin'))
+
+        with MappedProblem(self.path('wheel.bin')) as problem:
+            self.assertEqual(problem.variables, 6)
+            self.assertEqual(problem.names, list(self.borders))
+            self.assertEqual(list(problem.domain_sizes), [4, 3, 3, 3, 3, 3])
+            self.assertEqual(sorted(problem.names[i] for i in problem.neighbors(0)), list('ABCDE'))
+
+            # Assert that the loaded CSP has the same variables, domains and borders
+            loaded = problem.to_csp(self.colors)
+            self.assertEqual(loaded.variables, csp.variables)
+            self.assertEqual({frozenset(variables) for _, *variables in loaded.constraints},
+                             {frozenset(variables) for _, *variables in csp.constraints if 'FOO' not in variables})
+            self.assertCountEqual([other for _, other in loaded.var_constraints['A']], ['H', 'B', 'E'])
+
+            compiled = problem.to_compiled(self.colors)
+            self.assertEqual(compiled.neighbors, csp.compile().neighbors)
+            self.assertEqual(compiled.decode(compiled.domains[0]), self.colors)
+            self.assertEqual(problem.to_borders()['E'], {'H', 'D', 'A'})
+            self.assertEqual(problem.to_csp().variables['A'], [0, 1, 2])
+            with self.assertRaises(ValueError):
+                problem.to_csp(self.colors[:2])
+            del compiled
+
+    def test_save_errors(self):
+        csp = CSP()
+        csp.add_variable('A', ['red', 'green'])
+        csp.add_variable('B', ['green'])
+        with self.assertRaises(ValueError):
+            save_problem(csp, self.path('gap.bin'))
+
+        with open(self.path('other.bin'), 'wb') as file:
+            file.write(b'not a problem file at all')
+        with self.assertRaises(ValueError):
+            MappedProblem(self.path('other.bin'))
+
+    def test_dimacs(self):
+        with open(self.path('triangle.col'), 'w') as file:
+            file.write('c a triangle and an isolated vertex\np edge 4 3\ne 1 2\ne 2 3\ne 3 1\ne 1 2\n')
+        borders = read_dimacs(self.path('triangle.col'))
+        self.assertEqual(borders, {'1': {'2', '3'}, '2': {'1', '3'}, '3': {'1', '2'}, '4': set()})
+
+        # Assert that the 'p col' problem line is read like 'p edge'
+        with open(self.path('triangle_col.col'), 'w') as file:
+            file.write('p col 4 3\ne 1 2\ne 2 3\ne 3 1\n')
+        self.assertEqual(read_dimacs(self.path('triangle_col.col')), borders)
+
+        # Assert that writing and reading back keeps the graph
+        write_dimacs(build_csp(self.borders, self.colors), self.path('wheel.col'), comment='wheel')
+        with open(self.path('wheel.col')) as file:
+            self.assertEqual(file.readline(), 'c wheel\n')
+        names = list(self.borders)
+        wheel = read_dimacs(self.path('wheel.col'))
+        self.assertEqual({names[int(vertex) - 1]: {names[int(other) - 1] for other in neighbors}
+                          for vertex, neighbors in wheel.items()},
+                         {region: neighbors - {'FOO'} for region, neighbors in self.borders.items()})
+
+        for content in ('p edge 2 1\ne 1 3\n', 'p cnf 2 1\n1 -2 0\n', 'e 1 2\n'):
+            with open(self.path('bad.col'), 'w') as file:
+                file.write(content)
+            with self.assertRaises(ValueError):
+                read_dimacs(self.path('bad.col'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+from solution_cache import SolutionCache, graph_fingerprint
+
+
+class TestSolutionCache(unittest.TestCase):
+
+    def setUp(self):
+        self.borders = {'A': {'B', 'C'}, 'B': {'A', 'C'}, 'C': {'A', 'B', 'FOO'}}
+
+    def test_graph_fingerprint(self):
+        # Assert that the order, duplicate borders and foreign neighbors do not change the fingerprint
+        same = {'C': ['B', 'A'], 'B': ['C'], 'A': ['B', 'C', 'A']}
+        self.assertEqual(graph_fingerprint(self.borders, 4), graph_fingerprint(same, 4))
+        self.assertNotEqual(graph_fingerprint(self.borders, 4), graph_fingerprint(self.borders, 5))
+        self.assertNotEqual(graph_fingerprint(self.borders, 4),
+                            graph_fingerprint({'A': {'B'}, 'B': {'A'}, 'C': set()}, 4))
+
+    def test_get_put(self):
+        cache = SolutionCache()
+        key = graph_fingerprint(self.borders, 4)
+        self.assertIsNone(cache.get(key))
+
+        cache.put(key, 4, {'A': 0, 'B': 1, 'C': 3}, chromatic=3)
+        # Assert that a coloring with as many colors does not replace the cached one, and the chromatic number stays
+        cache.put(key, 4, {'A': 0, 'B': 1, 'C': 2})
+        entry = cache.get(key)
+        self.assertEqual(entry.solution, {'A': 0, 'B': 1, 'C': 3})
+        self.assertEqual(entry.colors, 3)
+        self.assertEqual(entry.chromatic, 3)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_eviction(self):
+        cache = SolutionCache(max_entries=2)
+        for name in 'ABC':
+            cache.put(name, 4, {name: 0})
+            # Assert that reading A keeps it, so B is the least recently used
+            cache.get('A')
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn('B', cache)
+        self.assertIn('A', cache)
+
+        # Assert that entries are evicted once the solutions are too large
+        cache = SolutionCache(max_bytes=35)
+        cache.put('small', 4, {'A': 0})
+        cache.put('large', 4, {region: 0 for region in 'ABCDE'})
+        self.assertEqual(len(cache), 1)
+        self.assertIn('large', cache)
+
+    def test_similar(self):
+        cache = SolutionCache()
+        cache.put('one', 4, {'A': 0, 'X': 1})
+        cache.put('two', 4, {'A': 0, 'B': 1, 'Y': 2})
+        cache.put('five', 5, {'A': 0, 'B': 1, 'C': 2})
+
+        self.assertEqual(cache.similar(self.borders, 4), {'A': 0, 'B': 1})
+        self.assertIsNone(cache.similar(['Z'], 4))
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'solutions.sqlite3')
+            cache = SolutionCache(path)
+            cache.put('key', 4, {'A': 0}, chromatic=1)
+            cache.close()
+
+            cache = SolutionCache(path)
+            self.assertEqual(cache.get('key').chromatic, 1)
+            cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()